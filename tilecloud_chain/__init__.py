@@ -2,17 +2,20 @@
 """TileCloud Chain."""
 
 import asyncio
+import concurrent.futures
 import contextvars
 import datetime
 import json
 import logging
 import logging.config
 import math
+import multiprocessing
 import os
 import pkgutil
 import re
 import shlex
 import sqlite3
+import stat
 import sys
 import tempfile
 import time
@@ -63,14 +66,15 @@ from tilecloud.layout.wmts import WMTSTileLayout
 from tilecloud.store.mbtiles import MBTilesTileStore
 from tilecloud.store.metatile import MetaTileSplitterTileStore
 from tilecloud.store.redis import RedisTileStore
-from tilecloud.store.s3 import S3TileStore
 from tilecloud.store.sqs import SQSTileStore, _maybe_stop
 
 from tilecloud_chain import configuration
 from tilecloud_chain.filter.error import MaximumConsecutiveErrors, TooManyError
 from tilecloud_chain.multitilestore import MultiTileStore
 from tilecloud_chain.settings import settings
+from tilecloud_chain.stat_cache import stat_cache
 from tilecloud_chain.store import (
+    AsyncTilesIterator,
     AsyncTileStore,
     CallWrapper,
     NoneTileStore,
@@ -78,6 +82,12 @@ from tilecloud_chain.store import (
 )
 from tilecloud_chain.store.azure_storage_blob import AzureStorageBlobTileStore
 from tilecloud_chain.store.filesystem import FilesystemTileStore
+from tilecloud_chain.store.metatile import (
+    AsyncMetaTileSplitterTileStore,
+    split_metatile,
+    split_metatile_numpy,
+)
+from tilecloud_chain.store.s3 import S3TileStore, acquire_clients, release_clients
 from tilecloud_chain.timedtilestore import TimedTileStoreWrapper
 
 if TYPE_CHECKING:
@@ -298,8 +308,16 @@ class Run:
             else None
         )
 
-    async def __call__(self, tile: Tile | None) -> Tile | None:
-        """Run the tile generation."""
+    async def __call__(
+        self,
+        tile: Tile | None,
+        functions: list[Callable[[Tile], Awaitable[Tile | None]]] | None = None,
+    ) -> Tile | None:
+        """
+        Run the tile generation.
+
+        The `functions` are used to run only a stage of the tile generation.
+        """
         if tile is None:
             return None
 
@@ -308,7 +326,7 @@ class Run:
 
         tilecoord = tile.tilecoord
         _LOGGER.debug("[%s] Metadata: %s", tilecoord, tile.formated_metadata)
-        for func in self.functions:
+        for func in self.functions if functions is None else functions:
             try:
                 _LOGGER.debug("[%s] Run: %s", tilecoord, func)
                 n = datetime.datetime.now(tz=datetime.UTC)
@@ -384,6 +402,53 @@ class Run:
         return tile
 
 
+class _BulkStoreCall:
+    """
+    Group the concurrent calls on single tiles in calls to a bulk operation of a store.
+
+    The tiles given by the tasks in the same event loop iteration are given together to the bulk
+    operation (e.g. ``store.put``), the results are matched to the calls by tile identity.
+    """
+
+    def __init__(
+        self,
+        operation: Callable[[AsyncIterator[Tile]], AsyncIterator[Tile | None]],
+    ) -> None:
+        self.operation = operation
+        self._pending: dict[int, tuple[Tile, asyncio.Future[Tile | None]]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def _call_pending(self) -> None:
+        # Let the other tasks add their tiles
+        await asyncio.sleep(0)
+        pending = self._pending
+        self._pending = {}
+        try:
+            async for tile in self.operation(AsyncTilesIterator([tile for tile, _ in pending.values()])()):
+                if tile is not None and id(tile) in pending:
+                    _, future = pending.pop(id(tile))
+                    if not future.done():
+                        future.set_result(tile)
+            # The tiles not returned aren't in the store
+            for _, future in pending.values():
+                if not future.done():
+                    future.set_result(None)
+        except Exception as exception:  # pylint: disable=broad-except
+            for _, future in pending.values():
+                if not future.done():
+                    future.set_exception(exception)
+
+    async def __call__(self, tile: Tile) -> Tile | None:
+        """Call the bulk operation with the tile and the ones of the other concurrent calls."""
+        future: asyncio.Future[Tile | None] = asyncio.get_running_loop().create_future()
+        self._pending[id(tile)] = (tile, future)
+        if len(self._pending) == 1:
+            task = asyncio.create_task(self._call_pending())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await future
+
+
 class Close:
     """Database closer."""
 
@@ -670,19 +735,25 @@ class TileFilter(logging.Filter):
 
 
 @asynccontextmanager
-async def get_azure_container_client(container: str) -> AsyncGenerator[ContainerClient, None]:
+async def get_azure_container_client(
+    container: str,
+    **client_options: Any,
+) -> AsyncGenerator[ContainerClient, None]:
     """Get the Azure blob storage client as an async context manager.
 
     The context manager ensures the client session is properly closed.
+    The `client_options` are the configuration of the client, e.g. `max_chunk_get_size`.
     """
     if settings.azure.storage_connection_string:
         async with BlobServiceClient.from_connection_string(
             settings.azure.storage_connection_string,
+            **client_options,
         ) as blob_service_client:
             yield blob_service_client.get_container_client(container=container)
     elif settings.azure.storage_blob_container_url:
         async with ContainerClient.from_container_url(
-            settings.azure.storage_blob_container_url
+            settings.azure.storage_blob_container_url,
+            **client_options,
         ) as container_client:
             yield container_client
     else:
@@ -692,6 +763,7 @@ async def get_azure_container_client(container: str) -> AsyncGenerator[Container
         async with BlobServiceClient(
             account_url=settings.azure.storage_account_url,
             credential=DefaultAzureCredential(),  # type: ignore[arg-type]
+            **client_options,
         ) as blob_service_client:
             container_client = blob_service_client.get_container_client(container=container)
             if settings.azure.storage_blob_validate_container_name:
@@ -933,6 +1005,11 @@ class TileGeneration:
         self.functions_tiles: list[Callable[[Tile], Awaitable[Tile | None]]] = []
         self.functions_metatiles: list[Callable[[Tile], Awaitable[Tile | None]]] = []
         self.functions: list[Callable[[Tile], Awaitable[Tile | None]]] = self.functions_metatiles
+        # Start index in the meta tiles functions and name of the pipeline stages
+        self.stages: list[tuple[int, str]] = []
+        # Start index in the tiles functions of the stage run on the split tiles of the meta tiles
+        self._tiles_stage_start: int | None = None
+        self._tiles_run: Run | None = None
         self.maxconsecutive_errors = maxconsecutive_errors
         self.out = out
         self.grid_cache: dict[Path, dict[str, DatedTileGrid]] = {}
@@ -942,6 +1019,10 @@ class TileGeneration:
         self.multi_task = multi_task
         self.configs: dict[Path, DatedConfig] = {}
         self.hosts_cache: DatedHosts | None = None
+        self._executor: concurrent.futures.Executor | None = None
+        # The shared S3 clients are closed when the last tile generation is closed
+        acquire_clients()
+        self._s3_clients_acquired = True
 
         class Options(NamedTuple):
             verbose: bool
@@ -1117,12 +1198,13 @@ class TileGeneration:
         base_config: configuration.Configuration | None = None,
     ) -> DatedConfig:
         """Get the validated configuration for the file name, with cache management."""
-        if not await config_file.exists():
+        config_stat = await stat_cache.stat(config_file)
+        if config_stat is None:
             _LOGGER.error("Missing config file %s", config_file)
             if ignore_error:
                 return DatedConfig(cast("configuration.Configuration", {}), 0, Path())
             sys.exit(1)
-        if not await config_file.is_file():
+        if not stat.S_ISREG(config_stat.st_mode):
             _LOGGER.error("Config file %s is not a file", config_file)
             if ignore_error:
                 return DatedConfig(cast("configuration.Configuration", {}), 0, Path())
@@ -1130,10 +1212,8 @@ class TileGeneration:
         _LOGGER.debug("Get config for file %s", config_file)
 
         config: DatedConfig | None = self.configs.get(config_file)
-        if config is not None:
-            config_stat = await config_file.stat()
-            if config.mtime == config_stat.st_mtime:
-                return config
+        if config is not None and config.mtime == config_stat.st_mtime:
+            return config
 
         config, success = await self._get_config(config_file, ignore_error, base_config)
         if not success or config is None:
@@ -1170,12 +1250,12 @@ class TileGeneration:
             if not silent:
                 _LOGGER.error("Missing hosts file configuration")
             return {}
-        if not await file_path.exists():
+        file_stat = await stat_cache.stat(file_path)
+        if file_stat is None:
             if not silent:
                 _LOGGER.error("Missing hosts file %s", file_path)
             return {}
 
-        file_stat = await file_path.stat()
         if self.hosts_cache is not None and self.hosts_cache.mtime == file_stat.st_mtime:
             return self.hosts_cache.hosts
 
@@ -1207,7 +1287,10 @@ class TileGeneration:
             ruamel = YAML()
             config.update(ruamel.load(content))
 
-        config_stat = await config_file.stat()
+        # Revalidate the cached status with the read file
+        stat_cache.invalidate(config_file)
+        config_stat = await stat_cache.stat(config_file)
+        assert config_stat is not None
         dated_config = DatedConfig(
             cast("configuration.Configuration", config),
             config_stat.st_mtime,
@@ -1366,13 +1449,11 @@ class TileGeneration:
         if cache["type"] == "s3":
             cache_s3 = cast("configuration.CacheS3", cache)
             # on s3
-            cache_tilestore: AsyncTileStore = TileStoreWrapper(
-                S3TileStore(
-                    cache_s3["bucket"],
-                    layout,
-                    s3_host=cache.get("host", "s3-eu-west-1.amazonaws.com"),
-                    cache_control=cache.get("cache_control"),
-                ),
+            cache_tilestore: AsyncTileStore = S3TileStore(
+                cache_s3["bucket"],
+                layout,
+                s3_host=cache.get("host", "s3-eu-west-1.amazonaws.com"),
+                cache_control=cache.get("cache_control"),
             )
         elif cache["type"] == "azure":
             cache_azure = cast("configuration.CacheAzureTyped", cache)
@@ -1489,6 +1570,8 @@ class TileGeneration:
 
         run = Run(self, self.functions_tiles, out=self.out)
         await run.init()
+        self._tiles_run = run
+        self.add_stage("process")
         self.imap(self._build_meta_getter(store, run))
         self.functions = self.functions_tiles
 
@@ -1503,6 +1586,29 @@ class TileGeneration:
             _LOGGER.warning("Layer %s not found in config %s", layer_name, config_file)
             return None
         layer = config.config["layers"][layer_name]
+        executor = self.get_executor()
+        numpy_splitter = settings.metatile_splitter == "numpy"
+        if layer.get("meta") and (executor is not None or numpy_splitter):
+            return AsyncMetaTileSplitterTileStore(
+                executor,
+                layer["mime_type"],
+                get_grid_config(config, layer_name, grid_name).get(
+                    "tile_size",
+                    configuration.TILE_SIZE_DEFAULT,
+                ),
+                layer.get("meta_buffer", configuration.LAYER_META_BUFFER_DEFAULT),
+                save_options=layer.get("meta_save_options"),  # type: ignore[arg-type]
+                split=split_metatile_numpy if numpy_splitter else split_metatile,
+                # Only the NumPy splitter detects the empty tiles
+                empty_tile=(
+                    (
+                        layer["empty_tile_detection"]["size"],
+                        bytes.fromhex(layer["empty_tile_detection"]["hash"]),
+                    )
+                    if numpy_splitter and "empty_tile_detection" in layer
+                    else None
+                ),
+            )
         if layer.get("meta"):
             return TileStoreWrapper(
                 MetaTileSplitterTileStore(
@@ -1543,17 +1649,41 @@ class TileGeneration:
         assert tile is not None
         return tile
 
-    async def _process_tiles_metatile(self, substream: AsyncIterator[Tile | None], run: Run) -> int:
+    async def _process_tiles_metatile(
+        self,
+        metatile: Tile,
+        substream: AsyncIterator[Tile | None],
+        run: Run,
+    ) -> int:
+        functions = (
+            None if self._tiles_stage_start is None else self.functions_tiles[: self._tiles_stage_start]
+        )
         tasks = []
         async for tile in substream:
             assert tile is not None
-            tasks.append(run(tile))
-        await asyncio.gather(*tasks)
+            tasks.append(run(tile, functions))
+        results = await asyncio.gather(*tasks)
+        if self._tiles_stage_start is not None:
+            # The tiles in error are already managed by the run
+            metatile.stage_tiles = [  # type: ignore[attr-defined]
+                tile for tile in results if tile is not None and not tile.error
+            ]
 
         async with self.error_lock:
             self.error += run.error
         return len(tasks)
 
+    def _build_tiles_stage(self, run: Run) -> Callable[[Tile], Awaitable[Tile]]:
+        async def tiles_stage(metatile: Tile) -> Tile:
+            assert self._tiles_stage_start is not None
+            functions = self.functions_tiles[self._tiles_stage_start :]
+            tiles = getattr(metatile, "stage_tiles", [])
+            metatile.stage_tiles = []  # type: ignore[attr-defined]
+            await asyncio.gather(*[run(tile, functions) for tile in tiles])
+            return metatile
+
+        return tiles_stage
+
     async def _process_metatile(self, metatile: Tile, store: AsyncTileStore, run: Run) -> None:
         log_debug_timings = _LOGGER.isEnabledFor(logging.DEBUG)
 
@@ -1574,7 +1704,7 @@ class TileGeneration:
             self._log_metatile_timing(log_debug_timings, metatile, "pipeline", pipeline_duration)
             return
 
-        split_count = await self._process_tiles_metatile(substream, run)
+        split_count = await self._process_tiles_metatile(metatile, substream, run)
         split_duration = time.perf_counter() - start_split if log_debug_timings else 0.0
         self._log_metatile_timing(log_debug_timings, metatile, "fetch", split_duration, split_count)
 
@@ -1613,6 +1743,22 @@ class TileGeneration:
             return error_file
         return None
 
+    def get_executor(self) -> concurrent.futures.Executor | None:
+        """Get the executor used for the CPU bound functions, if configured."""
+        if self._executor is None and settings.executor.type != "none":
+            if settings.executor.type == "process":
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=settings.executor.max_workers,
+                    # Don't fork the event loop
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=settings.executor.max_workers,
+                    thread_name_prefix="tilecloud-chain",
+                )
+        return self._executor
+
     async def close(self) -> None:
         """Close the tile generation."""
         try:
@@ -1621,6 +1767,12 @@ class TileGeneration:
         finally:
             for file_ in self.error_files_.values():
                 await file_.aclose()
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._s3_clients_acquired:
+                self._s3_clients_acquired = False
+                await release_clients()
 
     async def get_log_tiles_error_file(
         self,
@@ -2284,17 +2436,22 @@ class TileGeneration:
 
         self.imap(MultiAction(get_process))
 
-    def get(self, store: AsyncTileStore, time_message: str | None = None) -> None:
-        """Get the tiles from the store."""
+    def get(self, store: AsyncTileStore, time_message: str | None = None, bulk: bool = False) -> None:
+        """
+        Get the tiles from the store.
+
+        With ``bulk``, the tiles of the concurrent tasks are got together with the bulk get of the store.
+        """
         assert store is not None
-        self.imap(store.get_one, time_message)
+        self.imap(_BulkStoreCall(store.get) if bulk else store.get_one, time_message)
 
     def put(self, store: AsyncTileStore, time_message: str | None = None) -> None:
-        """Put the tiles in the store."""
+        """Put the tiles in the store, the tiles of the concurrent tasks are put with the bulk put."""
         assert store is not None
+        bulk_put = _BulkStoreCall(store.put)
 
         async def put_internal(tile: Tile) -> Tile:
-            await store.put_one(tile)
+            await bulk_put(tile)
             return tile
 
         self.imap(put_internal, time_message)
@@ -2309,6 +2466,39 @@ class TileGeneration:
 
         self.imap(delete_internal, time_message)
 
+    def add_stage(self, name: str) -> None:
+        """
+        Start a new stage of the pipeline on the next meta tile function.
+
+        Used when the pipeline is enabled, the concurrency of the stage is configured with the
+        `TILECLOUD_CHAIN__PIPELINE__<NAME>_TASKS` environment variable.
+
+        After the meta tile splitter, the next tiles functions are run on the split tiles of the meta
+        tiles by a meta tile function of the new stage (only one stage on the tiles functions).
+        """
+        if self.functions is self.functions_metatiles:
+            self.stages.append((len(self.functions_metatiles), name))
+        elif self.stages and self._tiles_stage_start is None:
+            assert self._tiles_run is not None
+            self._tiles_stage_start = len(self.functions_tiles)
+            self.stages.append((len(self.functions_metatiles), name))
+            self.functions_metatiles.append(self._build_tiles_stage(self._tiles_run))
+
+    def _get_stages(self) -> list[tuple[str, list[Callable[[Tile], Awaitable[Tile | None]]], int]]:
+        """Get the name, the functions and the number of tasks of the pipeline stages."""
+        if not self.stages:
+            return [("process", self.functions_metatiles, settings.nb_tasks)]
+        starts = [0] + [start for start, _ in self.stages[1:]]
+        ends = starts[1:] + [len(self.functions_metatiles)]
+        return [
+            (
+                name,
+                self.functions_metatiles[start:end],
+                getattr(settings.pipeline, f"{name}_tasks", None) or settings.nb_tasks,
+            )
+            for (_, name), start, end in zip(self.stages, starts, ends, strict=True)
+        ]
+
     def imap(
         self,
         func: Callable[[Tile], Awaitable[Tile | None]],
@@ -2350,7 +2540,9 @@ class TileGeneration:
         run = Run(self, self.functions_metatiles, out=self.out)
         await run.init()
 
-        if test is None:
+        if test is None and self.multi_task and settings.pipeline.enabled:
+            await self._consume_pipeline(run)
+        elif test is None:
             nb_tasks = settings.nb_tasks if self.multi_task else 1
 
             async def target() -> None:
@@ -2396,6 +2588,98 @@ class TileGeneration:
         for ca in self._close_actions:
             ca()
 
+    async def _consume_pipeline(self, run: Run) -> None:
+        """
+        Consume the tilestream with a staged pipeline.
+
+        The meta tiles are read by one task, then each stage has its own tasks, and the stages are
+        connected by bounded queues, so e.g. the slow WMS renders and the slow uploads overlap.
+        """
+        stages = self._get_stages()
+        queues: list[asyncio.Queue[Tile | None]] = [
+            asyncio.Queue(maxsize=settings.pipeline.queue_size) for _ in stages
+        ]
+        stop = asyncio.Event()
+        # The meta tiles that will not be processed after a stop
+        drained: list[Tile] = []
+
+        async def read() -> None:
+            assert self.tilestream is not None
+            while not stop.is_set():
+                try:
+                    tile = await anext(self.tilestream)
+                except StopAsyncIteration:
+                    if not self.daemon:
+                        break
+                    # If we're in daemon mode, we should wait and try again
+                    continue
+                await queues[0].put(tile)
+
+        async def process(
+            stage_name: str,
+            functions: list[Callable[[Tile], Awaitable[Tile | None]]],
+            queue: asyncio.Queue[Tile | None],
+            next_queue: asyncio.Queue[Tile | None] | None,
+        ) -> None:
+            _LOGGER.debug("Start stage %s", stage_name)
+            while True:
+                tile = await queue.get()
+                if tile is None:
+                    break
+                if stop.is_set():
+                    drained.append(tile)
+                    continue
+
+                host_token = _HOST_CONTEXT.set(tile.metadata.get("host"))
+                layer_token = _LAYER_CONTEXT.set(tile.metadata.get("layer"))
+                meta_tilecoord_token = _META_TILE_COORD_CONTEXT.set(str(tile.tilecoord))
+                try:
+                    result = await run(tile, functions)
+                except TooManyError:
+                    _LOGGER.exception("Too many errors")
+                    stop.set()
+                    continue
+                finally:
+                    _HOST_CONTEXT.reset(host_token)
+                    _LAYER_CONTEXT.reset(layer_token)
+                    _META_TILE_COORD_CONTEXT.reset(meta_tilecoord_token)
+                # The tiles in error are already managed by the run
+                if result is not None and not result.error and next_queue is not None:
+                    await next_queue.put(result)
+            _LOGGER.debug("End stage %s", stage_name)
+
+        async def run_stage(index: int) -> None:
+            stage_name, functions, nb_tasks = stages[index]
+            next_queue = queues[index + 1] if index + 1 < len(stages) else None
+            await asyncio.gather(
+                *[
+                    asyncio.create_task(
+                        process(stage_name, functions, queues[index], next_queue),
+                        name=f"Run {stage_name} {i}",
+                    )
+                    for i in range(max(1, nb_tasks))
+                ],
+            )
+            # End the next stage
+            if next_queue is not None:
+                for _ in range(max(1, stages[index + 1][2])):
+                    await next_queue.put(None)
+
+        async def read_stage() -> None:
+            try:
+                await read()
+            finally:
+                for _ in range(max(1, stages[0][2])):
+                    await queues[0].put(None)
+
+        await asyncio.gather(read_stage(), *[run_stage(index) for index in range(len(stages))])
+
+        # Put back the drained meta tiles in the queue, the not acknowledged messages of the other
+        # queues are delivered again after their timeout
+        if drained and self.queue_store is not None and hasattr(self.queue_store, "release"):
+            _LOGGER.info("Release %i not processed meta tiles", len(drained))
+            await self.queue_store.release(drained)
+
 
 class Count:
     """Count the number of generated tile."""
@@ -2446,7 +2730,8 @@ class HashDropper:
 
     Used to drop the empty tiles.
 
-    The ``store`` is used to delete the empty tiles.
+    The ``store`` is used to delete the empty tiles, the concurrently dropped tiles (e.g. of the same
+    meta tile) are deleted with one bulk delete.
     """
 
     def __init__(
@@ -2465,20 +2750,37 @@ class HashDropper:
         self.store = store
         self.queue_store = queue_store
         self.count = count
+        self._bulk_delete = _BulkStoreCall(self._delete)
+
+    async def _delete(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile]:
+        assert self.store is not None
+        for tile in await self.store.delete([tile async for tile in tiles]):
+            yield tile
 
     async def __call__(self, tile: Tile) -> Tile | None:
-        """Drop the tile if the size and hash are the same as the specified ones."""
+        """
+        Drop the tile if the size and hash are the same as the specified ones.
+
+        The tiles already detected by the meta tile splitter don't need to be hashed, the other ones are
+        hashed inline, it's cheaper than sending the data to an executor, and only the tiles with the
+        configured size are hashed.
+        """
         assert tile.data
-        if len(tile.data) != self.size:
-            return tile
-        if sha1(tile.data).digest() != self.sha1digest:  # noqa: S324
+        empty = getattr(tile, "empty", None)
+        if empty is None:
+            if len(tile.data) != self.size:
+                return tile
+            if sha1(tile.data).digest() != self.sha1digest:  # noqa: S324
+                return tile
+        elif not empty:
             return tile
         if self.store is not None:
             if tile.tilecoord.n != 1:
-                for tilecoord in tile.tilecoord:
-                    await self.store.delete_one(Tile(tilecoord, metadata=tile.metadata))
+                await self.store.delete(
+                    [Tile(tilecoord, metadata=tile.metadata) for tilecoord in tile.tilecoord],
+                )
             else:
-                await self.store.delete_one(tile)
+                await self._bulk_delete(tile)
         _LOGGER.info("The tile %s %s is dropped", tile.tilecoord, tile.formated_metadata)
         if hasattr(tile, "metatile"):
             metatile: Tile = tile.metatile
@@ -2499,7 +2801,6 @@ class _DatedAction:
     """Dated action."""
 
     mtime: float
-    checked_at: float
     action: Callable[[Tile], Awaitable[Tile | None]]
 
 
@@ -2516,7 +2817,6 @@ class MultiAction:
     ) -> None:
         self.get_action = get_action
         self.actions: dict[tuple[Path, str], _DatedAction] = {}
-        self._cache_ttl_seconds = 10.0
 
     async def _get_action(
         self,
@@ -2524,27 +2824,20 @@ class MultiAction:
         layer: str,
     ) -> Callable[[Tile], Awaitable[Tile | None]] | None:
         """Get the action based on the tile's layer name."""
-        now = time.monotonic()
+        config_stat = await stat_cache.stat(config_file)
+        if config_stat is None:
+            _LOGGER.warning("Config file %s does not exist", config_file)
+            self.actions.pop((config_file, layer), None)
+            return None
+
         action = self.actions.get((config_file, layer))
-        if action is None or now - action.checked_at >= self._cache_ttl_seconds:
-            if not await config_file.exists():
-                _LOGGER.warning("Config file %s does not exist", config_file)
+        if action is None or action.mtime != config_stat.st_mtime:
+            action_item = await self.get_action(config_file, layer)
+            if action_item is None:
                 self.actions.pop((config_file, layer), None)
                 return None
-
-            config_stat = await config_file.stat()
-            mtime = config_stat.st_mtime
-
-            if action is None or action.mtime != mtime:
-                action_item = await self.get_action(config_file, layer)
-                if action_item is not None:
-                    action = _DatedAction(mtime, now, action_item)
-                    self.actions[(config_file, layer)] = action
-                else:
-                    self.actions.pop((config_file, layer), None)
-                    return None
-            else:
-                action.checked_at = now
+            action = _DatedAction(config_stat.st_mtime, action_item)
+            self.actions[(config_file, layer)] = action
         return action.action
 
     async def __call__(self, tile: Tile) -> Tile | None:
@@ -46,7 +46,7 @@ class Copy:
         gene.init_tilecoords(config, layer_name, options.grid)
         gene.add_geom_filter()
         gene.add_logger()
-        gene.get(source_tilestore, "Get the tiles")
+        gene.get(source_tilestore, "Get the tiles", bulk=True)
         gene.imap(DropEmpty(gene))
         # Discard tiles with certain content
         if "empty_tile_detection" in layer:
@@ -101,7 +101,7 @@ async def async_main() -> None:
 
         options = parser.parse_args()
 
-        gene = TileGeneration(options.config, options, multi_task=False)
+        gene = TileGeneration(options.config, options, multi_task=True)
         await gene.ainit()
         assert gene.config_file
         config = await gene.get_config(gene.config_file)
@@ -145,7 +145,7 @@ async def async_process() -> None:
 
         options = parser.parse_args()
 
-        gene = TileGeneration(options.config, options, multi_task=False)
+        gene = TileGeneration(options.config, options, multi_task=True)
         await gene.ainit()
 
         copy = Copy()
@@ -286,6 +286,7 @@ class Generate:
         if self._options.role != "server":
             self._count_meta_tiles = self._gene.counter()
 
+        self._gene.add_stage("render")
         self._gene.get(MultiTileStore(TilestoreGetter(self)), "Get tile")
 
         main_config = await self._gene.get_main_config()
@@ -350,6 +351,7 @@ class Generate:
                 self._gene.imap(log_size)
 
             assert self._cache_tilestore is not None
+            self._gene.add_stage("store")
             self._gene.put(self._cache_tilestore, "Store the tile")
 
         if self._options.role == "slave" and not self._options.tiles:
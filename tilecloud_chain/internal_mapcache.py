@@ -8,21 +8,21 @@ import json
 import logging
 import struct
 import sys
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import TYPE_CHECKING, Any, NamedTuple, cast
 
 import redis.asyncio as aioredis
 import sentry_sdk
 import yaml
 from fastapi import Response
-from prometheus_client import Summary
+from prometheus_client import Counter, Summary
 from tilecloud import Tile, TileCoord
 
 import tilecloud_chain.configuration
-from tilecloud_chain import Run, configuration
+from tilecloud_chain import Run, configuration, normalize_bbox
 from tilecloud_chain.generate import Generate
 from tilecloud_chain.settings import settings
-from tilecloud_chain.store import AsyncTileStore
+from tilecloud_chain.store import AsyncTileStore, AsyncTilesIterator
 
 if TYPE_CHECKING:
     from tilecloud_chain.server import Server
@@ -33,6 +33,14 @@ _lock = asyncio.Lock()
 _GENERATOR = None
 
 _GET_TILE = Summary("tilecloud_chain_get_generated_tile", "Time to get the generated tiles", ["storage"])
+_PREFETCH_COUNTER = Counter(
+    "tilecloud_chain_mapcache_prefetch",
+    "Number of meta tiles prefetched by the internal mapcache",
+    ["layer", "result"],
+)
+
+# Maximum number of tiles in a Redis pipeline or MGET
+_BATCH_SIZE = 256
 
 
 def _decode_tile(data: bytes, tile: Tile) -> None:
@@ -95,11 +103,46 @@ class RedisStore(AsyncTileStore):
             self._slave = sentinel.slave_for(service_name)
         self._prefix = config.get("prefix", tilecloud_chain.configuration.PREFIX_DEFAULT)
         self._expiration = config.get("expiration", tilecloud_chain.configuration.EXPIRATION_DEFAULT)
+        # The keys of the concurrent get_one waiting for the next MGET, with the futures of the results
+        self._pending_gets: dict[str, list[asyncio.Future[bytes | None]]] = {}
+        self._mget_tasks: set[asyncio.Task[None]] = set()
+
+    async def _get_data(self, key: str) -> bytes | None:
+        """Get the data of a key, the concurrent calls are grouped in one ``MGET``."""
+        future: asyncio.Future[bytes | None] = asyncio.get_running_loop().create_future()
+        if not self._pending_gets:
+            task = asyncio.create_task(self._mget_pending())
+            self._mget_tasks.add(task)
+            task.add_done_callback(self._mget_tasks.discard)
+        self._pending_gets.setdefault(key, []).append(future)
+        return await future
+
+    async def _mget_pending(self) -> None:
+        """Get the pending keys, in batches with one ``MGET``."""
+        # Let the other concurrent calls add their keys
+        await asyncio.sleep(0)
+        pending = self._pending_gets
+        self._pending_gets = {}
+        keys = list(pending)
+        for start in range(0, len(keys), _BATCH_SIZE):
+            batch = keys[start : start + _BATCH_SIZE]
+            try:
+                values = await self._slave.mget(batch)
+            except Exception as exception:  # pylint: disable=broad-except
+                for key in keys[start:]:
+                    for future in pending[key]:
+                        if not future.done():
+                            future.set_exception(exception)
+                return
+            for key, value in zip(batch, values, strict=True):
+                for future in pending[key]:
+                    if not future.done():
+                        future.set_result(value)
 
     async def get_one(self, tile: Tile) -> Tile | None:
-        """See in superclass."""
+        """Get the tile, the concurrent calls are grouped in one ``MGET``."""
         key = self._get_key(tile)
-        data = await self._slave.get(key)
+        data = await self._get_data(key)
         if data is None:
             _LOG.debug("Tile not found: %s/%s", tile.metadata["layer"], tile.tilecoord)
             return None
@@ -107,6 +150,34 @@ class RedisStore(AsyncTileStore):
         _LOG.debug("Tile found: %s/%s", tile.metadata["layer"], tile.tilecoord)
         return tile
 
+    async def _get_batch(self, tiles: list[Tile]) -> list[Tile | None]:
+        """Get the tiles with one ``MGET``."""
+        results: list[Tile | None] = []
+        for tile, data in zip(
+            tiles,
+            await self._slave.mget([self._get_key(tile) for tile in tiles]),
+            strict=True,
+        ):
+            if data is None:
+                results.append(None)
+            else:
+                _decode_tile(data, tile)
+                results.append(tile)
+        return results
+
+    async def get(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile | None]:
+        """Get the tiles, in batches with one ``MGET``."""
+        batch: list[Tile] = []
+        async for tile in tiles:
+            batch.append(tile)
+            if len(batch) >= _BATCH_SIZE:
+                for result in await self._get_batch(batch):
+                    yield result
+                batch = []
+        if batch:
+            for result in await self._get_batch(batch):
+                yield result
+
     async def put_one(self, tile: Tile) -> Tile:
         """See in superclass."""
         key = self._get_key(tile)
@@ -114,6 +185,29 @@ class RedisStore(AsyncTileStore):
         _LOG.info("Tile saved: %s/%s", tile.metadata["layer"], tile.tilecoord)
         return tile
 
+    async def _put_batch(self, tiles: list[Tile]) -> list[Tile]:
+        """Put the tiles, with their expiration, in one pipeline round trip."""
+        async with self._master.pipeline(transaction=False) as pipeline:
+            for tile in tiles:
+                pipeline.set(self._get_key(tile), _encode_tile(tile), ex=self._expiration)
+            await pipeline.execute()
+        for tile in tiles:
+            _LOG.info("Tile saved: %s/%s", tile.metadata["layer"], tile.tilecoord)
+        return tiles
+
+    async def put(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile]:
+        """Put the tiles, in batches with one pipeline."""
+        batch: list[Tile] = []
+        async for tile in tiles:
+            batch.append(tile)
+            if len(batch) >= _BATCH_SIZE:
+                for result in await self._put_batch(batch):
+                    yield result
+                batch = []
+        if batch:
+            for result in await self._put_batch(batch):
+                yield result
+
     async def delete_one(self, tile: Tile) -> Tile:
         """See in superclass."""
         key = self._get_key(tile)
@@ -141,7 +235,7 @@ class RedisStore(AsyncTileStore):
 
     async def __contains__(self, tile: Tile) -> bool:
         """Check if the tile is in the store."""
-        raise NotImplementedError
+        return bool(await self._slave.exists(self._get_key(tile)))
 
     async def list(self) -> AsyncIterator[Tile]:
         """See in superclass."""
@@ -158,6 +252,10 @@ class Generator:
         """Initialize."""
         self._tilegeneration = tilegeneration
         self.run: Run | None = None
+        # The meta tiles in generation in this process, by key, with the generated tiles as result,
+        # ``None`` if they are in the cache
+        self.in_flight: dict[str, asyncio.Future[dict[TileCoord, Tile] | None]] = {}
+        self.prefetcher = Prefetcher(self)
 
     async def init(self) -> None:
         """Initialize the generator."""
@@ -217,6 +315,7 @@ class Generator:
             _LOG.warning("Tile %s %s in error: %s", tile.tilecoord, tile.formated_metadata, tile.error)
             return False
         success = True
+        generated_tiles = []
         for tile_ in tile.metadata["tiles"].values():  # type: ignore[attr-defined]
             if tile_.error:
                 if try_ > 0:
@@ -232,10 +331,28 @@ class Generator:
                 success = False
             else:
                 _LOG.debug("Tile %s %s generated", tile_.tilecoord, tile_.formated_metadata)
-                assert self._cache_store is not None
-                await self._cache_store.put_one(tile_)
+                generated_tiles.append(tile_)
+        assert self._cache_store is not None
+        # All the tiles of the meta tile in one round trip
+        async for _ in self._cache_store.put(AsyncTilesIterator(generated_tiles)()):
+            pass
         return success
 
+    async def in_cache(self, meta_tile: Tile) -> bool:
+        """Check if the meta tile is in the cache (Redis), from its first tile."""
+        assert self._cache_store is not None
+        return await self._cache_store.__contains__(
+            Tile(
+                TileCoord(meta_tile.tilecoord.z, meta_tile.tilecoord.x, meta_tile.tilecoord.y),
+                metadata=meta_tile.metadata,
+            ),
+        )
+
+    def get_key(self, tile: Tile) -> str:
+        """Get the cache key of the tile."""
+        assert self._cache_store is not None
+        return self._cache_store._get_key(tile)  # noqa: SLF001 # pylint: disable=protected-access
+
     @contextlib.asynccontextmanager
     async def lock(self, tile: Tile) -> AsyncIterator[None]:
         """Lock the tile."""
@@ -258,6 +375,192 @@ async def _get_generator(tilegeneration: tilecloud_chain.TileGeneration) -> Gene
     return _GENERATOR
 
 
+async def _compute_meta_tile(
+    config: tilecloud_chain.DatedConfig,
+    server: "Server",
+    generator: Generator,
+    meta_tile: Tile,
+) -> dict[TileCoord, Tile]:
+    """Generate the meta tile, and get the generated tiles."""
+    success = await generator.compute_tile(meta_tile)
+    if not success:
+        if isinstance(meta_tile.error, BaseException):
+            sentry_sdk.capture_exception(meta_tile.error)
+        server.error(config, 500, "Error while generate the tile, see logs for details")
+
+    if meta_tile.error:
+        _LOG.error(
+            "Tile %s %s in error: %s",
+            meta_tile.tilecoord,
+            meta_tile.formated_metadata,
+            meta_tile.error,
+        )
+        if isinstance(meta_tile.error, BaseException):
+            sentry_sdk.capture_exception(meta_tile.error)
+        server.error(config, 502, "Error while generate the tile, see logs for details")
+
+    return cast("dict[TileCoord, Tile]", meta_tile.metadata["tiles"])
+
+
+async def _single_flight(
+    generator: Generator,
+    key: str,
+    generate: Callable[[], Awaitable[dict[TileCoord, Tile] | None]],
+) -> dict[TileCoord, Tile] | None:
+    """
+    Generate the meta tile once for the concurrent calls of this process.
+
+    The concurrent calls with the same key wait for the same generation, the Redis lock is used between
+    the processes.
+    """
+    while True:
+        in_flight = generator.in_flight.get(key)
+        if in_flight is None:
+            in_flight = asyncio.get_running_loop().create_future()
+            generator.in_flight[key] = in_flight
+            try:
+                tiles = await generate()
+                in_flight.set_result(tiles)
+            except asyncio.CancelledError:
+                in_flight.cancel()
+                raise
+            except Exception as exception:
+                in_flight.set_exception(exception)
+                # Don't log it as never retrieved when there is no waiting call
+                in_flight.exception()
+                raise
+            finally:
+                del generator.in_flight[key]
+            return tiles
+        try:
+            return await asyncio.shield(in_flight)
+        except asyncio.CancelledError:
+            if in_flight.cancelled():
+                # The generating call has been cancelled, retry
+                continue
+            raise
+
+
+class Prefetcher:
+    """
+    Generate in background the meta tiles around the generated ones.
+
+    The neighbor meta tiles, and the parent and children meta tiles, are generated with a limited
+    concurrency, and at most ``TILECLOUD_CHAIN__SERVER__PREFETCH_BUDGET`` meta tiles are waiting or in
+    generation by layer.
+    """
+
+    def __init__(self, generator: Generator) -> None:
+        self._generator = generator
+        self._pending: dict[str, int] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._semaphore: asyncio.Semaphore | None = None
+
+    @staticmethod
+    def _meta_tilecoords(
+        config: tilecloud_chain.DatedConfig,
+        server: "Server",
+        meta_tilecoord: TileCoord,
+        meta_size: int,
+        layer_name: str,
+        grid_name: str,
+    ) -> list[TileCoord]:
+        """Get the neighbor, parent and children meta tile coordinates, in the grid."""
+        grid = config.config["grids"][grid_name]
+        bbox = normalize_bbox(grid["bbox"])
+        tile_size = grid.get("tile_size", configuration.TILE_SIZE_DEFAULT)
+        resolutions = grid["resolutions"]
+
+        def in_grid(tilecoord: TileCoord) -> bool:
+            if tilecoord.z < 0 or tilecoord.z >= len(resolutions) or tilecoord.x < 0 or tilecoord.y < 0:
+                return False
+            tile_width = resolutions[tilecoord.z] * tile_size
+            return (
+                tilecoord.x * tile_width < bbox[2] - bbox[0]
+                and tilecoord.y * tile_width < bbox[3] - bbox[1]
+            )
+
+        z, x, y = meta_tilecoord.z, meta_tilecoord.x, meta_tilecoord.y
+        tilecoords = [
+            TileCoord(z, x + dx * meta_size, y + dy * meta_size)
+            for dy in (-1, 0, 1)
+            for dx in (-1, 0, 1)
+            if dx != 0 or dy != 0
+        ]
+        # The parent zoom level, if it's not served from the tile store
+        if z - 1 > server.get_max_zoom_seed(config, layer_name, grid_name):
+            tilecoords.append(TileCoord(z - 1, x // 2, y // 2))
+        tilecoords += [
+            TileCoord(z + 1, x * 2 + dx * meta_size, y * 2 + dy * meta_size) for dy in (0, 1) for dx in (0, 1)
+        ]
+        return [
+            tilecoord.metatilecoord(meta_size) if meta_size != 1 else tilecoord
+            for tilecoord in tilecoords
+            if in_grid(tilecoord)
+        ]
+
+    def prefetch(
+        self,
+        config: tilecloud_chain.DatedConfig,
+        server: "Server",
+        layer: tilecloud_chain.configuration.Layer,
+        meta_tile: Tile,
+    ) -> None:
+        """Queue the generation of the meta tiles around the generated one, in the limit of the budget."""
+        layer_name = meta_tile.metadata["layer"]
+        meta_size = layer.get("meta_size", configuration.LAYER_META_SIZE_DEFAULT) if layer["meta"] else 1
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.server.prefetch_concurrency)
+        metadata = {key: value for key, value in meta_tile.metadata.items() if key != "tiles"}
+        for tilecoord in self._meta_tilecoords(
+            config,
+            server,
+            meta_tile.tilecoord,
+            meta_size,
+            layer_name,
+            meta_tile.metadata["grid"],
+        ):
+            if self._pending.get(layer_name, 0) >= settings.server.prefetch_budget:
+                _PREFETCH_COUNTER.labels(layer_name, "budget").inc()
+                continue
+            self._pending[layer_name] = self._pending.get(layer_name, 0) + 1
+            task = asyncio.create_task(
+                self._prefetch(config, server, Tile(tilecoord, metadata={**metadata, "tiles": {}})),
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _prefetch(
+        self,
+        config: tilecloud_chain.DatedConfig,
+        server: "Server",
+        meta_tile: Tile,
+    ) -> None:
+        layer_name = meta_tile.metadata["layer"]
+        generator = self._generator
+        try:
+            assert self._semaphore is not None
+            async with self._semaphore:
+                key = generator.get_key(meta_tile)
+                if key in generator.in_flight or await generator.in_cache(meta_tile):
+                    _PREFETCH_COUNTER.labels(layer_name, "skipped").inc()
+                    return
+
+                async def generate() -> dict[TileCoord, Tile] | None:
+                    async with generator.lock(meta_tile):
+                        if await generator.in_cache(meta_tile):
+                            return None
+                        return await _compute_meta_tile(config, server, generator, meta_tile)
+
+                await _single_flight(generator, key, generate)
+                _PREFETCH_COUNTER.labels(layer_name, "generated").inc()
+        except Exception:  # pylint: disable=broad-except
+            _PREFETCH_COUNTER.labels(layer_name, "error").inc()
+            _LOG.warning("Error while prefetching the meta tile %s", meta_tile.tilecoord, exc_info=True)
+        finally:
+            self._pending[layer_name] -= 1
+
+
 async def fetch(
     config: tilecloud_chain.DatedConfig,
     server: "Server",
@@ -282,39 +585,33 @@ async def fetch(
                 metadata=tile.metadata,
             )
 
-        async with generator.lock(meta_tile):
-            fetched_tile = await generator.read_from_cache(tile)
-            if fetched_tile is None:
+        async def generate() -> dict[TileCoord, Tile] | None:
+            nonlocal backend, fetched_tile
+            async with generator.lock(meta_tile):
+                fetched_tile = await generator.read_from_cache(tile)
+                if fetched_tile is not None:
+                    return None
                 backend = "wms-generate"
-                success = await generator.compute_tile(meta_tile)
-                if not success:
-                    if isinstance(meta_tile.error, BaseException):
-                        sentry_sdk.capture_exception(meta_tile.error)
-                    return server.error(config, 500, "Error while generate the tile, see logs for details")
-
-                if meta_tile.error:
-                    _LOG.error(
-                        "Tile %s %s in error: %s",
-                        meta_tile.tilecoord,
-                        meta_tile.formated_metadata,
-                        meta_tile.error,
-                    )
-                    if isinstance(meta_tile.error, BaseException):
-                        sentry_sdk.capture_exception(meta_tile.error)
-                    return server.error(config, 502, "Error while generate the tile, see logs for details")
-
-                # Don't fetch the just generated tile
-                tiles: dict[TileCoord, Tile] = cast("dict[TileCoord, Tile]", meta_tile.metadata["tiles"])
-                try:
-                    fetched_tile = tiles[tile.tilecoord]
-                except KeyError:
-                    _LOG.exception(
-                        "Try to get the tile %s %s, from the available: '%s'",
-                        tile.tilecoord,
-                        tile.formated_metadata,
-                        ", ".join([str(e) for e in tiles]),
-                    )
-                    return server.error(config, 500, "Error while getting the tile, see logs for details")
+                return await _compute_meta_tile(config, server, generator, meta_tile)
+
+        tiles = await _single_flight(generator, generator.get_key(meta_tile), generate)
+        if tiles is None and fetched_tile is None:
+            # Generated by another process
+            fetched_tile = await generator.read_from_cache(tile)
+        if backend == "wms-generate" and settings.server.prefetch:
+            generator.prefetcher.prefetch(config, server, layer, meta_tile)
+
+        if fetched_tile is None:
+            # Don't fetch the just generated tile
+            if tiles is None or tile.tilecoord not in tiles:
+                _LOG.error(
+                    "Try to get the tile %s %s, from the available: '%s'",
+                    tile.tilecoord,
+                    tile.formated_metadata,
+                    ", ".join([str(e) for e in tiles or {}]),
+                )
+                return server.error(config, 500, "Error while getting the tile, see logs for details")
+            fetched_tile = tiles[tile.tilecoord]
 
     response_headers = {
         "Expires": (
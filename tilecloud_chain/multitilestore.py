@@ -1,6 +1,7 @@
 # Copyright (c) 2026 by Camptocamp
 """Redirect to the corresponding Tilestore for the layer and config file."""
 
+import asyncio
 import logging
 from collections.abc import AsyncIterator, Awaitable, Callable
 from dataclasses import dataclass
@@ -8,10 +9,15 @@ from dataclasses import dataclass
 from anyio import Path
 from tilecloud import Tile
 
-from tilecloud_chain.store import AsyncTilesIterator, AsyncTileStore
+from tilecloud_chain.settings import settings
+from tilecloud_chain.stat_cache import stat_cache
+from tilecloud_chain.store import AsyncTileStore
 
 logger = logging.getLogger(__name__)
 
+# Marks the end of the results of the bulk operations
+_END = object()
+
 
 @dataclass
 class _DatedStore:
@@ -22,18 +28,27 @@ class _DatedStore:
 
 
 class MultiTileStore(AsyncTileStore):
-    """Redirect to the corresponding Tilestore for the layer and config file."""
+    """
+    Redirect to the corresponding Tilestore for the layer and config file.
+
+    The configuration file modification time is checked through the shared throttled `stat_cache`.
+    """
 
     def __init__(
         self,
         get_store: Callable[[Path, str, str | None], Awaitable[AsyncTileStore | None]],
+        concurrency: int | None = None,
     ) -> None:
-        """Initialize."""
+        """Initialize, ``concurrency`` is the number of tiles in progress by store in the bulk operations."""
         self.get_store = get_store
+        self.concurrency = concurrency or settings.multi_store_concurrency
         self.stores: dict[tuple[Path, str, str], _DatedStore | None] = {}
 
     async def _get_store(self, config_file: Path, layer: str, grid_name: str) -> AsyncTileStore | None:
-        stat_info = await config_file.stat()
+        stat_info = await stat_cache.stat(config_file)
+        if stat_info is None:
+            message = f"Missing config file {config_file}"
+            raise FileNotFoundError(message)
         mtime = stat_info.st_mtime
         dated_store = self.stores.get((config_file, layer, grid_name))
         if dated_store is not None and dated_store.mtime != mtime:
@@ -75,6 +90,23 @@ class MultiTileStore(AsyncTileStore):
         assert store is not None
         return await store.delete_one(tile)
 
+    async def delete(self, tiles: list[Tile]) -> list[Tile]:
+        """
+        Delete the ``tiles`` with a bulk delete on each corresponding store.
+
+        Arguments:
+            tiles: list[Tile]
+        """
+        tiles_by_store: dict[tuple[str, str, str], list[Tile]] = {}
+        for tile in tiles:
+            key = (tile.metadata["config_file"], tile.metadata["layer"], tile.metadata["grid"])
+            tiles_by_store.setdefault(key, []).append(tile)
+        for (config_file, layer, grid), store_tiles in tiles_by_store.items():
+            store = await self._get_store(Path(config_file), layer, grid)
+            assert store is not None
+            await store.delete(store_tiles)
+        return tiles
+
     async def list(self) -> AsyncIterator[Tile]:
         """Generate all the tiles in the store, but without their data."""
         # Too dangerous to list all tiles in all stores. Return an empty iterator instead
@@ -103,19 +135,98 @@ class MultiTileStore(AsyncTileStore):
         assert store is not None
         return await store.get_one(tile)
 
+    async def head_one(self, tile: Tile) -> Tile | None:
+        """
+        Add the metadata to ``tile``, or return ``None`` if ``tile`` is not in the store.
+
+        Arguments:
+            tile: Tile
+        """
+        store = await self._get_store_tile(tile)
+        assert store is not None
+        return await store.head_one(tile)
+
     async def get(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile | None]:
         """
         Add data to the tiles, or return ``None`` if the tile is not in the store.
 
+        The tiles are grouped by configuration file, layer and grid, and streamed to the bulk get
+        of the corresponding stores, concurrently, the order of the results isn't kept.
+
+        Arguments:
+            tiles: AsyncIterator[Tile]
+        """
+        async for tile in self._dispatch(tiles, lambda store, store_tiles: store.get(store_tiles)):
+            yield tile
+
+    async def put(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile]:
+        """
+        Store the ``tiles`` in the store.
+
+        The tiles are grouped by configuration file, layer and grid, and streamed to the bulk put
+        of the corresponding stores, concurrently, the order of the results isn't kept.
+
         Arguments:
             tiles: AsyncIterator[Tile]
         """
-        async for tile in tiles:
-            store = await self._get_store_tile(tile)
-            assert store is not None, f"No store found for tile {tile.tilecoord} {tile.formated_metadata}"
+        async for tile in self._dispatch(tiles, lambda store, store_tiles: store.put(store_tiles)):
+            assert tile is not None
+            yield tile
+
+    async def _dispatch(
+        self,
+        tiles: AsyncIterator[Tile],
+        operation: Callable[[AsyncTileStore, AsyncIterator[Tile]], AsyncIterator[Tile | None]],
+    ) -> AsyncIterator[Tile | None]:
+        """Stream the tiles to the bulk ``operation`` of the corresponding stores."""
+        results: asyncio.Queue[object] = asyncio.Queue(maxsize=self.concurrency)
+        inputs: dict[tuple[str, str, str], asyncio.Queue[Tile | None]] = {}
+        workers: list[asyncio.Task[None]] = []
+
+        async def input_stream(queue: asyncio.Queue[Tile | None]) -> AsyncIterator[Tile]:
+            while (tile := await queue.get()) is not None:
+                yield tile
+
+        async def work(store: AsyncTileStore, queue: asyncio.Queue[Tile | None]) -> None:
+            try:
+                async for new_tile in operation(store, input_stream(queue)):
+                    await results.put(new_tile)
+            except Exception as exception:  # pylint: disable=broad-except
+                await results.put(exception)
+
+        async def dispatch() -> None:
+            try:
+                async for tile in tiles:
+                    key = (tile.metadata["config_file"], tile.metadata["layer"], tile.metadata["grid"])
+                    queue = inputs.get(key)
+                    if queue is None:
+                        store = await self._get_store(Path(key[0]), key[1], key[2])
+                        assert store is not None, (
+                            f"No store found for tile {tile.tilecoord} {tile.formated_metadata}"
+                        )
+                        queue = asyncio.Queue(maxsize=self.concurrency)
+                        inputs[key] = queue
+                        workers.append(asyncio.create_task(work(store, queue)))
+                    await queue.put(tile)
+                for queue in inputs.values():
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            except Exception as exception:  # pylint: disable=broad-except
+                await results.put(exception)
+            finally:
+                await results.put(_END)
 
-            async for new_tile in store.get(AsyncTilesIterator([tile])()):
-                yield new_tile
+        dispatcher = asyncio.create_task(dispatch())
+        try:
+            while (result := await results.get()) is not _END:
+                if isinstance(result, Exception):
+                    raise result
+                assert result is None or isinstance(result, Tile)
+                yield result
+        finally:
+            dispatcher.cancel()
+            for worker in workers:
+                worker.cancel()
 
     def __str__(self) -> str:
         """Return a string representation of the object."""
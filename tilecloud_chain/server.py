@@ -28,16 +28,22 @@
 
 import asyncio
 import datetime
+import email.utils
+import gzip
+import hashlib
 import html
 import logging
 import math
 import mimetypes
+import os
 import time
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
 from copy import copy
 from dataclasses import dataclass
 from io import BytesIO
 from typing import Annotated, Any, Literal, NamedTuple, cast
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlparse
 
 import aiobotocore.session
 import aiohttp
@@ -49,9 +55,10 @@ from anyio import Path
 from azure.core.exceptions import ResourceNotFoundError
 from c2casgiutils.config import settings as c2c_settings
 from fastapi import FastAPI, HTTPException, Query, Request
-from fastapi.responses import Response
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from prometheus_client import Summary
+from starlette.background import BackgroundTask
 from tilecloud import Tile, TileCoord
 
 import tilecloud_chain
@@ -67,10 +74,22 @@ from tilecloud_chain import (
 from tilecloud_chain.controller import validate_generate_wmts_capabilities
 from tilecloud_chain.settings import settings
 from tilecloud_chain.store import AsyncTileStore
+from tilecloud_chain.store.filesystem import FilesystemTileStore, file_etag
+from tilecloud_chain.store.url import DatedHostsLimit, get_host_concurrent
+from tilecloud_chain.tile_cache import TileCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # type: ignore[assignment]
 
 _LOGGER = logging.getLogger(__name__)
 
 _GET_TILE = Summary("tilecloud_chain_get_tile", "Time to get the tiles", ["storage"])
+_RENDER_CAPABILITIES = Summary(
+    "tilecloud_chain_server_capabilities_render",
+    "Time to render the WMTS capabilities",
+)
 
 _TILEGENERATION: TileGeneration | None = None
 
@@ -100,10 +119,127 @@ class LegendLayerCache:
     timestamp: float
 
 
+# Configuration file, configuration modification time, main configuration modification time, cache name,
+# base URLs and WMTS path, the legends are filled only when the capabilities are rendered
+CapabilitiesKey = tuple[Path, float, float, str, tuple[str, ...], str]
+
+
+@dataclass
+class RenderedCapabilities:
+    """Rendered WMTS capabilities, with the pre-compressed variants."""
+
+    data: bytes
+    etag: str
+    encoded: dict[str, bytes]
+
+
 _LEGEND_CONFIG_CACHE: dict[str, LegendLayerCache] = {}
 _LEGEND_CONFIG_CACHE_LOCK: asyncio.Lock | None = None
 
 
+def _content_etag(data: bytes) -> str:
+    """Get a strong ETag from the content, for the stores that don't provide one."""
+    return f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str | None) -> bool:
+    """Check the ``If-None-Match`` header against the ETag, with the weak comparison."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def _validator_headers(etag: str | None, last_modified: datetime.datetime | None) -> dict[str, str]:
+    """Get the ``ETag`` and ``Last-Modified`` headers."""
+    headers = {}
+    if etag:
+        headers["ETag"] = etag
+    if last_modified is not None:
+        headers["Last-Modified"] = email.utils.format_datetime(
+            last_modified.astimezone(datetime.UTC),
+            usegmt=True,
+        )
+    return headers
+
+
+def _file_validator_headers(file_stat: os.stat_result) -> dict[str, str]:
+    """Get the ``ETag`` and ``Last-Modified`` headers of a file."""
+    return _validator_headers(
+        file_etag(file_stat),
+        datetime.datetime.fromtimestamp(file_stat.st_mtime, tz=datetime.UTC),
+    )
+
+
+def _not_modified(headers: dict[str, str]) -> Response:
+    """Get the ``304 Not Modified`` response, without the content headers."""
+    return Response(
+        status_code=304,
+        headers={
+            name: value
+            for name, value in headers.items()
+            if name not in ("Content-Type", "Content-Encoding", "Content-Length")
+        },
+    )
+
+
+def _parse_range(range_header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Get the first and the last byte of a single bytes ``Range``, ``None`` to get the whole content.
+
+    Raise a ``ValueError`` if the range is not satisfiable.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_text, _, end_text = range_header.removeprefix("bytes=").strip().partition("-")
+    if (start_text and not start_text.isdigit()) or (end_text and not end_text.isdigit()):
+        return None
+    if not start_text:
+        if not end_text:
+            return None
+        if int(end_text) == 0 or size == 0:
+            message = f"Range not satisfiable: {range_header}"
+            raise ValueError(message)
+        return max(size - int(end_text), 0), size - 1
+    start = int(start_text)
+    if end_text and int(end_text) < start:
+        return None
+    if start >= size:
+        message = f"Range not satisfiable: {range_header}"
+        raise ValueError(message)
+    end = min(int(end_text), size - 1) if end_text else size - 1
+    return start, end
+
+
+def _accepted_encodings(accept_encoding: str | None) -> set[str]:
+    """Get the content encodings accepted by the client."""
+    encodings = set()
+    for part in (accept_encoding or "").split(","):
+        encoding, _, parameters = part.partition(";")
+        parameters = parameters.replace(" ", "")
+        try:
+            quality = float(parameters.removeprefix("q=")) if parameters.startswith("q=") else 1
+        except ValueError:
+            quality = 0
+        encoding = encoding.strip().lower()
+        if encoding and quality > 0:
+            encodings.add(encoding)
+    return encodings
+
+
+def _render_capabilities(content: str) -> RenderedCapabilities:
+    """Encode the capabilities, and pre-compress them if enabled."""
+    data = content.encode("utf-8")
+    encoded = {}
+    if settings.server.capabilities_compression:
+        encoded["gzip"] = gzip.compress(data)
+        if brotli is not None:
+            encoded["br"] = brotli.compress(data)
+    return RenderedCapabilities(data, _content_etag(data), encoded)
+
+
 def _add_dimensions_to_params(
     params: dict[str, str],
     layer: str,
@@ -233,9 +369,15 @@ class Server:
         self.filter_cache: dict[Path, dict[str, DatedFilter]] = {}
         self.s3_client_cache: dict[str, Any] = {}
         self.store_cache: dict[tuple[Path, str, str], DatedStore] = {}
+        self.tile_cache = TileCache(settings.tile_cache.max_size, settings.tile_cache.max_item_size)
+        self.capabilities_cache: dict[CapabilitiesKey, RenderedCapabilities] = {}
+        self.forward_sessions: dict[str, aiohttp.ClientSession] = {}
+        # The semaphore by host, with the modification time of the hosts limit file used to create it
+        self._forward_semaphores: dict[str, tuple[asyncio.Semaphore, float]] = {}
+        self._hosts_limit = DatedHostsLimit()
 
     async def close(self) -> None:
-        """Close all cached tile stores and S3 clients."""
+        """Close all cached tile stores, S3 clients and forward sessions."""
         for dated_store in list(self.store_cache.values()):
             try:
                 await dated_store.store.close()
@@ -248,6 +390,15 @@ class Server:
             except Exception:
                 _LOGGER.warning("Error while closing S3 client", exc_info=True)
         self.s3_client_cache.clear()
+        for session in self.forward_sessions.values():
+            try:
+                await session.close()
+            except (TimeoutError, aiohttp.ClientConnectionError):
+                _LOGGER.warning("Ignored error during aiohttp session close", exc_info=True)
+        self.forward_sessions.clear()
+        self._forward_semaphores.clear()
+        self.tile_cache.clear()
+        self.capabilities_cache.clear()
 
     @staticmethod
     def get_expires_hours(config: tilecloud_chain.DatedConfig) -> float:
@@ -377,33 +528,81 @@ class Server:
         key_name: str,
         headers: dict[str, str],
         config: tilecloud_chain.DatedConfig,
+        if_none_match: str | None = None,
+        range_header: str | None = None,
     ) -> Response:
         cache = self.get_cache(config)
         try:
             cache_s3 = cast("tilecloud_chain.configuration.CacheS3", cache)
-            bucket = cache_s3
             client = await self.get_s3_client(config)
-            response = await client.get_object(Bucket=bucket, Key=key_name)
-            body = response["Body"]
-            try:
-                headers["Content-Type"] = response.get("ContentType")
-                data = await body.read()
-                return Response(content=data, headers=headers)
-            finally:
-                await body.close()
+            response = await client.get_object(
+                Bucket=cache_s3["bucket"],
+                Key=key_name,
+                **({"IfNoneMatch": if_none_match} if if_none_match else {}),
+                **({"Range": range_header} if range_header else {}),
+            )
         except botocore.exceptions.ClientError as ex:
+            response_metadata = ex.response.get("ResponseMetadata", {})
+            if response_metadata.get("HTTPStatusCode") == 304:
+                response_headers = response_metadata.get("HTTPHeaders", {})
+                return _not_modified(
+                    {
+                        **headers,
+                        **{
+                            name: response_headers[name.lower()]
+                            for name in ("ETag", "Last-Modified")
+                            if name.lower() in response_headers
+                        },
+                    },
+                )
+            if response_metadata.get("HTTPStatusCode") == 416:
+                size = ex.response["Error"].get("ActualObjectSize")
+                if size is None:
+                    size = (await client.head_object(Bucket=cache_s3["bucket"], Key=key_name))[
+                        "ContentLength"
+                    ]
+                return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
             if ex.response["Error"]["Code"] == "NoSuchKey":
                 return self.error(config, 404, key_name + " not found")
             raise
 
+        headers = {
+            **headers,
+            **_validator_headers(response.get("ETag"), response.get("LastModified")),
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(response["ContentLength"]),
+        }
+        if response.get("ContentType"):
+            headers["Content-Type"] = response["ContentType"]
+        if response.get("ContentRange"):
+            headers["Content-Range"] = response["ContentRange"]
+
+        async def _chunks() -> AsyncIterator[bytes]:
+            async with response["Body"] as body:
+                async for chunk in body.iter_chunks(settings.server.stream_chunk_size):
+                    yield chunk
+
+        return StreamingResponse(
+            _chunks(),
+            status_code=206 if response.get("ContentRange") else 200,
+            headers=headers,
+        )
+
     async def get(
         self,
         path: str,
         headers: dict[str, str],
         config: tilecloud_chain.DatedConfig,
+        if_none_match: str | None = None,
+        range_header: str | None = None,
         **kwargs: Any,
     ) -> Response:
-        """Get capabilities or other static files."""
+        """
+        Get capabilities or other static files.
+
+        Answer ``304 Not Modified`` when ``if_none_match`` matches the ETag of the file, the content of
+        the object storages is streamed, and a single bytes range (``range_header``) is supported.
+        """
         assert _TILEGENERATION
         cache = self.get_cache(config)
 
@@ -412,22 +611,56 @@ class Server:
             key_name = Path(cache_s3["folder"]) / path
             try:
                 with _GET_TILE.labels(storage="s3").time():
-                    return await self._s3_read(str(key_name), headers, config, **kwargs)
+                    return await self._s3_read(
+                        str(key_name),
+                        headers,
+                        config,
+                        if_none_match,
+                        range_header,
+                    )
             except Exception:
                 del self.s3_client_cache[cache_s3.get("host", "aws")]
                 with _GET_TILE.labels(storage="s3").time():
-                    return await self._s3_read(str(key_name), headers, config, **kwargs)
+                    return await self._s3_read(
+                        str(key_name),
+                        headers,
+                        config,
+                        if_none_match,
+                        range_header,
+                    )
         if cache["type"] == "azure":
             cache_azure = cast("tilecloud_chain.configuration.CacheAzure", cache)
             key_name = Path(cache_azure["folder"]) / path
             try:
-                async with get_azure_container_client(container=cache_azure["container"]) as container_client:
+                async with AsyncExitStack() as stack:
+                    # Download by chunks of the stream chunk size, by default the first 32 MiB are
+                    # downloaded at once
+                    container_client = await stack.enter_async_context(
+                        get_azure_container_client(
+                            container=cache_azure["container"],
+                            max_single_get_size=settings.server.stream_chunk_size,
+                            max_chunk_get_size=settings.server.stream_chunk_size,
+                        ),
+                    )
                     with _GET_TILE.labels(storage="azure").time():
                         blob = container_client.get_blob_client(
                             blob=str(key_name),
                         )
                     properties = await blob.get_blob_properties()
-                    data = await (await blob.download_blob()).readall()
+                    headers = {
+                        **headers,
+                        **_validator_headers(properties.etag, properties.last_modified),
+                        "Accept-Ranges": "bytes",
+                    }
+                    if _etag_matches(if_none_match, properties.etag):
+                        return _not_modified(headers)
+                    try:
+                        byte_range = _parse_range(range_header, properties.size)
+                    except ValueError:
+                        return Response(
+                            status_code=416,
+                            headers={"Content-Range": f"bytes */{properties.size}"},
+                        )
                     headers = {
                         **headers,
                         **(
@@ -441,9 +674,20 @@ class Server:
                             else {}
                         ),
                     }
-                    return Response(
-                        content=data,
+                    if byte_range is None:
+                        downloader = await blob.download_blob()
+                        headers["Content-Length"] = str(properties.size)
+                    else:
+                        start, end = byte_range
+                        downloader = await blob.download_blob(offset=start, length=end - start + 1)
+                        headers["Content-Length"] = str(end - start + 1)
+                        headers["Content-Range"] = f"bytes {start}-{end}/{properties.size}"
+                    # The client is closed after the response, even if the body isn't sent
+                    return StreamingResponse(
+                        downloader.chunks(),
+                        status_code=200 if byte_range is None else 206,
                         headers=headers,
+                        background=BackgroundTask(stack.pop_all().aclose),
                     )
             except ResourceNotFoundError:
                 return self.error(config, 404, f"{path} not found", **kwargs)
@@ -455,14 +699,17 @@ class Server:
             p = folder / path
             if not await p.is_file():
                 return self.error(config, 404, f"{path} not found", **kwargs)
-            async with await p.open("rb") as file:
-                data = await file.read()
-            content_type = mimetypes.guess_type(str(p))[0]
-            headers = {
-                **headers,
-                **({"Content-Type": content_type} if content_type else {}),
-            }
-            return Response(content=data, headers=headers)
+            file_stat = await p.stat()
+            headers = {**headers, **_file_validator_headers(file_stat)}
+            if _etag_matches(if_none_match, headers["ETag"]):
+                return _not_modified(headers)
+            # Sent by the ASGI server (with sendfile when supported), the Range header is supported
+            return FileResponse(
+                str(p),
+                headers=headers,
+                media_type=mimetypes.guess_type(str(p))[0],
+                stat_result=file_stat,
+            )
 
     async def serve(
         self,
@@ -508,7 +755,13 @@ class Server:
                 cache = self.get_cache(config)
                 if "wmtscapabilities_file" in cache:
                     wmtscapabilities_file = cache["wmtscapabilities_file"]
-                    return await self.get(wmtscapabilities_file, headers, config=config)
+                    return await self.get(
+                        wmtscapabilities_file,
+                        headers,
+                        config=config,
+                        if_none_match=request.headers.get("If-None-Match") if request is not None else None,
+                        range_header=request.headers.get("Range") if request is not None else None,
+                    )
 
                 cache_name: str = self.get_cache_name(config)
                 if config is None:
@@ -521,7 +774,8 @@ class Server:
                         status_code=500,
                         detail="Failed to generate WMTS capabilities, invalid configuration",
                     )
-                server_config = (await _TILEGENERATION.get_main_config()).config.get("server")
+                main_config = await _TILEGENERATION.get_main_config()
+                server_config = main_config.config.get("server")
 
                 wmts_path = (
                     c2c_settings.route_prefix[1:] if settings.wmts_path is None else settings.wmts_path
@@ -535,33 +789,59 @@ class Server:
 
                 base_urls = [ending_slash(url) for url in base_urls]
 
-                await _fill_legend(cache, f"{base_urls[0]}{wmts_path}static/", config=config)
-
-                return _TEMPLATES.TemplateResponse(
-                    request,
-                    "wmts_get_capabilities.jinja",
-                    {
-                        "config": config,
-                        "layers": config.config.get("layers", {}),
-                        "layer_legends": _TILEGENERATION.layer_legends,
-                        "grids": config.config["grids"],
-                        "base_urls": base_urls,
-                        "base_url_postfix": wmts_path,
-                        "get_tile_matrix_identifier": get_tile_matrix_identifier,
-                        "server": server_config is not None,
-                        "has_metadata": "metadata" in config.config,
-                        "metadata": config.config.get("metadata"),
-                        "has_provider": "provider" in config.config,
-                        "provider": config.config.get("provider"),
-                        "get_grid_names": tilecloud_chain.get_grid_names,
-                        "get_tile_matrix_limits": tilecloud_chain.get_tile_matrix_limits,
-                        "enumerate": enumerate,
-                        "ceil": math.ceil,
-                        "int": int,
-                        "sorted": sorted,
-                        "configuration": configuration,
-                    },
-                    headers=headers,
+                capabilities_key: CapabilitiesKey = (
+                    config.file,
+                    config.mtime,
+                    main_config.mtime,
+                    cache_name,
+                    tuple(base_urls),
+                    wmts_path,
+                )
+                rendered = self.capabilities_cache.get(capabilities_key)
+                if rendered is None:
+                    legends_filled = await _fill_legend(
+                        cache,
+                        f"{base_urls[0]}{wmts_path}static/",
+                        config=config,
+                    )
+                    with _RENDER_CAPABILITIES.time():
+                        rendered = _render_capabilities(
+                            _TEMPLATES.get_template("wmts_get_capabilities.jinja").render(
+                                {
+                                    "config": config,
+                                    "layers": config.config.get("layers", {}),
+                                    "layer_legends": _TILEGENERATION.layer_legends,
+                                    "grids": config.config["grids"],
+                                    "base_urls": base_urls,
+                                    "base_url_postfix": wmts_path,
+                                    "get_tile_matrix_identifier": get_tile_matrix_identifier,
+                                    "server": server_config is not None,
+                                    "has_metadata": "metadata" in config.config,
+                                    "metadata": config.config.get("metadata"),
+                                    "has_provider": "provider" in config.config,
+                                    "provider": config.config.get("provider"),
+                                    "get_grid_names": tilecloud_chain.get_grid_names,
+                                    "get_tile_matrix_limits": tilecloud_chain.get_tile_matrix_limits,
+                                    "enumerate": enumerate,
+                                    "ceil": math.ceil,
+                                    "int": int,
+                                    "sorted": sorted,
+                                    "configuration": configuration,
+                                },
+                            ),
+                        )
+                    # Not cached when a legend failed, to retry it on the next request
+                    if settings.server.capabilities_cache and legends_filled:
+                        # Remove the outdated capabilities of the configuration file
+                        for key in [key for key in self.capabilities_cache if key[0] == config.file]:
+                            del self.capabilities_cache[key]
+                        self.capabilities_cache[capabilities_key] = rendered
+
+                return self._capabilities_response(
+                    rendered,
+                    headers,
+                    request.headers.get("Accept-Encoding") if request is not None else None,
+                    request.headers.get("If-None-Match") if request is not None else None,
                 )
 
             if (
@@ -675,7 +955,14 @@ class Server:
             if params["FORMAT"] != layer["mime_type"]:
                 raise HTTPException(status_code=400, detail=f"Wrong Format '{params['FORMAT']}'")  # noqa: TRY301
 
-            return await self._get_tile(config, layer, tile, params, host)
+            return await self._get_tile(
+                config,
+                layer,
+                tile,
+                params,
+                host,
+                if_none_match=request.headers.get("If-None-Match") if request is not None else None,
+            )
 
         except HTTPException:
             raise
@@ -690,6 +977,7 @@ class Server:
         tile: Tile,
         params: dict[str, str],
         host: str,
+        if_none_match: str | None = None,
     ) -> Response:
         if tile.tilecoord.z > self.get_max_zoom_seed(config, params["LAYER"], params["TILEMATRIXSET"]):
             return await self._map_cache(config, layer, tile)
@@ -717,6 +1005,23 @@ class Server:
             ):
                 return await self._map_cache(config, layer, tile)
 
+        cache_key = TileCache.key(config.file, tile) if self.tile_cache.enabled else None
+        if cache_key is not None:
+            cached_tile = self.tile_cache.get(cache_key, config.mtime)
+            if cached_tile is not None:
+                if cached_tile.data is None:
+                    return self.error(config, 204)
+                assert cached_tile.content_type
+                if _etag_matches(if_none_match, cached_tile.etag):
+                    return self._not_modified(config, cached_tile.etag, cached_tile.last_modified)
+                return self._tile_response(
+                    config,
+                    cached_tile.data,
+                    cached_tile.content_type,
+                    cached_tile.etag,
+                    cached_tile.last_modified,
+                )
+
         store = await self.get_store(config, params["LAYER"], params["TILEMATRIXSET"])
         if store is None:
             return self.error(
@@ -726,28 +1031,121 @@ class Server:
             )
 
         cache = self.get_cache(config)
+        if cache_key is None and isinstance(store, FilesystemTileStore):
+            # Don't read the file, sent by the ASGI server (with sendfile when supported)
+            with _GET_TILE.labels(storage=cache["type"]).time():
+                file_status = await store.stat(tile)
+            if file_status is None:
+                return self.error(config, 204)
+            filename, file_stat = file_status
+            headers = {**self._cache_headers(config), **_file_validator_headers(file_stat)}
+            if _etag_matches(if_none_match, headers["ETag"]):
+                return _not_modified(headers)
+            return FileResponse(
+                filename,
+                headers=headers,
+                media_type=store.content_type,
+                stat_result=file_stat,
+            )
+
         with _GET_TILE.labels(storage=cache["type"]).time():
-            tile2 = await store.get_one(tile)
+            if if_none_match:
+                # Metadata only request when the store supports it
+                tile2 = await store.head_one(tile)
+                if tile2 is not None and not tile2.error:
+                    etag = getattr(tile2, "etag", None)
+                    if _etag_matches(if_none_match, etag):
+                        return self._not_modified(config, etag, getattr(tile2, "last_modified", None))
+                    if tile2.data is None:
+                        tile2 = await store.get_one(tile)
+            else:
+                tile2 = await store.get_one(tile)
 
         if tile2 and tile2.data is not None:
             if tile2.error:
                 return self.error(config, 500, tile2.error)
 
             assert tile2.content_type
-            return Response(
-                content=tile2.data,
-                headers={
-                    "Content-Type": tile2.content_type,
-                    "Expires": (
-                        datetime.datetime.now(tz=datetime.UTC)
-                        + datetime.timedelta(hours=self.get_expires_hours(config))
-                    ).isoformat(),
-                    "Cache-Control": f"max-age={3600 * self.get_expires_hours(config)}",
-                    "Tile-Backend": "Cache",
-                },
-            )
+            etag = getattr(tile2, "etag", None) or _content_etag(tile2.data)
+            last_modified = getattr(tile2, "last_modified", None)
+            if cache_key is not None:
+                self.tile_cache.put(
+                    cache_key,
+                    config.mtime,
+                    tile2.data,
+                    tile2.content_type,
+                    3600 * self.get_expires_hours(config),
+                    etag,
+                    last_modified,
+                )
+            if _etag_matches(if_none_match, etag):
+                return self._not_modified(config, etag, last_modified)
+            return self._tile_response(config, tile2.data, tile2.content_type, etag, last_modified)
+        if cache_key is not None and (tile2 is None or not tile2.error):
+            # Short expiration, the tile can be generated in the meantime
+            self.tile_cache.put(cache_key, config.mtime, None, None, settings.tile_cache.negative_ttl)
         return self.error(config, 204)
 
+    def _cache_headers(self, config: tilecloud_chain.DatedConfig) -> dict[str, str]:
+        return {
+            "Expires": (
+                datetime.datetime.now(tz=datetime.UTC)
+                + datetime.timedelta(hours=self.get_expires_hours(config))
+            ).isoformat(),
+            "Cache-Control": f"max-age={3600 * self.get_expires_hours(config)}",
+            "Tile-Backend": "Cache",
+        }
+
+    def _tile_response(
+        self,
+        config: tilecloud_chain.DatedConfig,
+        data: bytes,
+        content_type: str,
+        etag: str | None = None,
+        last_modified: datetime.datetime | None = None,
+    ) -> Response:
+        return Response(
+            content=data,
+            headers={
+                "Content-Type": content_type,
+                **self._cache_headers(config),
+                **_validator_headers(etag, last_modified),
+            },
+        )
+
+    def _not_modified(
+        self,
+        config: tilecloud_chain.DatedConfig,
+        etag: str | None,
+        last_modified: datetime.datetime | None,
+    ) -> Response:
+        return _not_modified({**self._cache_headers(config), **_validator_headers(etag, last_modified)})
+
+    @staticmethod
+    def _capabilities_response(
+        rendered: RenderedCapabilities,
+        headers: dict[str, str],
+        accept_encoding: str | None,
+        if_none_match: str | None,
+    ) -> Response:
+        """Get the response of the rendered capabilities, in the best accepted encoding."""
+        accepted_encodings = _accepted_encodings(accept_encoding)
+        encoding = next((encoding for encoding in ("br", "gzip") if encoding in accepted_encodings), None)
+        data = rendered.data
+        etag = rendered.etag
+        headers = {**headers}
+        if rendered.encoded:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding is not None and encoding in rendered.encoded:
+            data = rendered.encoded[encoding]
+            # Each representation has its own strong ETag
+            etag = f'{etag[:-1]}-{encoding}"'
+            headers["Content-Encoding"] = encoding
+        headers["ETag"] = etag
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(headers)
+        return Response(content=data, headers=headers)
+
     async def _map_cache(
         self,
         config: tilecloud_chain.DatedConfig,
@@ -758,6 +1156,37 @@ class Server:
         assert _TILEGENERATION
         return await internal_mapcache.fetch(config, self, _TILEGENERATION, layer, tile)
 
+    def _get_forward_session(self, hostname: str) -> aiohttp.ClientSession:
+        """Get the long-lived session used to forward the requests to the host."""
+        session = self.forward_sessions.get(hostname)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=settings.server.forward_max_connections,
+                    ttl_dns_cache=settings.server.forward_dns_cache_ttl,
+                ),
+                timeout=aiohttp.ClientTimeout(
+                    total=settings.server.forward_timeout,
+                    connect=settings.server.forward_connect_timeout,
+                ),
+            )
+            self.forward_sessions[hostname] = session
+        return session
+
+    async def _get_forward_semaphore(self, hostname: str) -> asyncio.Semaphore:
+        """
+        Get the semaphore used to limit the concurrent forwarded requests on the host.
+
+        The semaphore is recreated when the hosts limit file has changed, the requests already running
+        keep the old one.
+        """
+        hosts_limit = await self._hosts_limit.load()
+        semaphore, mtime = self._forward_semaphores.get(hostname, (None, None))
+        if semaphore is None or mtime != self._hosts_limit.mtime:
+            semaphore = asyncio.Semaphore(get_host_concurrent(hosts_limit, hostname))
+            self._forward_semaphores[hostname] = (semaphore, self._hosts_limit.mtime)
+        return semaphore
+
     async def forward(
         self,
         config: tilecloud_chain.DatedConfig,
@@ -774,7 +1203,11 @@ class Server:
 
         _LOGGER.debug("Forwarding request to WMS backend: %s", url)
 
-        async with aiohttp.ClientSession() as session, session.get(url, headers=headers) as response:
+        hostname = urlparse(url).hostname or ""
+        async with (
+            await self._get_forward_semaphore(hostname),
+            self._get_forward_session(hostname).get(url, headers=headers) as response,
+        ):
             if response.status == 200:
                 response_headers = dict(response.headers)
                 hop_by_hop_headers = {
@@ -1223,6 +1656,7 @@ async def wmts_kvp(
     summary="Get static files from the cache.",
 )
 async def get_static(
+    request: Request,
     path: str,
     config: Annotated[tilecloud_chain.DatedConfig, fastapi.Depends(get_host_config)],
 ) -> Response:
@@ -1249,7 +1683,13 @@ async def get_static(
         ).isoformat(),
         "Cache-Control": f"max-age={3600 * server.get_expires_hours(config)}",
     }
-    return await server.get(path, headers, config=config)
+    return await server.get(
+        path,
+        headers,
+        config=config,
+        if_none_match=request.headers.get("If-None-Match"),
+        range_header=request.headers.get("Range"),
+    )
 
 
 def _get_base_urls(cache: tilecloud_chain.configuration.Cache) -> list[str]:
@@ -1373,7 +1813,8 @@ async def _fill_legend(
     cache: tilecloud_chain.configuration.Cache,
     base_url: str,
     config: DatedConfig | None = None,
-) -> None:
+) -> bool:
+    """Fill the missing legends of the layers, return `False` if the retrieval of a legend failed."""
     assert _TILEGENERATION
     if config is None:
         assert _TILEGENERATION.config_file
@@ -1405,6 +1846,7 @@ async def _fill_legend(
             layer_names.append(layer_name)
 
     # Run all legend retrievals concurrently
+    filled = True
     if tasks:
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -1412,5 +1854,7 @@ async def _fill_legend(
         for layer_name, result in zip(layer_names, results, strict=True):
             if isinstance(result, BaseException):
                 _LOGGER.warning("Failed to get legend for layer '%s': %s", layer_name, result)
+                filled = False
             elif result is not None:
                 _TILEGENERATION.layer_legends[layer_name] = result
+    return filled
@@ -62,6 +62,16 @@ class AzureSettings(BaseModel):
     storage_blob_container_url: str | None = None
     storage_blob_validate_container_name: bool = True
     storage_account_url: str | None = None
+    max_concurrency: int = 10
+
+
+class S3Settings(BaseModel):
+    """S3 settings."""
+
+    model_config = ConfigDict(extra="ignore")
+
+    max_connections: int = 10
+    timeout: int = 60
 
 
 _LOGGING_LEVELS = Literal["CRITICAL", "ERROR", "WARN", "WARNING", "INFO", "DEBUG", "NOTSET"]
@@ -108,11 +118,69 @@ class PostgresqlSettings(BaseModel):
     schema_name: str = "tilecloud_chain"
     sqlalchemy_url: str | None = None
     queue_insert_batch_size: int = 100
+    queue_copy_threshold: int = 100
+    queue_claim_batch_size: int = 1
+    queue_claim_check_interval: float = 5
+    queue_ack_batch_size: int = 1
+    queue_ack_interval: float = 5
+    queue_partitioned: bool = False
+    queue_progress_max_age: int = 60
+    queue_progress_window: int = 600
+    queue_listen: bool = True
+    queue_poll_interval: int = 10
     objgraph_postgresql: bool = False
     objgraph_limit: int = 10
     init_timeout: int = 30
 
 
+class ExecutorSettings(BaseModel):
+    """Executor used for the CPU bound functions settings."""
+
+    model_config = ConfigDict(extra="ignore")
+
+    type: Literal["none", "thread", "process"] = "none"
+    max_workers: int | None = None
+
+
+class PipelineSettings(BaseModel):
+    """Staged tile generation pipeline settings."""
+
+    model_config = ConfigDict(extra="ignore")
+
+    enabled: bool = False
+    queue_size: int = 10
+    render_tasks: int | None = None
+    process_tasks: int | None = None
+    store_tasks: int | None = None
+
+
+class TileCacheSettings(BaseModel):
+    """In memory tile cache of the server settings."""
+
+    model_config = ConfigDict(extra="ignore")
+
+    max_size: int = 0
+    max_item_size: int = 1048576
+    negative_ttl: float = 5
+
+
+class ServerSettings(BaseModel):
+    """WMTS server settings."""
+
+    model_config = ConfigDict(extra="ignore")
+
+    stream_chunk_size: int = 65536
+    forward_max_connections: int = 100
+    forward_dns_cache_ttl: int = 10
+    forward_timeout: float = 60
+    forward_connect_timeout: float = 10
+    capabilities_cache: bool = True
+    capabilities_compression: bool = True
+    prefetch: bool = False
+    prefetch_budget: int = 8
+    prefetch_concurrency: int = 1
+
+
 class SecuritySettings(BaseModel):
     """Security settings."""
 
@@ -142,11 +210,19 @@ class Settings(BaseSettings):
     frontend: str | None = None
     development: bool = False
     wmts_path: WmtsPath = None
+    metatile_splitter: Literal["pil", "numpy"] = "pil"
+    multi_store_concurrency: int = 10
+    config_check_interval: float = 1
 
     azure: AzureSettings = AzureSettings()
+    s3: S3Settings = S3Settings()
     logging: LoggingSettings = LoggingSettings()
+    executor: ExecutorSettings = ExecutorSettings()
+    pipeline: PipelineSettings = PipelineSettings()
     postgresql: PostgresqlSettings = PostgresqlSettings()
     redis: RedisSettings = RedisSettings()
+    tile_cache: TileCacheSettings = TileCacheSettings()
+    server: ServerSettings = ServerSettings()
     tests: bool = False
     security: SecuritySettings = SecuritySettings()
 
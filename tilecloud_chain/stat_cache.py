@@ -0,0 +1,50 @@
+# Copyright (c) 2026 by Camptocamp
+"""Throttled cache of the configuration files status."""
+
+import os
+import time
+
+from anyio import Path
+
+from tilecloud_chain.settings import settings
+
+
+class StatCache:
+    """
+    Cache the status of the files, revalidated at most every ``interval`` seconds.
+
+    Shared by all the users of the configuration files, to avoid a ``stat()`` (in a worker thread)
+    for every tile, the default interval is ``TILECLOUD_CHAIN__CONFIG_CHECK_INTERVAL``.
+    """
+
+    def __init__(self, interval: float | None = None) -> None:
+        self._interval = interval
+        self._cache: dict[Path, tuple[float, os.stat_result | None]] = {}
+
+    @property
+    def interval(self) -> float:
+        """Get the revalidation interval in seconds."""
+        return self._interval if self._interval is not None else settings.config_check_interval
+
+    async def stat(self, path: Path) -> os.stat_result | None:
+        """Get the status of the file, ``None`` if it doesn't exist."""
+        now = time.monotonic()
+        cached = self._cache.get(path)
+        if cached is not None and now - cached[0] < self.interval:
+            return cached[1]
+        try:
+            result: os.stat_result | None = await path.stat()
+        except FileNotFoundError:
+            result = None
+        self._cache[path] = (now, result)
+        return result
+
+    def invalidate(self, path: Path | None = None) -> None:
+        """Force the revalidation of the file status, or of all the files."""
+        if path is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(path, None)
+
+
+stat_cache = StatCache()
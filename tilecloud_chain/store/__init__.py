@@ -1,9 +1,16 @@
 # Copyright (c) 2026 by Camptocamp
-from collections.abc import AsyncIterator, Callable
-from typing import Any
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any, TypeVar
 
 from tilecloud import Tile, TileCoord, TileStore
 
+from tilecloud_chain.settings import settings
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
 
 class AsyncTileStore:
     """A tile store."""
@@ -33,6 +40,19 @@ class AsyncTileStore:
         """
         raise NotImplementedError
 
+    async def delete(self, tiles: list[Tile]) -> list[Tile]:
+        """
+        Delete the ``tiles`` and return them.
+
+        Should be overridden by the stores that support a bulk delete.
+
+        Attributes
+        ----------
+            tiles: list[Tile]
+
+        """
+        return [await self.delete_one(tile) for tile in tiles]
+
     async def get_one(self, tile: Tile) -> Tile | None:
         """
         Add data to ``tile``, or return ``None`` if ``tile`` is not in the store.
@@ -44,20 +64,34 @@ class AsyncTileStore:
         """
         raise NotImplementedError
 
+    async def head_one(self, tile: Tile) -> Tile | None:
+        """
+        Add the metadata to ``tile``, or return ``None`` if ``tile`` is not in the store.
+
+        The stores that support it set the ``etag`` and ``last_modified`` attributes, without getting
+        the data, by default the tile is got with its data.
+
+        Attributes
+        ----------
+            tile: Tile
+
+        """
+        return await self.get_one(tile)
+
     async def get(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile | None]:
         """
         Add data to the tiles, or return ``None`` if the tile is not in the store.
 
+        Should be overridden by the stores that support a bulk get, by default the tiles are got
+        concurrently with ``get_one`` (``TILECLOUD_CHAIN__MULTI_STORE_CONCURRENCY``).
+
         Attributes
         ----------
             tiles: AsyncIterator[Tile]
 
         """
-        del tiles
-        raise NotImplementedError
-        yield Tile(TileCoord(0, 0, 0))  # pylint: disable=unreachable
-        # async for tile in tiles:
-        #     yield await self.get_one(tile)
+        async for tile in map_concurrently(tiles, self.get_one, settings.multi_store_concurrency):
+            yield tile
 
     async def list(self) -> AsyncIterator[Tile]:
         """Generate all the tiles in the store, but without their data."""
@@ -75,6 +109,21 @@ class AsyncTileStore:
         """
         raise NotImplementedError
 
+    async def put(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile]:
+        """
+        Store the ``tiles`` in the store.
+
+        Should be overridden by the stores that support a bulk put, by default the tiles are put
+        concurrently with ``put_one`` (``TILECLOUD_CHAIN__MULTI_STORE_CONCURRENCY``).
+
+        Attributes
+        ----------
+            tiles: AsyncIterator[Tile]
+
+        """
+        async for tile in map_concurrently(tiles, self.put_one, settings.multi_store_concurrency):
+            yield tile
+
 
 class TileStoreWrapper(AsyncTileStore):
     """Wrap a TileStore."""
@@ -165,3 +214,22 @@ class AsyncTilesIterator:
         """Async iterator of the tiles."""
         for tile in self._tiles:
             yield tile
+
+
+async def map_concurrently(
+    items: AsyncIterator[_T],
+    function: Callable[[_T], Awaitable[_R]],
+    limit: int,
+) -> AsyncIterator[_R]:
+    """Call the function on the items with at most ``limit`` concurrent calls, keep the order."""
+    pending: deque[asyncio.Task[_R]] = deque()
+    try:
+        async for item in items:
+            if len(pending) >= limit:
+                yield await pending.popleft()
+            pending.append(asyncio.create_task(function(item)))
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -3,16 +3,28 @@ import logging
 from collections.abc import AsyncIterator
 
 import aiohttp
+from azure.core.exceptions import ResourceNotFoundError
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import ContentSettings
+from azure.storage.blob import BlobProperties, ContentSettings
 from azure.storage.blob.aio import BlobServiceClient, ContainerClient
 from tilecloud import Tile, TileLayout
 
 from tilecloud_chain.settings import settings
-from tilecloud_chain.store import AsyncTileStore
+from tilecloud_chain.store import AsyncTileStore, map_concurrently
 
 _LOGGER = logging.getLogger(__name__)
 
+# Maximum number of sub-requests in an Azure blob batch request
+_BATCH_SIZE = 256
+
+
+def _set_properties(tile: Tile, properties: BlobProperties) -> None:
+    """Set the tile attributes from the blob properties."""
+    tile.content_encoding = properties.content_settings.content_encoding
+    tile.content_type = properties.content_settings.content_type
+    tile.etag = properties.etag  # type: ignore[attr-defined]
+    tile.last_modified = properties.last_modified  # type: ignore[attr-defined]
+
 
 class AzureStorageBlobTileStore(AsyncTileStore):
     """Tiles stored in Azure storage blob."""
@@ -84,39 +96,81 @@ class AzureStorageBlobTileStore(AsyncTileStore):
             key_name = self.tilelayout.filename(tile.tilecoord, tile.metadata)
             if not self.dry_run:
                 blob = self.container_client.get_blob_client(blob=key_name)
-                if blob.exists():
-                    blob.delete_blob()
+                await blob.delete_blob()
+        except ResourceNotFoundError:
+            pass
         except Exception as exc:  # pylint: disable=broad-except
             _LOGGER.warning("Failed to delete tile %s", tile.tilecoord, exc_info=exc)
             tile.error = exc
         return tile
 
+    async def delete(self, tiles: list[Tile]) -> list[Tile]:
+        """Delete the tiles from the store with batch requests."""
+        tiles_by_name: dict[str, Tile] = {}
+        for tile in tiles:
+            try:
+                tiles_by_name[self.tilelayout.filename(tile.tilecoord, tile.metadata)] = tile
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOGGER.warning("Failed to delete tile %s", tile.tilecoord, exc_info=exc)
+                tile.error = exc
+        if self.dry_run:
+            return tiles
+        names = list(tiles_by_name)
+        for index in range(0, len(names), _BATCH_SIZE):
+            batch = names[index : index + _BATCH_SIZE]
+            try:
+                responses = await self.container_client.delete_blobs(*batch, raise_on_any_failure=False)
+                # The responses are in the order of the sub-requests
+                index_in_batch = 0
+                async for response in responses:
+                    tile = tiles_by_name[batch[index_in_batch]]
+                    index_in_batch += 1
+                    # Not found is the expected result for a not existing tile
+                    if response.status_code not in (202, 404):
+                        _LOGGER.warning("Failed to delete tile %s: %s", tile.tilecoord, response.reason)
+                        tile.error = f"{response.status_code}: {response.reason}"
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOGGER.warning("Failed to delete %i tiles", len(batch), exc_info=exc)
+                for name in batch:
+                    tiles_by_name[name].error = exc
+        return tiles
+
     async def get_one(self, tile: Tile) -> Tile | None:
-        """Get a tile from the store."""
+        """Get a tile from the store, with one request, the properties are in the download response."""
         key_name = self.tilelayout.filename(tile.tilecoord, tile.metadata)
         try:
             blob = self.container_client.get_blob_client(blob=key_name)
-            if not await blob.exists():
-                return None
             download_result = await blob.download_blob()
             data = await download_result.readall()
             assert isinstance(data, bytes) or data is None, type(data)
             tile.data = data
-            properties = await blob.get_blob_properties()
-            tile.content_encoding = properties.content_settings.content_encoding
-            tile.content_type = properties.content_settings.content_type
+            _set_properties(tile, download_result.properties)
+        except ResourceNotFoundError:
+            return None
+        except Exception as exc:  # pylint: disable=broad-except
+            _LOGGER.warning("Failed to get tile %s", tile.tilecoord, exc_info=exc)
+            tile.error = exc
+        return tile
+
+    async def head_one(self, tile: Tile) -> Tile | None:
+        """Get the tile metadata from the blob properties, without the data."""
+        key_name = self.tilelayout.filename(tile.tilecoord, tile.metadata)
+        try:
+            blob = self.container_client.get_blob_client(blob=key_name)
+            _set_properties(tile, await blob.get_blob_properties())
+        except ResourceNotFoundError:
+            return None
         except Exception as exc:  # pylint: disable=broad-except
             _LOGGER.warning("Failed to get tile %s", tile.tilecoord, exc_info=exc)
             tile.error = exc
         return tile
 
     async def get(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile | None]:
-        """Get tiles from the store."""
-        async for tile in tiles:
-            yield await self.get_one(tile)
+        """Get tiles from the store, concurrently."""
+        async for tile in map_concurrently(tiles, self.get_one, settings.azure.max_concurrency):
+            yield tile
 
-    async def list(self) -> AsyncIterator[Tile]:
-        """List all the tiles in the store."""
+    async def _list_tiles(self) -> AsyncIterator[Tile]:
         prefix = getattr(self.tilelayout, "prefix", "")
 
         async for blob in self.container_client.list_blobs(name_starts_with=prefix):
@@ -125,8 +179,21 @@ class AzureStorageBlobTileStore(AsyncTileStore):
                 tilecoord = self.tilelayout.tilecoord(blob.name)
             except ValueError:
                 continue
-            blob_data = self.container_client.get_blob_client(blob=blob.name)
-            yield Tile(tilecoord, data=await (await blob_data.download_blob()).readall())
+            yield Tile(tilecoord, path=blob.name)
+
+    async def _download(self, tile: Tile) -> Tile:
+        blob_data = self.container_client.get_blob_client(blob=tile.path)  # type: ignore[attr-defined]
+        tile.data = await (await blob_data.download_blob()).readall()
+        return tile
+
+    async def list(self) -> AsyncIterator[Tile]:
+        """List all the tiles in the store, the data are downloaded concurrently."""
+        async for tile in map_concurrently(
+            self._list_tiles(),
+            self._download,
+            settings.azure.max_concurrency,
+        ):
+            yield tile
 
     async def put_one(self, tile: Tile) -> Tile:
         """Store ``tile`` in the store."""
@@ -149,3 +216,8 @@ class AzureStorageBlobTileStore(AsyncTileStore):
                 tile.error = exc
 
         return tile
+
+    async def put(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile]:
+        """Store the tiles in the store, concurrently."""
+        async for tile in map_concurrently(tiles, self.put_one, settings.azure.max_concurrency):
+            yield tile
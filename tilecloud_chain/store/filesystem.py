@@ -1,8 +1,11 @@
 # Copyright (c) 2026 by Camptocamp
 """Async filesystem tile store."""
 
+import asyncio
+import datetime
 import errno
 import logging
+import os
 from collections.abc import AsyncIterator
 from typing import Any
 
@@ -14,6 +17,20 @@ from tilecloud_chain.store import AsyncTileStore
 _LOGGER = logging.getLogger(__name__)
 
 
+def file_etag(file_stat: os.stat_result) -> str:
+    """Get the strong ETag of a file, from the modification time and the size."""
+    return f'"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"'
+
+
+def _set_metadata(tile: Tile, file_stat: os.stat_result) -> None:
+    """Set the tile ETag and last modified date."""
+    tile.etag = file_etag(file_stat)  # type: ignore[attr-defined]
+    tile.last_modified = datetime.datetime.fromtimestamp(  # type: ignore[attr-defined]
+        file_stat.st_mtime,
+        tz=datetime.UTC,
+    )
+
+
 class FilesystemTileStore(AsyncTileStore):
     """Tiles stored in a filesystem, async version."""
 
@@ -34,6 +51,10 @@ class FilesystemTileStore(AsyncTileStore):
             await path.unlink()
         return tile
 
+    async def delete(self, tiles: list[Tile]) -> list[Tile]:
+        """Delete the tiles concurrently."""
+        return list(await asyncio.gather(*(self.delete_one(tile) for tile in tiles)))
+
     async def get_one(self, tile: Tile) -> Tile | None:
         """Get one tile."""
         try:
@@ -46,6 +67,7 @@ class FilesystemTileStore(AsyncTileStore):
         try:
             async with await path.open("rb") as file:
                 tile.data = await file.read()
+                _set_metadata(tile, os.fstat(file.wrapped.fileno()))
         except OSError as exception:
             if exception.errno == errno.ENOENT:
                 return None
@@ -54,6 +76,29 @@ class FilesystemTileStore(AsyncTileStore):
             tile.content_type = self.content_type
         return tile
 
+    async def stat(self, tile: Tile) -> tuple[str, os.stat_result] | None:
+        """Get the file name and status of the tile, ``None`` if it doesn't exist."""
+        filename = self.tilelayout.filename(tile.tilecoord, tile.metadata)
+        try:
+            return filename, await Path(filename).stat()
+        except FileNotFoundError:
+            return None
+
+    async def head_one(self, tile: Tile) -> Tile | None:
+        """Get the tile metadata from the file status."""
+        try:
+            file_status = await self.stat(tile)
+        except Exception as exception:
+            _LOGGER.warning("Error while getting tile %s", tile, exc_info=True)
+            tile.error = exception
+            return tile
+        if file_status is None:
+            return None
+        _set_metadata(tile, file_status[1])
+        if self.content_type is not None:
+            tile.content_type = self.content_type
+        return tile
+
     async def list(self) -> AsyncIterator[Tile]:
         """List all tiles."""
         top = getattr(self.tilelayout, "prefix", ".")
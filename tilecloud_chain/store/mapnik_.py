@@ -137,8 +137,7 @@ class MapnikDropActionTileStore(MapnikTileStore):
         if result is None:
             if self.store is not None:
                 if tile.tilecoord.n != 1:
-                    for tilecoord in tile.tilecoord:
-                        await self.store.delete_one(Tile(tilecoord))
+                    await self.store.delete([Tile(tilecoord) for tilecoord in tile.tilecoord])
                 else:
                     await self.store.delete_one(tile)
             _LOGGER.info("The tile %s %s is dropped", tile.tilecoord, tile.formated_metadata)
@@ -0,0 +1,194 @@
+# Copyright (c) 2026 by Camptocamp
+"""Meta tile splitters, that can run in an executor."""
+
+import asyncio
+import functools
+import hashlib
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import Executor
+from io import BytesIO
+from typing import Any
+
+from PIL import Image
+from tilecloud import Tile
+from tilecloud.lib.PIL_ import FORMAT_BY_CONTENT_TYPE
+
+from tilecloud_chain.store import AsyncTileStore
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+# The image modes that are kept as is in a NumPy array
+_NUMPY_MODES = {"L", "LA", "RGB", "RGBA"}
+
+# The encoded tile data, and if it is empty (None for unknown)
+SplitResult = list[tuple[bytes, bool | None]]
+
+
+def split_metatile(
+    data: bytes,
+    format_pattern: str,
+    tile_size: int,
+    border: int,
+    save_options: dict[str, Any],
+    offsets: list[tuple[int, int]],
+) -> SplitResult:
+    """
+    Split the meta tile image in encoded tiles, with PIL.
+
+    The `offsets` are the tiles positions in the meta tile, in tiles, the empty tiles are unknown.
+    Only bytes are used in the arguments and the result to be able to run it in another process.
+    """
+    metaimage = Image.open(BytesIO(data))
+    result = []
+    for offset_x, offset_y in offsets:
+        x = border + offset_x * tile_size
+        y = border + offset_y * tile_size
+        image = metaimage.crop((x, y, x + tile_size, y + tile_size))
+        bytes_io = BytesIO()
+        image.save(bytes_io, FORMAT_BY_CONTENT_TYPE[format_pattern], **save_options)
+        result.append((bytes_io.getvalue(), None))
+    return result
+
+
+def split_metatile_numpy(
+    data: bytes,
+    format_pattern: str,
+    tile_size: int,
+    border: int,
+    save_options: dict[str, Any],
+    offsets: list[tuple[int, int]],
+    empty_tile: tuple[int, bytes] | None = None,
+) -> SplitResult:
+    """
+    Split the meta tile image in encoded tiles, with NumPy.
+
+    The meta tile is decoded once, the tiles are views on the decoded array, and the uniform tiles
+    (e.g. empty) are detected on the array and encoded only once by color.
+    The uniform tiles are compared once by color with the `empty_tile` (size and SHA1 digest), the other
+    tiles are unknown.
+
+    Same arguments as `split_metatile`, used as fallback when NumPy isn't installed and for the not
+    supported image modes, the empty tiles are then unknown.
+    """
+    metaimage = Image.open(BytesIO(data))
+    if np is None or metaimage.mode not in _NUMPY_MODES:
+        return split_metatile(data, format_pattern, tile_size, border, save_options, offsets)
+
+    array = np.asarray(metaimage)
+    if array.ndim == 2:
+        array = array[:, :, np.newaxis]
+    nb_x = max(offset_x for offset_x, _ in offsets) + 1
+    nb_y = max(offset_y for _, offset_y in offsets) + 1
+    # Shape: (nb_y, nb_x, tile_size, tile_size, bands), without copy
+    blocks = (
+        array[border : border + nb_y * tile_size, border : border + nb_x * tile_size]
+        .reshape(nb_y, tile_size, nb_x, tile_size, array.shape[2])
+        .swapaxes(1, 2)
+    )
+    uniform = (blocks == blocks[:, :, :1, :1, :]).all(axis=(2, 3, 4))
+
+    pil_format = FORMAT_BY_CONTENT_TYPE[format_pattern]
+    uniform_cache: dict[bytes, tuple[bytes, bool | None]] = {}
+
+    def encode(block: np.ndarray[Any, Any]) -> bytes:
+        image = Image.fromarray(np.ascontiguousarray(block.squeeze(axis=2) if block.shape[2] == 1 else block))
+        image.info = dict(metaimage.info)
+        bytes_io = BytesIO()
+        image.save(bytes_io, pil_format, **save_options)
+        return bytes_io.getvalue()
+
+    result = []
+    for offset_x, offset_y in offsets:
+        block = blocks[offset_y, offset_x]
+        if uniform[offset_y, offset_x]:
+            color = block[0, 0].tobytes()
+            if color not in uniform_cache:
+                tile_data = encode(block)
+                empty = (
+                    None
+                    if empty_tile is None
+                    else len(tile_data) == empty_tile[0]
+                    and hashlib.sha1(tile_data).digest() == empty_tile[1]  # noqa: S324
+                )
+                uniform_cache[color] = (tile_data, empty)
+            result.append(uniform_cache[color])
+        else:
+            result.append((encode(block), None))
+    return result
+
+
+class AsyncMetaTileSplitterTileStore(AsyncTileStore):
+    """
+    Split the meta tiles into tiles.
+
+    The image decoding and encoding are done with the `split` function, in the executor if any.
+    The `empty_tile` is given to the `split` function when it's set, only `split_metatile_numpy`
+    supports it, the tiles detected as empty have the `empty` attribute, used by the `HashDropper`
+    instead of the hash.
+    """
+
+    def __init__(
+        self,
+        executor: Executor | None,
+        format_pattern: str,
+        tile_size: int = 256,
+        border: int = 0,
+        save_options: dict[str, Any] | None = None,
+        split: Callable[..., SplitResult] = split_metatile,
+        empty_tile: tuple[int, bytes] | None = None,
+    ) -> None:
+        self.executor = executor
+        self.format = format_pattern
+        self.tile_size = tile_size
+        self.border = border
+        self._save_options = save_options or {}
+        self.split = split
+        self.empty_tile = empty_tile
+
+    async def get(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile | None]:
+        """Split the meta tiles."""
+        loop = asyncio.get_running_loop()
+        async for metatile in tiles:
+            if not metatile:
+                continue
+            if not metatile.error and not isinstance(metatile.data, bytes):
+                metatile.error = "Metatile data is None"
+            tilecoords = list(metatile.tilecoord)
+            if metatile.error:
+                for tilecoord in tilecoords:
+                    yield Tile(
+                        tilecoord,
+                        metadata=metatile.metadata,
+                        error=metatile.error,
+                        metatile=metatile,
+                    )
+                continue
+
+            split = functools.partial(
+                self.split,
+                metatile.data,
+                self.format,
+                self.tile_size,
+                self.border,
+                self._save_options,
+                [
+                    (tilecoord.x - metatile.tilecoord.x, tilecoord.y - metatile.tilecoord.y)
+                    for tilecoord in tilecoords
+                ],
+                **({} if self.empty_tile is None else {"empty_tile": self.empty_tile}),
+            )
+            result = split() if self.executor is None else await loop.run_in_executor(self.executor, split)
+            for tilecoord, (data, empty) in zip(tilecoords, result, strict=True):
+                tile = Tile(
+                    tilecoord,
+                    data=data,
+                    content_type=self.format,
+                    metadata=metatile.metadata,
+                    metatile=metatile,
+                )
+                if empty is not None:
+                    tile.empty = empty  # type: ignore[attr-defined]
+                yield tile
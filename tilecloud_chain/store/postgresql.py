@@ -27,23 +27,35 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import asyncio
+import collections
+import contextlib
 import datetime
 import gc
 import io
+import json
 import logging
 import os
 import shlex
+import time
 from collections.abc import AsyncIterator
 from typing import Any, cast
 
 import objgraph
 import sqlalchemy
+import sqlalchemy.dialects.postgresql
+import sqlalchemy.exc
 import sqlalchemy.schema
 import sqlalchemy.sql.functions
 from anyio import Path
 from prometheus_client import Counter, Gauge, Summary
 from sqlalchemy import JSON, DateTime, Integer, Unicode, and_, delete, select, text, update
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from tilecloud import Tile, TileCoord
 
@@ -89,34 +101,87 @@ _STATUS_CANCELLED = "cancelled"
 _STATUS_PENDING = "pending"
 
 _schema = settings.postgresql.schema_name
+# Channel used to wake up the idle workers
+_NOTIFY_CHANNEL = f"{_schema}_queue"
+# Errors of a partition created by a concurrent transaction: unique violation (on the catalog) and
+# duplicate table
+_DUPLICATE_CODES = {"23505", "42P07"}
+_CREATE_PARTITION_ATTEMPTS = 3
 
 
 def _encode_message(metatile: Tile) -> dict[str, Any]:
+    """Encode the meta tile in the queue columns, the coordinate in integer columns."""
     metadata = dict(metatile.metadata)
     metadata.pop("postgresql_id", None)
     return {
-        "z": metatile.tilecoord.z,
+        "zoom": metatile.tilecoord.z,
         "x": metatile.tilecoord.x,
         "y": metatile.tilecoord.y,
         "n": metatile.tilecoord.n,
-        "metadata": metadata,
+        "meta_tile": {"metadata": metadata},
     }
 
 
-def _decode_tilecoord(body: dict[str, Any]) -> TileCoord:
-    z = cast("int", body.get("z"))
-    x = cast("int", body.get("x"))
-    y = cast("int", body.get("y"))
-    n = cast("int", body.get("n"))
-    return TileCoord(z, x, y, n)
-
-
-def _decode_message(body: dict[str, Any], **kwargs: Any) -> Tile:
-    tilecoord = _decode_tilecoord(body)
+def _decode_tilecoord(
+    zoom: int,
+    x: int | None,
+    y: int | None,
+    n: int | None,
+    body: dict[str, Any],
+) -> TileCoord:
+    if x is None or y is None or n is None:
+        # Queue entry created before the compact encoding
+        zoom = cast("int", body.get("z"))
+        x = cast("int", body.get("x"))
+        y = cast("int", body.get("y"))
+        n = cast("int", body.get("n"))
+    return TileCoord(zoom, x, y, n)
+
+
+def _decode_message(
+    zoom: int,
+    x: int | None,
+    y: int | None,
+    n: int | None,
+    body: dict[str, Any],
+    **kwargs: Any,
+) -> Tile:
+    tilecoord = _decode_tilecoord(zoom, x, y, n, body)
     metadata = body.get("metadata", {})
     return Tile(tilecoord, metadata=metadata, **kwargs)
 
 
+def _format_status(counts_by_zoom: dict[int, dict[str, int]]) -> list[dict[str, int]]:
+    """Format the queue counts by zoom for the status, with the labels used in the admin page."""
+    status_labels = {
+        _STATUS_CREATED: "generate",
+        _STATUS_PENDING: "pending",
+        _STATUS_ERROR: "error",
+    }
+    return [
+        {
+            "zoom": zoom,
+            **{
+                status_labels[queue_status]: count
+                for queue_status, count in counts.items()
+                if queue_status in status_labels
+            },
+        }
+        for zoom, counts in sorted(counts_by_zoom.items())
+    ]
+
+
+def _partition_name(job_id: int) -> str:
+    return f"{Queue.__tablename__}_{int(job_id)}"
+
+
+def _create_partitioned_queue(connection: sqlalchemy.Connection) -> None:
+    """Create the queue table partitioned by job, the partitions are created with the jobs."""
+    table = Queue.__table__.to_metadata(sqlalchemy.MetaData())
+    table.dialect_kwargs["postgresql_partition_by"] = "LIST (job_id)"
+    table.create(connection)
+
+
 def _format_duration(seconds: int) -> str:
     """Format a duration in a short style."""
     seconds = max(seconds, 0)
@@ -132,6 +197,62 @@ def _format_duration(seconds: int) -> str:
     return f"{minutes} minutes"
 
 
+async def _notify(session: AsyncSession) -> None:
+    """Notify the listening workers that there is something new in the queue, sent on commit."""
+    if settings.postgresql.queue_listen:
+        await session.execute(select(sqlalchemy.func.pg_notify(_NOTIFY_CHANNEL, "")))
+
+
+async def _insert_rows(session: AsyncSession, rows: list[dict[str, Any]]) -> None:
+    """Insert the queue rows, with a `COPY` for the large batches."""
+    if len(rows) >= settings.postgresql.queue_copy_threshold:
+        await _copy_rows(session, rows)
+    else:
+        await session.execute(sqlalchemy.insert(Queue), rows)
+
+
+async def _copy_rows(session: AsyncSession, rows: list[dict[str, Any]]) -> None:
+    """Insert the queue rows with a `COPY ... FROM STDIN` through the async driver."""
+    columns = ("job_id", "zoom", "x", "y", "n", "status", "meta_tile")
+    records = [
+        (
+            int(row["job_id"]),
+            row["zoom"],
+            row["x"],
+            row["y"],
+            row["n"],
+            _STATUS_CREATED,
+            json.dumps(row["meta_tile"]),
+        )
+        for row in rows
+    ]
+    # The asyncpg adapter of SQLAlchemy begins the transaction on the first statement, the COPY done
+    # directly on the driver connection would be outside the transaction of the session
+    await session.execute(text("SELECT 1"))
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection: Any = raw_connection.driver_connection
+    if hasattr(driver_connection, "copy_records_to_table"):
+        # asyncpg, binary COPY
+        await driver_connection.copy_records_to_table(
+            Queue.__tablename__,
+            schema_name=_schema,
+            columns=columns,
+            records=records,
+        )
+    else:
+        # psycopg
+        schema = _schema.replace('"', '""')
+        async with (
+            driver_connection.cursor() as cursor,
+            cursor.copy(
+                f'COPY "{schema}"."{Queue.__tablename__}" ({", ".join(columns)}) FROM STDIN',
+            ) as copy,
+        ):
+            for record in records:
+                await copy.write_row(record)
+
+
 class PostgresqlTileStoreError(Exception):
     """PostgreSQL TileStore Exception."""
 
@@ -167,26 +288,57 @@ class Job(Base):
         return f"Job {self.id} {self.name} [{self.status}]"
 
 
+class JobProgress(Base):
+    """SQLAlchemy model for the job progress snapshots, refreshed by the maintenance."""
+
+    __tablename__ = "job_progress"
+    __table_args__ = {"schema": _schema}  # noqa: RUF012
+
+    job_id: Mapped[int] = mapped_column(
+        Integer,
+        sqlalchemy.ForeignKey(Job.id, ondelete="CASCADE"),
+        primary_key=True,
+        nullable=False,
+    )
+    updated_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # The status by zoom level, like the one returned by `get_status`
+    status: Mapped[list[dict[str, int]]] = mapped_column(JSON, nullable=False)
+    # The last meta tiles errors
+    errors: Mapped[list[str]] = mapped_column(JSON, nullable=False)
+    # The [timestamp, processed meta tiles] samples of the sliding window used to get the throughput
+    samples: Mapped[list[list[float]]] = mapped_column(JSON, nullable=False)
+    eta_seconds: Mapped[int | None] = mapped_column(Integer)
+
+    def __repr__(self) -> str:
+        """Return the representation of the job progress."""
+        return f"JobProgress {self.job_id} {self.updated_at}"
+
+
 class Queue(Base):
     """SQLAlchemy model for the queue entries."""
 
     __tablename__ = "queue"
-    __table_args__ = {"schema": _schema}  # noqa: RUF012
+    __table_args__ = (
+        sqlalchemy.Index("ix_queue_job_id_status", "job_id", "status"),
+        {"schema": _schema},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False, autoincrement=True)
-    job_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    # The partition key of the partitioned queue table should be in the primary key
+    job_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True, primary_key=True)
     zoom: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    # The meta tile coordinate, null on the entries created before the compact encoding
+    x: Mapped[int | None] = mapped_column(Integer)
+    y: Mapped[int | None] = mapped_column(Integer)
+    n: Mapped[int | None] = mapped_column(Integer)
     status: Mapped[str] = mapped_column(Unicode, nullable=False, default=_STATUS_CREATED, index=True)
     error: Mapped[str | None] = mapped_column(Unicode)
     started_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True), index=True)
     # Like this:
     # {
-    #     "x": 0,
-    #     "y": 0,
-    #     "z": 0,
-    #     "n": 5,
     #     "metadata": {},
     # }
+    # The entries created before the compact encoding also have the "x", "y", "z" and "n" keys.
     meta_tile: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
 
     def __repr__(self) -> str:
@@ -350,13 +502,30 @@ class PostgresqlTileStore(AsyncTileStore):
         self.allowed_arguments = allowed_arguments
         self.max_pending_minutes = max_pending_minutes
         self._insert_batch_size = max(1, settings.postgresql.queue_insert_batch_size)
+        self._claim_batch_size = max(1, settings.postgresql.queue_claim_batch_size)
+        # Meta tiles claimed (status pending) but not yet yielded, by config file
+        self._claimed: dict[str, collections.deque[Tile]] = {}
+        # The claim time (the queue started_at) and the last check time of the claimed meta tiles
+        self._claimed_at: dict[str, tuple[datetime.datetime, float]] = {}
         self._insert_buffer: list[dict[str, Any]] = []
         self._insert_lock = asyncio.Lock()
         self._flush_lock = asyncio.Lock()
         self.SessionMaker: async_sessionmaker[AsyncSession] | None = None  # pylint: disable=invalid-name
         self._engine: AsyncEngine | None = None
-
-    async def _flush_put_buffer(self, session: AsyncSession | None = None) -> None:
+        self._ack_batch_size = max(1, settings.postgresql.queue_ack_batch_size)
+        self._ack_done: list[int] = []
+        self._ack_errors: dict[int, str] = {}
+        self._ack_first_at: float | None = None
+        self._ack_lock = asyncio.Lock()
+        # Is the queue table partitioned by job, set on init
+        self._partitioned = False
+        # The jobs with an already created partition
+        self._partitions: set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._listen_connection: AsyncConnection | None = None
+        self._listen_task: asyncio.Task[None] | None = None
+
+    async def _flush_put_buffer(self) -> None:
         async with self._flush_lock:
             rows: list[dict[str, Any]] = []
             async with self._insert_lock:
@@ -367,13 +536,13 @@ class PostgresqlTileStore(AsyncTileStore):
                 return
 
             try:
-                if session is not None:
-                    await session.execute(sqlalchemy.insert(Queue), rows)
-                else:
-                    assert self.SessionMaker is not None
-                    async with self.SessionMaker() as current_session:
-                        await current_session.execute(sqlalchemy.insert(Queue), rows)
-                        await current_session.commit()
+                assert self.SessionMaker is not None
+                async with self.SessionMaker() as session:
+                    partitions = await self._create_partitions(session, {int(row["job_id"]) for row in rows})
+                    await _insert_rows(session, rows)
+                    await _notify(session)
+                    await session.commit()
+                self._partitions |= partitions
             except Exception:
                 async with self._insert_lock:
                     self._insert_buffer[:0] = rows
@@ -395,26 +564,33 @@ class PostgresqlTileStore(AsyncTileStore):
 
                 result = await connection.execute(
                     text(
-                        "SELECT column_name FROM information_schema.columns "
-                        "WHERE table_schema = :schema AND table_name = 'job' "
-                        "AND column_name IN ('tiles_started_at', 'meta_tiles_total')",
+                        "SELECT table_name, column_name FROM information_schema.columns "
+                        "WHERE table_schema = :schema AND table_name IN ('job', 'queue') "
+                        "AND column_name IN ('tiles_started_at', 'meta_tiles_total', 'x', 'y', 'n')",
                     ).bindparams(schema=_schema),
                 )
-                existing_columns = {row[0] for row in result}
+                existing_columns = {f"{row[0]}.{row[1]}" for row in result}
 
-                if "tiles_started_at" not in existing_columns:
+                if "job.tiles_started_at" not in existing_columns:
                     await connection.execute(
                         text(
                             f'ALTER TABLE "{_schema}"."job" ADD COLUMN tiles_started_at TIMESTAMPTZ',
                         ),
                     )
-                if "meta_tiles_total" not in existing_columns:
+                if "job.meta_tiles_total" not in existing_columns:
                     await connection.execute(
                         text(
                             f'ALTER TABLE "{_schema}"."job" '
                             "ADD COLUMN meta_tiles_total INTEGER NOT NULL DEFAULT 0",
                         ),
                     )
+                for column in ("x", "y", "n"):
+                    if f"queue.{column}" not in existing_columns:
+                        await connection.execute(
+                            text(f'ALTER TABLE "{_schema}"."queue" ADD COLUMN {column} INTEGER'),
+                        )
+
+                self._partitioned = await self._init_partitions(connection)
                 await connection.commit()
 
         try:
@@ -426,8 +602,173 @@ class PostgresqlTileStore(AsyncTileStore):
             )
             raise
 
+        # Outside the init timeout, can be long on a large queue
+        await self._create_indexes()
+
         self.SessionMaker = async_sessionmaker(self._engine)  # pylint: disable=invalid-name
 
+    async def _create_indexes(self) -> None:
+        """
+        Create the indexes missing on an already existing queue table.
+
+        They are created with `CREATE INDEX CONCURRENTLY`, outside a transaction, to don't block the
+        workers that write in the queue during the build.
+        """
+        assert self._engine is not None
+        if self._partitioned:
+            # Created with the table
+            return
+        async with self._engine.connect() as connection:
+            result = await connection.execute(
+                text(
+                    "SELECT c.relname, i.indisvalid FROM pg_index i "
+                    "JOIN pg_class c ON c.oid = i.indexrelid "
+                    "JOIN pg_class t ON t.oid = i.indrelid "
+                    "JOIN pg_namespace n ON n.oid = t.relnamespace "
+                    "WHERE n.nspname = :schema AND t.relname = :table",
+                ).bindparams(schema=_schema, table=Queue.__tablename__),
+            )
+            existing_indexes = dict(result.tuples())
+            for name, valid in existing_indexes.items():
+                if not valid:
+                    _LOGGER.warning(
+                        "The queue index %s is not valid, in creation by another worker, "
+                        "or to be dropped after a failed creation",
+                        name,
+                    )
+            missing_indexes = [
+                index for index in Queue.__table__.indexes if index.name not in existing_indexes
+            ]
+            if not missing_indexes:
+                return
+            await connection.commit()
+            autocommit_connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            for index in missing_indexes:
+                _LOGGER.info("Create the queue index %s", index.name)
+                columns = ", ".join(f'"{column.name}"' for column in index.columns)
+                await autocommit_connection.execute(
+                    text(
+                        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{index.name}" '
+                        f'ON "{_schema}"."{Queue.__tablename__}" ({columns})',
+                    ),
+                )
+
+    @staticmethod
+    async def _init_partitions(connection: AsyncConnection) -> bool:
+        """
+        Get if the queue table is partitioned, and migrate it if needed.
+
+        A not partitioned queue table is recreated only when it is empty.
+        """
+        relkind = await connection.scalar(
+            text(
+                "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname = :schema AND c.relname = 'queue'",
+            ).bindparams(schema=_schema),
+        )
+        if settings.postgresql.queue_partitioned and relkind == "r":
+            # Block the writers until the commit, to don't drop meta tiles inserted after the check
+            await connection.execute(
+                text(f'LOCK TABLE "{_schema}"."{Queue.__tablename__}" IN ACCESS EXCLUSIVE MODE'),
+            )
+            if await connection.scalar(select(Queue.id).limit(1)) is not None:
+                _LOGGER.warning(
+                    "The queue table is not partitioned and not empty, "
+                    "it will be migrated when the queue is empty",
+                )
+                return False
+            _LOGGER.info("Recreate the queue table with one partition per job")
+            await connection.run_sync(lambda sync_connection: Queue.__table__.drop(sync_connection))
+            await connection.run_sync(_create_partitioned_queue)
+            relkind = "p"
+        if relkind != "p":
+            return False
+        # A default partition prevents to detach the partitions concurrently
+        default_partition = f'"{_schema}"."{Queue.__tablename__}_default"'
+        if await connection.scalar(
+            text("SELECT to_regclass(:name) IS NOT NULL").bindparams(name=default_partition),
+        ):
+            await connection.execute(text(f"LOCK TABLE {default_partition} IN ACCESS EXCLUSIVE MODE"))
+            if await connection.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {default_partition})")):
+                _LOGGER.warning("The default queue partition is not empty, it will be dropped when empty")
+            else:
+                await connection.execute(text(f"DROP TABLE {default_partition}"))
+        return True
+
+    async def _create_partitions(self, session: AsyncSession, job_ids: set[int]) -> set[int]:
+        """
+        Create the missing queue partitions of the jobs.
+
+        Return the jobs of the created partitions, to be added to the cache by the caller after the
+        commit. A partition created by a concurrent transaction gives a duplicate error, then the creation
+        is retried in a savepoint.
+        """
+        if not self._partitioned:
+            return set()
+        job_ids = job_ids - self._partitions
+        for job_id in sorted(job_ids):
+            statement = text(
+                f'CREATE TABLE IF NOT EXISTS "{_schema}"."{_partition_name(job_id)}" '
+                f'PARTITION OF "{_schema}"."{Queue.__tablename__}" FOR VALUES IN ({int(job_id)})',
+            )
+            for attempt in range(_CREATE_PARTITION_ATTEMPTS):
+                try:
+                    async with session.begin_nested():
+                        await session.execute(statement)
+                    break
+                except sqlalchemy.exc.DBAPIError as exception:
+                    code = getattr(exception.orig, "sqlstate", None) or getattr(
+                        exception.orig,
+                        "pgcode",
+                        None,
+                    )
+                    if code not in _DUPLICATE_CODES or attempt + 1 == _CREATE_PARTITION_ATTEMPTS:
+                        raise
+                    _LOGGER.info("The queue partition of the job %i was created concurrently, retry", job_id)
+        return job_ids
+
+    async def _drop_partitions(self, job_ids: set[int]) -> None:
+        """
+        Drop the queue partitions of the finished jobs, instead of deleting the entries.
+
+        A `DROP TABLE` of an attached partition locks the whole queue table, used by the workers to claim
+        the meta tiles, so the partition is first detached with `DETACH PARTITION ... CONCURRENTLY`,
+        outside a transaction.
+        """
+        if not self._partitioned or not job_ids:
+            return
+        assert self._engine is not None
+        async with self._engine.connect() as connection:
+            autocommit_connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            for job_id in sorted(job_ids):
+                self._partitions.discard(job_id)
+                partition = f'"{_schema}"."{_partition_name(job_id)}"'
+                try:
+                    detach_pending = await autocommit_connection.scalar(
+                        text(
+                            "SELECT i.inhdetachpending FROM pg_inherits i "
+                            "JOIN pg_class c ON c.oid = i.inhrelid "
+                            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                            "WHERE n.nspname = :schema AND c.relname = :partition",
+                        ).bindparams(schema=_schema, partition=_partition_name(job_id)),
+                    )
+                    if detach_pending is not None:
+                        # Finish an interrupted detach
+                        mode = "FINALIZE" if detach_pending else "CONCURRENTLY"
+                        await autocommit_connection.execute(
+                            text(
+                                f'ALTER TABLE "{_schema}"."{Queue.__tablename__}" '
+                                f"DETACH PARTITION {partition} {mode}",
+                            ),
+                        )
+                    await autocommit_connection.execute(text(f"DROP TABLE IF EXISTS {partition}"))
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.warning(
+                        "Error while dropping the queue partition of the job %s",
+                        job_id,
+                        exc_info=True,
+                    )
+
     async def create_job(
         self,
         name: str,
@@ -445,8 +786,12 @@ class PostgresqlTileStore(AsyncTileStore):
                 status=initial_status,
             )
             session.add(job)
+            await _notify(session)
             await session.commit()
             await session.refresh(job)
+            partitions = await self._create_partitions(session, {job.id})
+            await session.commit()
+            self._partitions |= partitions
             return job.id
 
     async def start_job(self, job_id: int) -> None:
@@ -466,6 +811,7 @@ class PostgresqlTileStore(AsyncTileStore):
                     meta_tiles_total=count_result,
                 ),
             )
+            await _notify(session)
             await session.commit()
 
     async def retry(self, job_id: int, config_filename: Path) -> None:
@@ -502,6 +848,7 @@ class PostgresqlTileStore(AsyncTileStore):
                     meta_tiles_total=count_result,
                 ),
             )
+            await _notify(session)
             await session.commit()
 
     async def cancel(self, job_id: int, config_filename: Path) -> None:
@@ -521,11 +868,14 @@ class PostgresqlTileStore(AsyncTileStore):
             if job is None:
                 message = f"Job {job_id} not found, with the correct status, for the host"
                 raise PostgresqlTileStoreError(message)
-            await session.execute(
-                delete(Queue).where(and_(Queue.job_id == job_id, Queue.status == _STATUS_CREATED)),
-            )
+            if not self._partitioned:
+                await session.execute(
+                    delete(Queue).where(and_(Queue.job_id == job_id, Queue.status == _STATUS_CREATED)),
+                )
             await session.execute(update(Job).where(Job.id == job_id).values(status=_STATUS_CANCELLED))
             await session.commit()
+        # With the pending and the error meta tiles
+        await self._drop_partitions({job_id})
 
     async def get_status(
         self,
@@ -539,6 +889,9 @@ class PostgresqlTileStore(AsyncTileStore):
         - the status of the job
         - the last 5 meta tiles errors
         - an estimated remaining time (for started jobs)
+
+        The started jobs use the progress snapshot refreshed by the maintenance when it's fresh enough,
+        the other jobs are computed from the queue.
         """
         assert self.SessionMaker is not None
         result: list[tuple[Job, list[dict[str, int]], list[str], str | None]] = []
@@ -553,85 +906,195 @@ class PostgresqlTileStore(AsyncTileStore):
             if not jobs:
                 return result
 
-            job_ids = [job.id for job in jobs]
-            queue_statuses = (_STATUS_CREATED, _STATUS_PENDING, _STATUS_ERROR)
-            status_labels = {
-                _STATUS_CREATED: "generate",
-                _STATUS_PENDING: "pending",
-                _STATUS_ERROR: "error",
-            }
-
-            statuses_result = await session.execute(
-                select(
-                    Queue.job_id,
-                    Queue.zoom,
-                    Queue.status,
-                    sqlalchemy.sql.functions.count(Queue.id),
-                )
-                .where(
+            progress_result = await session.execute(
+                select(JobProgress).where(
                     and_(
-                        Queue.job_id.in_(job_ids),
-                        Queue.status.in_(queue_statuses),
+                        JobProgress.job_id.in_([job.id for job in jobs if job.status == _STATUS_STARTED]),
+                        JobProgress.updated_at
+                        >= now - datetime.timedelta(seconds=settings.postgresql.queue_progress_max_age),
                     ),
-                )
-                .group_by(Queue.job_id, Queue.zoom, Queue.status),
+                ),
             )
-            status_by_job: dict[int, dict[int, dict[str, int]]] = {}
-            for job_id, zoom, queue_status, count in statuses_result:
-                label = status_labels.get(queue_status)
-                if label is None:
+            progress_by_job = {progress.job_id: progress for progress in progress_result.scalars()}
+
+            live_job_ids = [job.id for job in jobs if job.id not in progress_by_job]
+            counts_by_job = await self._count_queue(session, live_job_ids)
+            errors_by_job = await self._get_last_errors(session, live_job_ids)
+
+            for job in jobs:
+                progress = progress_by_job.get(job.id)
+                if progress is not None:
+                    eta = None if progress.eta_seconds is None else _format_duration(progress.eta_seconds)
+                    result.append((job, progress.status, progress.errors, eta))
                     continue
-                status_by_job.setdefault(job_id, {}).setdefault(zoom, {})[label] = count
-
-            ranked_errors = (
-                select(
-                    Queue.job_id.label("job_id"),
-                    Queue.meta_tile.label("meta_tile"),
-                    Queue.error.label("error"),
-                    sqlalchemy.func.row_number()
-                    .over(partition_by=Queue.job_id, order_by=Queue.started_at.desc())
-                    .label("rank"),
+
+                counts_by_zoom = counts_by_job.get(job.id, {})
+                eta_seconds = (
+                    self._get_eta_seconds(job, counts_by_zoom, [], now)
+                    if job.status == _STATUS_STARTED
+                    else None
                 )
-                .where(and_(Queue.job_id.in_(job_ids), Queue.status == _STATUS_ERROR))
-                .subquery()
-            )
-            errors_result = await session.execute(
-                select(
-                    ranked_errors.c.job_id,
-                    ranked_errors.c.meta_tile,
-                    ranked_errors.c.error,
+                result.append(
+                    (
+                        job,
+                        _format_status(counts_by_zoom),
+                        errors_by_job.get(job.id, []),
+                        None if eta_seconds is None else _format_duration(eta_seconds),
+                    ),
                 )
-                .where(ranked_errors.c.rank <= 5)
-                .order_by(ranked_errors.c.job_id.asc(), ranked_errors.c.rank.asc()),
+        return result
+
+    @staticmethod
+    def _get_eta_seconds(
+        job: Job,
+        counts_by_zoom: dict[int, dict[str, int]],
+        samples: list[list[float]],
+        now: datetime.datetime,
+    ) -> int | None:
+        """
+        Get the estimated remaining time of a started job.
+
+        Use the throughput on the sliding window samples when available, the average since the first
+        tile otherwise.
+        """
+        if job.tiles_started_at is None or job.meta_tiles_total <= 0:
+            return None
+        remaining = min(
+            sum(
+                count
+                for counts in counts_by_zoom.values()
+                for queue_status, count in counts.items()
+                if queue_status in (_STATUS_CREATED, _STATUS_PENDING, _STATUS_ERROR)
+            ),
+            job.meta_tiles_total,
+        )
+        if remaining == 0:
+            return 0
+        if len(samples) >= 2:
+            (first_time, first_processed), (last_time, last_processed) = samples[0], samples[-1]
+            if last_processed > first_processed and last_time > first_time:
+                return int(remaining * (last_time - first_time) / (last_processed - first_processed))
+        processed = max(job.meta_tiles_total - remaining, 0)
+        elapsed_seconds = int((now - job.tiles_started_at).total_seconds())
+        if processed > 0 and elapsed_seconds > 0:
+            return int((remaining * elapsed_seconds) / processed)
+        return None
+
+    @staticmethod
+    async def _count_queue(session: AsyncSession, job_ids: list[int]) -> dict[int, dict[int, dict[str, int]]]:
+        """Count the queue entries by job, zoom and status, in one aggregated query."""
+        if not job_ids:
+            return {}
+        result = await session.execute(
+            select(Queue.job_id, Queue.zoom, Queue.status, sqlalchemy.sql.functions.count(Queue.id))
+            .where(Queue.job_id.in_(job_ids))
+            .group_by(Queue.job_id, Queue.zoom, Queue.status),
+        )
+        counts: dict[int, dict[int, dict[str, int]]] = {}
+        for job_id, zoom, queue_status, count in result:
+            counts.setdefault(job_id, {}).setdefault(zoom, {})[queue_status] = count
+        return counts
+
+    @staticmethod
+    async def _get_last_errors(session: AsyncSession, job_ids: list[int]) -> dict[int, list[str]]:
+        """Get the last 5 meta tiles errors by job."""
+        if not job_ids:
+            return {}
+        ranked_errors = (
+            select(
+                Queue.job_id.label("job_id"),
+                Queue.zoom.label("zoom"),
+                Queue.x.label("x"),
+                Queue.y.label("y"),
+                Queue.n.label("n"),
+                Queue.meta_tile.label("meta_tile"),
+                Queue.error.label("error"),
+                sqlalchemy.func.row_number()
+                .over(partition_by=Queue.job_id, order_by=Queue.started_at.desc())
+                .label("rank"),
+            )
+            .where(and_(Queue.job_id.in_(job_ids), Queue.status == _STATUS_ERROR))
+            .subquery()
+        )
+        errors_result = await session.execute(
+            select(
+                ranked_errors.c.job_id,
+                ranked_errors.c.zoom,
+                ranked_errors.c.x,
+                ranked_errors.c.y,
+                ranked_errors.c.n,
+                ranked_errors.c.meta_tile,
+                ranked_errors.c.error,
+            )
+            .where(ranked_errors.c.rank <= 5)
+            .order_by(ranked_errors.c.job_id.asc(), ranked_errors.c.rank.asc()),
+        )
+        errors_by_job: dict[int, list[str]] = {}
+        for job_id, zoom, x, y, n, meta_tile, error in errors_result:
+            errors_by_job.setdefault(job_id, []).append(
+                f"{_decode_tilecoord(zoom, x, y, n, meta_tile)}: {error}",
             )
-            errors_by_job: dict[int, list[str]] = {}
-            for job_id, meta_tile, error in errors_result:
-                errors_by_job.setdefault(job_id, []).append(f"{_decode_tilecoord(meta_tile)}: {error}")
+        return errors_by_job
 
-            for job in jobs:
-                result_by_zoom_level = status_by_job.get(job.id, {})
-                status = [{"zoom": zoom, **data} for zoom, data in sorted(result_by_zoom_level.items())]
-
-                nb_generate = sum(data.get("generate", 0) for data in result_by_zoom_level.values())
-                nb_pending = sum(data.get("pending", 0) for data in result_by_zoom_level.values())
-                nb_error = sum(data.get("error", 0) for data in result_by_zoom_level.values())
-
-                eta: str | None = None
-                if (
-                    job.status == _STATUS_STARTED
-                    and job.tiles_started_at is not None
-                    and job.meta_tiles_total > 0
-                ):
-                    remaining = min(nb_generate + nb_pending + nb_error, job.meta_tiles_total)
-                    processed = max(job.meta_tiles_total - remaining, 0)
-                    elapsed_seconds = int((now - job.tiles_started_at).total_seconds())
-                    if processed > 0 and elapsed_seconds > 0:
-                        eta = _format_duration(int((remaining * elapsed_seconds) / processed))
-                    elif remaining == 0:
-                        eta = _format_duration(0)
-
-                result.append((job, status, errors_by_job.get(job.id, []), eta))
-        return result
+    async def _refresh_progress(
+        self,
+        session: AsyncSession,
+        jobs: list[Job],
+        counts_by_job: dict[int, dict[int, dict[str, int]]],
+    ) -> None:
+        """Refresh the progress snapshots of the started jobs, used by `get_status`."""
+        if not jobs:
+            return
+        now = datetime.datetime.now(tz=datetime.UTC)
+        timestamp = now.timestamp()
+        job_ids = [job.id for job in jobs]
+        progress_result = await session.execute(
+            select(JobProgress.job_id, JobProgress.samples).where(JobProgress.job_id.in_(job_ids)),
+        )
+        samples_by_job = dict(progress_result.tuples())
+        errors_by_job = await self._get_last_errors(session, job_ids)
+
+        values = []
+        for job in jobs:
+            counts_by_zoom = counts_by_job.get(job.id, {})
+            samples = [
+                sample
+                for sample in samples_by_job.get(job.id) or []
+                if sample[0] >= timestamp - settings.postgresql.queue_progress_window
+            ]
+            if job.tiles_started_at is not None:
+                remaining = sum(
+                    count
+                    for counts in counts_by_zoom.values()
+                    for queue_status, count in counts.items()
+                    if queue_status in (_STATUS_CREATED, _STATUS_PENDING, _STATUS_ERROR)
+                )
+                samples.append([timestamp, max(job.meta_tiles_total - remaining, 0)])
+            values.append(
+                {
+                    "job_id": job.id,
+                    "updated_at": now,
+                    "status": _format_status(counts_by_zoom),
+                    "errors": errors_by_job.get(job.id, []),
+                    "samples": samples,
+                    "eta_seconds": self._get_eta_seconds(job, counts_by_zoom, samples, now)
+                    if job.status == _STATUS_STARTED
+                    else None,
+                },
+            )
+        insert = sqlalchemy.dialects.postgresql.insert(JobProgress).values(values)
+        await session.execute(
+            insert.on_conflict_do_update(
+                index_elements=[JobProgress.job_id],
+                set_={
+                    "updated_at": insert.excluded.updated_at,
+                    "status": insert.excluded.status,
+                    "errors": insert.excluded.errors,
+                    "samples": insert.excluded.samples,
+                    "eta_seconds": insert.excluded.eta_seconds,
+                },
+            ),
+        )
 
     async def _maintenance(self) -> None:
         """
@@ -647,6 +1110,7 @@ class PostgresqlTileStore(AsyncTileStore):
         _LOGGER.debug("Start maintenance")
 
         await self._flush_put_buffer()
+        await self._flush_ack_buffer()
         with _MAINTENANCE_SUMMARY.time():
             # Restart the too long pending jobs (queue generation)
             async with self.SessionMaker() as session:
@@ -709,35 +1173,26 @@ class PostgresqlTileStore(AsyncTileStore):
                     .where(Job.status == _STATUS_STARTED)
                     .order_by(Job.created_at),
                 )
-                for job in result_job.scalars():
-                    nb_messages = await session.scalar(
-                        select(sqlalchemy.sql.functions.count(Queue.id)).where(
-                            and_(Queue.status == _STATUS_CREATED, Queue.job_id == job.id),
-                        ),
-                    )
-                    assert nb_messages is not None
+                jobs = list(result_job.scalars())
+                counts_by_job = await self._count_queue(session, [job.id for job in jobs])
+                done_job_ids: set[int] = set()
+                for job in jobs:
+                    job_counts: collections.Counter[str] = collections.Counter()
+                    for counts in counts_by_job.get(job.id, {}).values():
+                        job_counts.update(counts)
+                    nb_messages = job_counts.get(_STATUS_CREATED, 0)
                     _NB_MESSAGE_COUNTER.labels(job.id, job.config_filename).set(1.0 * nb_messages)
-                    nb_pending = await session.scalar(
-                        select(sqlalchemy.sql.functions.count(Queue.id)).where(
-                            and_(Queue.status == _STATUS_PENDING, Queue.job_id == job.id),
-                        ),
-                    )
-                    assert nb_pending is not None
+                    nb_pending = job_counts.get(_STATUS_PENDING, 0)
                     _PENDING_COUNTER.labels(job.id, job.config_filename).set(1.0 * nb_pending)
                     if nb_messages == 0 and nb_pending == 0:
-                        count_result = await session.scalar(
-                            select(sqlalchemy.sql.functions.count(Queue.id)).where(
-                                and_(
-                                    Queue.status == _STATUS_ERROR,
-                                    Queue.job_id == job.id,
-                                ),
-                            ),
-                        )
-                        if count_result != 0:
+                        if job_counts.get(_STATUS_ERROR, 0) != 0:
                             job.status = _STATUS_ERROR
                         else:
                             job.status = _STATUS_DONE
+                            done_job_ids.add(job.id)
+                await self._refresh_progress(session, jobs, counts_by_job)
                 await session.commit()
+            await self._drop_partitions(done_job_ids)
             async with self.SessionMaker() as session:
                 # Restart the too long pending meta tiles
                 result = await session.execute(
@@ -754,18 +1209,90 @@ class PostgresqlTileStore(AsyncTileStore):
                 )
                 await session.commit()
 
+    async def _claim(self, config_filename: str) -> list[Tile]:
+        """
+        Claim a batch of meta tiles for the config file.
+
+        The meta tiles are marked as pending with a single `UPDATE ... RETURNING`.
+        """
+        assert self.SessionMaker is not None
+        now = datetime.datetime.now(tz=datetime.UTC)
+        claimable_ids = (
+            select(Queue.id)
+            .join(Job, Queue.job_id == Job.id)
+            .with_for_update(of=Queue, skip_locked=True)
+            .order_by(Job.created_at.asc(), Queue.id.asc())
+            .where(
+                and_(
+                    Queue.status == _STATUS_CREATED,
+                    Job.status == _STATUS_STARTED,
+                    Job.config_filename == config_filename,
+                )
+            )
+            .limit(self._claim_batch_size)
+        )
+        async with self.SessionMaker() as session:
+            result = await session.execute(
+                update(Queue)
+                .where(Queue.id.in_(claimable_ids.scalar_subquery()))
+                .values(status=_STATUS_PENDING, started_at=now)
+                .returning(Queue.id, Queue.job_id, Queue.zoom, Queue.x, Queue.y, Queue.n, Queue.meta_tile)
+                .execution_options(synchronize_session=False),
+            )
+            rows = sorted(result.all(), key=lambda row: row[0])
+            if rows:
+                await session.execute(
+                    update(Job)
+                    .where(
+                        and_(
+                            Job.id.in_({row.job_id for row in rows}),
+                            Job.status == _STATUS_STARTED,
+                            Job.tiles_started_at.is_(None),
+                        ),
+                    )
+                    .values(tiles_started_at=now),
+                )
+            await session.commit()
+        self._claimed_at[config_filename] = (now, time.monotonic())
+        return [
+            _decode_message(row.zoom, row.x, row.y, row.n, row.meta_tile, postgresql_id=row.id)
+            for row in rows
+        ]
+
+
+    async def release(self, tiles: list[Tile]) -> None:
+        """Put back in the queue the yielded meta tiles that will not be processed (e.g. on stop)."""
+        queue_ids = [
+            tile.postgresql_id  # type: ignore[attr-defined]
+            for tile in tiles
+            if hasattr(tile, "postgresql_id")
+        ]
+        if not queue_ids or self.SessionMaker is None:
+            return
+        async with self.SessionMaker() as session:
+            await session.execute(
+                update(Queue)
+                .where(and_(Queue.id.in_(queue_ids), Queue.status == _STATUS_PENDING))
+                .values(status=_STATUS_CREATED, started_at=None),
+            )
+            await session.commit()
+
     async def list(self) -> AsyncIterator[Tile]:
         """List the meta tiles in the queue."""
         assert self.SessionMaker is not None
         # Used to balance the generation between the config files
         config_filenames: set[str] = set()
         nb_iter = 0
+        await self._listen()
         while True:
             await self._flush_put_buffer()
+            await self._flush_ack_buffer(force=False)
 
             if nb_iter >= 1000 or not config_filenames:
                 nb_iter = 0
 
+                # Cleared before the checks to don't miss a notification sent in between
+                self._wakeup.clear()
                 await self._maintenance()
 
                 async with self.SessionMaker() as session:
@@ -775,11 +1302,17 @@ class PostgresqlTileStore(AsyncTileStore):
                     config_filenames = set(result.scalars())
 
                 if not config_filenames:
-                    await asyncio.sleep(10)
+                    # Wait for a notification, the polling is used as a fallback
+                    with contextlib.suppress(TimeoutError):
+                        await asyncio.wait_for(
+                            self._wakeup.wait(),
+                            timeout=settings.postgresql.queue_poll_interval,
+                        )
             else:
                 nb_iter += 1
 
             for config_filename in set(config_filenames):
+                job_id = None
                 try:
                     if settings.postgresql.objgraph_postgresql:
                         for generation in range(3):
@@ -793,51 +1326,146 @@ class PostgresqlTileStore(AsyncTileStore):
                         if values:
                             _LOGGER.debug("Objgraph growth in postgresql:\n%s", "\n".join(values))
 
-                    async with self.SessionMaker() as session:
-                        result_queue = await session.execute(
-                            select(Queue)
-                            .join(Job, Queue.job_id == Job.id)
-                            .with_for_update(of=Queue, skip_locked=True)
-                            .order_by(Job.created_at.asc(), Queue.id.asc())
-                            .where(
-                                and_(
-                                    Queue.status == _STATUS_CREATED,
-                                    Job.status == _STATUS_STARTED,
-                                    Job.config_filename == config_filename,
-                                )
-                            )
-                            .limit(1),
-                        )
-                        sqlalchemy_tile = result_queue.scalar()
-                        if sqlalchemy_tile is None:
-                            config_filenames.remove(config_filename)
-                            continue
-                        job_id = sqlalchemy_tile.job_id
-                        sqlalchemy_tile.status = _STATUS_PENDING
-                        now = datetime.datetime.now(tz=datetime.UTC)
-                        sqlalchemy_tile.started_at = now
-                        await session.execute(
-                            update(Job)
-                            .where(
-                                and_(
-                                    Job.id == job_id,
-                                    Job.status == _STATUS_STARTED,
-                                    Job.tiles_started_at.is_(None),
-                                ),
-                            )
-                            .values(tiles_started_at=now),
-                        )
-                        meta_tile = _decode_message(
-                            sqlalchemy_tile.meta_tile,
-                            postgresql_id=sqlalchemy_tile.id,
-                        )
-                        await session.commit()
+                    claimed = self._claimed.setdefault(config_filename, collections.deque())
+                    await self._check_claimed(config_filename)
+                    if not claimed:
+                        claimed.extend(await self._claim(config_filename))
+                    if not claimed:
+                        config_filenames.remove(config_filename)
+                        continue
+                    meta_tile = claimed.popleft()
+                    job_id = meta_tile.metadata.get("job_id")
                     yield meta_tile
                 except Exception:  # pylint: disable=broad-except
                     _LOGGER.exception("Error while reading from Postgres")
                     _READ_ERROR_COUNTER.labels(job_id or -1, config_filename or "unknown").inc()
                     await asyncio.sleep(1)
 
+    async def _listen(self) -> None:
+        """Listen the queue notifications, used to wake up the idle workers."""
+        if not settings.postgresql.queue_listen or self._listen_connection is not None:
+            return
+        assert self._engine is not None
+        connection = await self._engine.connect()
+        try:
+            raw_connection = await connection.get_raw_connection()
+            driver_connection: Any = raw_connection.driver_connection
+            if hasattr(driver_connection, "add_listener"):
+                # asyncpg
+                await driver_connection.add_listener(_NOTIFY_CHANNEL, lambda *_: self._wakeup.set())
+            else:
+                # psycopg
+                channel = _NOTIFY_CHANNEL.replace('"', '""')
+                await driver_connection.execute(f'LISTEN "{channel}"')
+                await driver_connection.commit()
+                self._listen_task = asyncio.create_task(
+                    self._psycopg_notifies(driver_connection),
+                    name="PostgreSQL queue listener",
+                )
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.warning("Unable to listen the queue notifications, fallback to polling", exc_info=True)
+            await connection.close()
+            return
+        self._listen_connection = connection
+
+    async def _psycopg_notifies(self, driver_connection: Any) -> None:
+        try:
+            async for _ in driver_connection.notifies():
+                self._wakeup.set()
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.warning("Error while listening the queue notifications", exc_info=True)
+
+    async def _unlisten(self) -> None:
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listen_task
+            self._listen_task = None
+        if self._listen_connection is not None:
+            # Don't give back to the pool a connection with a LISTEN
+            with contextlib.suppress(Exception):
+                await self._listen_connection.invalidate()
+            with contextlib.suppress(Exception):
+                await self._listen_connection.close()
+            self._listen_connection = None
+
+    async def _check_claimed(self, config_filename: str) -> None:
+        """
+        Check the claimed meta tiles kept in memory, and renew their claim.
+
+        Remove the ones of a job that isn't started anymore (e.g. cancelled), and the ones that aren't
+        claimed by this worker anymore (e.g. put back in the queue by the pending timeout), with one query,
+        at most every `queue_claim_check_interval` seconds.
+        """
+        claimed = self._claimed.get(config_filename)
+        if not claimed:
+            return
+        claimed_at, checked_at = self._claimed_at[config_filename]
+        if time.monotonic() - checked_at < settings.postgresql.queue_claim_check_interval:
+            return
+        assert self.SessionMaker is not None
+        now = datetime.datetime.now(tz=datetime.UTC)
+        async with self.SessionMaker() as session:
+            result = await session.execute(
+                update(Queue)
+                .where(
+                    and_(
+                        Queue.id.in_([tile.postgresql_id for tile in claimed]),  # type: ignore[attr-defined]
+                        Queue.status == _STATUS_PENDING,
+                        Queue.started_at == claimed_at,
+                        Queue.job_id == Job.id,
+                        Job.status == _STATUS_STARTED,
+                    ),
+                )
+                .values(started_at=now)
+                .returning(Queue.id)
+                .execution_options(synchronize_session=False),
+            )
+            valid_ids = set(result.scalars())
+            await session.commit()
+        valid_tiles = [
+            tile
+            for tile in claimed
+            if tile.postgresql_id in valid_ids  # type: ignore[attr-defined]
+        ]
+        if len(valid_tiles) != len(claimed):
+            _LOGGER.info(
+                "Skip %d claimed meta tiles, cancelled or claimed by another worker",
+                len(claimed) - len(valid_tiles),
+            )
+        claimed.clear()
+        claimed.extend(valid_tiles)
+        self._claimed_at[config_filename] = (now, time.monotonic())
+
+    async def _release_claimed(self) -> None:
+        """Put back in the queue the claimed meta tiles that was not yielded, if they are still claimed."""
+        claims = [
+            (
+                self._claimed_at[config_filename][0],
+                [tile.postgresql_id for tile in claimed],  # type: ignore[attr-defined]
+            )
+            for config_filename, claimed in self._claimed.items()
+            if claimed
+        ]
+        self._claimed.clear()
+        self._claimed_at.clear()
+        if not claims or self.SessionMaker is None:
+            return
+        async with self.SessionMaker() as session:
+            for claimed_at, queue_ids in claims:
+                await session.execute(
+                    update(Queue)
+                    .where(
+                        and_(
+                            Queue.id.in_(queue_ids),
+                            Queue.status == _STATUS_PENDING,
+                            Queue.started_at == claimed_at,
+                        ),
+                    )
+                    .values(status=_STATUS_CREATED, started_at=None),
+                )
+            await session.commit()
+
     async def put_one(self, tile: Tile) -> Tile:
         """Put the meta tile in the queue."""
         assert self.SessionMaker is not None
@@ -846,69 +1474,105 @@ class PostgresqlTileStore(AsyncTileStore):
             self._insert_buffer.append(
                 {
                     "job_id": tile.metadata["job_id"],
-                    "zoom": tile.tilecoord.z,
-                    "meta_tile": _encode_message(tile),
+                    **_encode_message(tile),
                 },
             )
             should_flush = len(self._insert_buffer) >= self._insert_batch_size
         if should_flush:
-            async with self.SessionMaker() as session:
-                await self._flush_put_buffer(session)
-                await session.commit()
+            await self._flush_put_buffer()
         return tile
 
     async def close(self) -> None:
-        """Flush pending queue inserts and close the engine."""
+        """Flush the pending queue inserts and acknowledgements, release the claimed meta tiles, and close."""
         await self._flush_put_buffer()
+        await self._flush_ack_buffer()
+        await self._release_claimed()
+        await self._unlisten()
         if self._engine is not None:
             await self._engine.dispose()
 
     async def delete_one(self, tile: Tile) -> Tile:
-        """Delete the meta tile from the queue."""
+        """
+        Delete the meta tile from the queue.
+
+        The acknowledgements are buffered and flushed by batches.
+        """
         assert self.SessionMaker is not None
-        async with self.SessionMaker() as session:
+        if tile.error and isinstance(tile.error, Exception):
+            _LOGGER.warning(
+                "Error while processing the tile %s %s",
+                tile.tilecoord,
+                tile.formated_metadata,
+                exc_info=tile.error,
+            )
+        if not hasattr(tile, "postgresql_id"):
+            _LOGGER.error(
+                "The tile %s %s does not have the postgresql_id attribute",
+                tile.tilecoord,
+                tile.formated_metadata,
+            )
+            return tile
+
+        async with self._ack_lock:
             if tile.error:
-                if isinstance(tile.error, Exception):
-                    _LOGGER.warning(
-                        "Error while processing the tile %s %s",
-                        tile.tilecoord,
-                        tile.formated_metadata,
-                        exc_info=tile.error,
-                    )
+                self._ack_errors[tile.postgresql_id] = str(tile.error)
+            else:
+                self._ack_done.append(tile.postgresql_id)
+            if self._ack_first_at is None:
+                self._ack_first_at = time.monotonic()
+        await self._flush_ack_buffer(force=False)
+        return tile
 
-                if not hasattr(tile, "postgresql_id"):
-                    _LOGGER.error(
-                        "The tile %s %s does not have the postgresql_id attribute",
-                        tile.tilecoord,
-                        tile.formated_metadata,
+    async def _flush_ack_buffer(self, force: bool = True) -> None:
+        """Delete the done meta tiles, and mark the meta tiles in error, in one transaction."""
+        async with self._ack_lock:
+            nb_ack = len(self._ack_done) + len(self._ack_errors)
+            if nb_ack == 0:
+                return
+            if (
+                not force
+                and nb_ack < self._ack_batch_size
+                and self._ack_first_at is not None
+                and time.monotonic() - self._ack_first_at < settings.postgresql.queue_ack_interval
+            ):
+                return
+            done_ids = self._ack_done
+            errors = self._ack_errors
+            self._ack_done = []
+            self._ack_errors = {}
+            self._ack_first_at = None
+
+        assert self.SessionMaker is not None
+        try:
+            async with self.SessionMaker() as session:
+                if done_ids:
+                    await session.execute(
+                        delete(Queue).where(and_(Queue.status == _STATUS_PENDING, Queue.id.in_(done_ids))),
                     )
-                    return tile
-                result = await session.execute(
-                    select(Queue)
-                    .where(and_(Queue.status == _STATUS_PENDING, Queue.id == tile.postgresql_id))
-                    .with_for_update(of=Queue),
-                )
-                sqlalchemy_tile = result.scalar()
-                if sqlalchemy_tile is not None:
-                    sqlalchemy_tile.status = _STATUS_ERROR
-                    sqlalchemy_tile.error = str(tile.error)
-                    await session.commit()
-            else:
-                if not hasattr(tile, "postgresql_id"):
-                    _LOGGER.error(
-                        "The tile %s %s does not have the postgresql_id attribute",
-                        tile.tilecoord,
-                        tile.formated_metadata,
+                if errors:
+                    queue_table = Queue.__table__
+                    await session.execute(
+                        update(queue_table)
+                        .where(
+                            and_(
+                                queue_table.c.status == _STATUS_PENDING,
+                                queue_table.c.id == sqlalchemy.bindparam("queue_id"),
+                            ),
+                        )
+                        .values(status=_STATUS_ERROR, error=sqlalchemy.bindparam("queue_error")),
+                        [
+                            {"queue_id": queue_id, "queue_error": error}
+                            for queue_id, error in errors.items()
+                        ],
                     )
-                    return tile
-
-                await session.execute(
-                    delete(Queue).where(
-                        and_(Queue.status == _STATUS_PENDING, Queue.id == tile.postgresql_id),
-                    ),
-                )
                 await session.commit()
-        return tile
+        except Exception:
+            async with self._ack_lock:
+                self._ack_done[:0] = done_ids
+                self._ack_errors = {**errors, **self._ack_errors}
+                if self._ack_first_at is None:
+                    self._ack_first_at = time.monotonic()
+            raise
 
     async def get_one(self, tile: Tile) -> Tile:
         """Get the meta tile from the queue."""
@@ -0,0 +1,264 @@
+# Copyright (c) 2026 by Camptocamp
+"""Async S3 tile store, based on aiobotocore."""
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator
+from typing import Any, cast
+
+import aiobotocore.config
+import aiobotocore.session
+import botocore.exceptions
+from tilecloud import Tile, TileLayout
+
+from tilecloud_chain.settings import settings
+from tilecloud_chain.store import AsyncTileStore, map_concurrently
+
+_LOGGER = logging.getLogger(__name__)
+
+# Maximum number of keys in a DeleteObjects request
+_DELETE_BATCH_SIZE = 1000
+
+# The shared clients by S3 host, with the context used to close them
+_CLIENTS: dict[str | None, tuple[contextlib.AsyncExitStack, Any]] = {}
+# The number of users of the shared clients, they are closed when the last one releases them
+_CLIENTS_USERS = 0
+
+
+async def get_client(s3_host: str | None) -> Any:
+    """Get the shared S3 client of the host, its connection pool is used by all the stores."""
+    if s3_host not in _CLIENTS:
+        exit_stack = contextlib.AsyncExitStack()
+        client = await exit_stack.enter_async_context(
+            aiobotocore.session.AioSession().create_client(
+                "s3",
+                endpoint_url=(f"https://{s3_host}/") if s3_host is not None else None,
+                config=aiobotocore.config.AioConfig(
+                    max_pool_connections=settings.s3.max_connections,
+                    connect_timeout=settings.s3.timeout,
+                    read_timeout=settings.s3.timeout,
+                ),
+            ),
+        )
+        if s3_host in _CLIENTS:
+            # Created concurrently by another task
+            await exit_stack.aclose()
+        else:
+            _CLIENTS[s3_host] = (exit_stack, client)
+    return _CLIENTS[s3_host][1]
+
+
+def acquire_clients() -> None:
+    """Register a user of the shared S3 clients, e.g. a tile generation."""
+    global _CLIENTS_USERS  # noqa: PLW0603
+    _CLIENTS_USERS += 1
+
+
+async def release_clients() -> None:
+    """Unregister a user of the shared S3 clients, close them when it was the last one."""
+    global _CLIENTS_USERS  # noqa: PLW0603
+    _CLIENTS_USERS -= 1
+    if _CLIENTS_USERS <= 0:
+        _CLIENTS_USERS = 0
+        await close_clients()
+
+
+async def close_clients() -> None:
+    """Close the shared S3 clients, even if they are still used."""
+    while _CLIENTS:
+        _, (exit_stack, _) = _CLIENTS.popitem()
+        try:
+            await exit_stack.aclose()
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.warning("Error while closing the S3 client", exc_info=True)
+
+
+def _get_status(exception: botocore.exceptions.ClientError) -> int:
+    return cast("int", exception.response["ResponseMetadata"]["HTTPStatusCode"])
+
+
+def _set_metadata(tile: Tile, response: dict[str, Any]) -> None:
+    """Set the tile attributes from the GetObject or HeadObject response."""
+    tile.content_encoding = response.get("ContentEncoding")
+    tile.content_type = response.get("ContentType")
+    tile.etag = response.get("ETag")  # type: ignore[attr-defined]
+    tile.last_modified = response.get("LastModified")  # type: ignore[attr-defined]
+
+
+class S3TileStore(AsyncTileStore):
+    """
+    Tiles stored in Amazon S3, async version.
+
+    All the stores of the same host share the same client and its connection pool
+    (``TILECLOUD_CHAIN__S3__MAX_CONNECTIONS``), the bulk operations are done concurrently
+    within this limit.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        tilelayout: TileLayout,
+        dry_run: bool = False,
+        s3_host: str | None = None,
+        cache_control: str | None = None,
+        client: Any | None = None,
+    ) -> None:
+        """Initialize, the ``client`` is used instead of the shared one, e.g. for the tests."""
+        self.bucket = bucket
+        self.tilelayout = tilelayout
+        self.dry_run = dry_run
+        self.s3_host = s3_host
+        self.cache_control = cache_control
+        self._client = client
+
+    async def _get_client(self) -> Any:
+        return self._client if self._client is not None else await get_client(self.s3_host)
+
+    async def __contains__(self, tile: Tile) -> bool:
+        """See in superclass."""
+        if not tile:
+            return False
+        key_name = self.tilelayout.filename(tile.tilecoord, tile.metadata)
+        client = await self._get_client()
+        try:
+            await client.head_object(Bucket=self.bucket, Key=key_name)
+        except botocore.exceptions.ClientError as exc:
+            if _get_status(exc) == 404:
+                return False
+            raise
+        return True
+
+    async def delete_one(self, tile: Tile) -> Tile:
+        """See in superclass."""
+        try:
+            key_name = self.tilelayout.filename(tile.tilecoord, tile.metadata)
+            if not self.dry_run:
+                client = await self._get_client()
+                await client.delete_object(Bucket=self.bucket, Key=key_name)
+        except botocore.exceptions.ClientError as exc:
+            _LOGGER.warning("Error while deleting tile %s", tile, exc_info=True)
+            tile.error = exc
+        return tile
+
+    async def _delete_batch(self, client: Any, tiles_by_key: dict[str, Tile]) -> None:
+        try:
+            response = await client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in tiles_by_key], "Quiet": True},
+            )
+        except botocore.exceptions.ClientError as exc:
+            _LOGGER.warning("Error while deleting %i tiles", len(tiles_by_key), exc_info=True)
+            for tile in tiles_by_key.values():
+                tile.error = exc
+            return
+        for error in response.get("Errors", []):
+            tile = tiles_by_key[error["Key"]]
+            _LOGGER.warning("Error while deleting tile %s: %s", tile, error.get("Message"))
+            tile.error = f"{error.get('Code')}: {error.get('Message')}"
+
+    async def delete(self, tiles: list[Tile]) -> list[Tile]:
+        """Delete the tiles with concurrent ``DeleteObjects`` requests of up to 1000 keys."""
+        tiles_by_key: dict[str, Tile] = {}
+        for tile in tiles:
+            try:
+                tiles_by_key[self.tilelayout.filename(tile.tilecoord, tile.metadata)] = tile
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOGGER.warning("Error while deleting tile %s", tile, exc_info=True)
+                tile.error = exc
+        if self.dry_run or not tiles_by_key:
+            return tiles
+        client = await self._get_client()
+        keys = list(tiles_by_key)
+        await asyncio.gather(
+            *(
+                self._delete_batch(
+                    client,
+                    {key: tiles_by_key[key] for key in keys[index : index + _DELETE_BATCH_SIZE]},
+                )
+                for index in range(0, len(keys), _DELETE_BATCH_SIZE)
+            ),
+        )
+        return tiles
+
+    async def get_one(self, tile: Tile) -> Tile | None:
+        """See in superclass."""
+        key_name = self.tilelayout.filename(tile.tilecoord, tile.metadata)
+        client = await self._get_client()
+        try:
+            response = await client.get_object(Bucket=self.bucket, Key=key_name)
+            async with response["Body"] as stream:
+                tile.data = await stream.read()
+            _set_metadata(tile, response)
+        except botocore.exceptions.ClientError as exc:
+            if _get_status(exc) == 404:
+                return None
+            _LOGGER.exception("Error while getting tile %s", tile)
+            tile.error = exc
+        return tile
+
+    async def head_one(self, tile: Tile) -> Tile | None:
+        """Get the tile metadata with a ``HeadObject`` request."""
+        key_name = self.tilelayout.filename(tile.tilecoord, tile.metadata)
+        client = await self._get_client()
+        try:
+            _set_metadata(tile, await client.head_object(Bucket=self.bucket, Key=key_name))
+        except botocore.exceptions.ClientError as exc:
+            if _get_status(exc) == 404:
+                return None
+            _LOGGER.exception("Error while getting tile %s", tile)
+            tile.error = exc
+        return tile
+
+    async def get(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile | None]:
+        """Get the tiles concurrently."""
+        async for tile in map_concurrently(tiles, self.get_one, settings.s3.max_connections):
+            yield tile
+
+    async def list(self) -> AsyncIterator[Tile]:
+        """See in superclass."""
+        prefix = getattr(self.tilelayout, "prefix", "")
+        client = await self._get_client()
+        paginator = client.get_paginator("list_objects_v2")
+        async for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for s3_object in page.get("Contents", []):
+                try:
+                    tilecoord = self.tilelayout.tilecoord(s3_object["Key"])
+                except ValueError:
+                    continue
+                yield Tile(tilecoord)
+
+    async def put_one(self, tile: Tile) -> Tile:
+        """See in superclass."""
+        assert tile.data is not None
+        key_name = self.tilelayout.filename(tile.tilecoord, tile.metadata)
+        args = {}
+        if tile.content_encoding is not None:
+            args["ContentEncoding"] = tile.content_encoding
+        if tile.content_type is not None:
+            args["ContentType"] = tile.content_type
+        if self.cache_control is not None:
+            args["CacheControl"] = self.cache_control
+        if not self.dry_run:
+            client = await self._get_client()
+            try:
+                await client.put_object(
+                    ACL="public-read",
+                    Body=tile.data,
+                    Key=key_name,
+                    Bucket=self.bucket,
+                    **args,
+                )
+            except botocore.exceptions.ClientError as exc:
+                _LOGGER.warning("Error while putting tile %s", tile, exc_info=True)
+                tile.error = exc
+        return tile
+
+    async def put(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile]:
+        """Put the tiles concurrently."""
+        async for tile in map_concurrently(tiles, self.put_one, settings.s3.max_connections):
+            yield tile
+
+    def __str__(self) -> str:
+        """Get string representation."""
+        return f"{self.__class__.__name__}({self.s3_host or 'aws'}: {self.bucket})"
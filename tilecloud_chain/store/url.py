@@ -14,18 +14,56 @@ from tilecloud import BoundingPyramid, Tile, TileCoord, TileLayout
 
 from tilecloud_chain import host_limit
 from tilecloud_chain.settings import settings
+from tilecloud_chain.stat_cache import stat_cache
 from tilecloud_chain.store import AsyncTileStore
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class _DatedConfig:
-    """Loaded config with timestamps to be able to invalidate it on configuration file change."""
+class DatedHostsLimit:
+    """The hosts limit configuration, reloaded when the file changes."""
 
     def __init__(self) -> None:
         self.config: host_limit.HostLimit = {}
         self.mtime = 0.0
 
+    async def load(self) -> host_limit.HostLimit:
+        """
+        Get the hosts limit configuration, reloaded if the file has changed.
+
+        The file modification time is checked through the shared throttled `stat_cache`.
+        """
+        host_limit_path = settings.hosts_limit
+        host_stat = await stat_cache.stat(host_limit_path)
+        if host_stat is not None:
+            if self.mtime != host_stat.st_mtime:
+                yaml = YAML(typ="safe")
+                async with await host_limit_path.open(encoding="utf-8") as f:
+                    content = await f.read()
+                    self.config = yaml.load(content)
+                    self.mtime = host_stat.st_mtime
+
+                    schema_data = pkgutil.get_data("tilecloud_chain", "host-limit-schema.json")
+                    assert schema_data
+                    errors, _ = jsonschema_validator.validate(
+                        str(host_limit_path),
+                        cast("dict[str, Any]", self.config),
+                        json.loads(schema_data),
+                    )
+
+                if errors:
+                    _LOGGER.error("The host limit file is invalid, ignoring:\n%s", "\n".join(errors))
+                    self.config = {}
+        return self.config
+
+
+def get_host_concurrent(hosts_limit: host_limit.HostLimit, hostname: str) -> int:
+    """Get the maximum number of concurrent requests on the host."""
+    return hosts_limit.get("hosts", {}).get(hostname, {}).get(
+        "concurrent",
+        hosts_limit.get("default", {}).get("concurrent", settings.host_concurrent),
+    )
+
 
 class URLTileStore(AsyncTileStore):
     """A tile store that reads and writes tiles from a formatted URL."""
@@ -42,7 +80,7 @@ class URLTileStore(AsyncTileStore):
         self._bounding_pyramid = bounding_pyramid
         self._session = aiohttp.ClientSession()
         self._hosts_semaphore: dict[str, asyncio.Semaphore] = {}
-        self._hosts_limit = _DatedConfig()
+        self._hosts_limit = DatedHostsLimit()
         if headers is not None:
             self._session.headers.update(headers)
 
@@ -54,29 +92,8 @@ class URLTileStore(AsyncTileStore):
             _LOGGER.warning("Ignored error during aiohttp session close", exc_info=True)
 
     async def _get_hosts_limit(self) -> host_limit.HostLimit:
-        """Initialize the store."""
-        host_limit_path = settings.hosts_limit
-        if await host_limit_path.exists():
-            host_stat = await host_limit_path.stat()
-            if self._hosts_limit.mtime != host_stat.st_mtime:
-                yaml = YAML(typ="safe")
-                async with await host_limit_path.open(encoding="utf-8") as f:
-                    content = await f.read()
-                    self._hosts_limit.config = yaml.load(content)
-                    self._hosts_limit.mtime = host_stat.st_mtime
-
-                    schema_data = pkgutil.get_data("tilecloud_chain", "host-limit-schema.json")
-                    assert schema_data
-                    errors, _ = jsonschema_validator.validate(
-                        str(host_limit_path),
-                        cast("dict[str, Any]", self._hosts_limit.config),
-                        json.loads(schema_data),
-                    )
-
-                if errors:
-                    _LOGGER.error("The host limit file is invalid, ignoring:\n%s", "\n".join(errors))
-                    self._hosts_limit.config = {}
-        return self._hosts_limit.config
+        """Get the hosts limit configuration."""
+        return await self._hosts_limit.load()
 
     async def get_one(self, tile: Tile) -> Tile | None:
         """See in superclass."""
@@ -97,21 +114,9 @@ class URLTileStore(AsyncTileStore):
         if url_split.hostname in self._hosts_semaphore:
             semaphore = self._hosts_semaphore[url_split.hostname]
         else:
-            limit = (
-                (await self._get_hosts_limit())
-                .get("hosts", {})
-                .get(url_split.hostname, {})
-                .get(
-                    "concurrent",
-                    (await self._get_hosts_limit())
-                    .get("default", {})
-                    .get(
-                        "concurrent",
-                        settings.host_concurrent,
-                    ),
-                )
+            semaphore = asyncio.Semaphore(
+                get_host_concurrent(await self._get_hosts_limit(), url_split.hostname),
             )
-            semaphore = asyncio.Semaphore(limit)
             self._hosts_semaphore[url_split.hostname] = semaphore
 
         async with semaphore:
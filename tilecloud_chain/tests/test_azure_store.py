@@ -0,0 +1,165 @@
+# Copyright (c) 2026 by Camptocamp
+"""Test the Azure storage blob tile store against an in memory container stand-in."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+from tilecloud import Tile, TileCoord
+from tilecloud.layout.template import TemplateTileLayout
+
+from tilecloud_chain.settings import settings
+from tilecloud_chain.store.azure_storage_blob import AzureStorageBlobTileStore
+
+
+class _Download:
+    def __init__(self, blob: dict[str, Any]) -> None:
+        self._blob = blob
+        self.properties = SimpleNamespace(
+            content_settings=blob["content_settings"],
+            etag=blob.get("etag"),
+            last_modified=None,
+        )
+
+    async def readall(self) -> bytes:
+        return self._blob["data"]
+
+
+class _BlobClient:
+    def __init__(self, container: "_ContainerStandIn", name: str) -> None:
+        self._container = container
+        self._name = name
+
+    async def download_blob(self) -> _Download:
+        await self._container.request("download", self._name)
+        if self._name not in self._container.blobs:
+            raise ResourceNotFoundError
+        return _Download(self._container.blobs[self._name])
+
+    async def delete_blob(self) -> None:
+        await self._container.request("delete", self._name)
+        if self._name not in self._container.blobs:
+            raise ResourceNotFoundError
+        del self._container.blobs[self._name]
+
+    async def upload_blob(self, data: bytes, overwrite: bool, content_settings: Any) -> None:
+        await self._container.request("upload", self._name)
+        self._container.blobs[self._name] = {
+            "data": data,
+            "content_settings": content_settings,
+            "etag": f'"{len(self._container.requests):x}"',
+        }
+
+
+class _ContainerStandIn:
+    """The subset of the Azure container client used by the store."""
+
+    def __init__(self) -> None:
+        self.blobs: dict[str, dict[str, Any]] = {}
+        self.requests: list[tuple[str, str]] = []
+        self.running = 0
+        self.max_running = 0
+        self.delete_batches: list[list[str]] = []
+        self.failing: set[str] = set()
+
+    async def request(self, operation: str, name: str) -> None:
+        self.requests.append((operation, name))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+
+    def get_blob_client(self, blob: str) -> _BlobClient:
+        return _BlobClient(self, blob)
+
+    async def delete_blobs(self, *names: str, raise_on_any_failure: bool) -> AsyncIterator[Any]:
+        assert not raise_on_any_failure
+        self.delete_batches.append(list(names))
+        responses = []
+        for name in names:
+            if name in self.failing:
+                responses.append(SimpleNamespace(status_code=500, reason="Internal Server Error"))
+            elif name in self.blobs:
+                del self.blobs[name]
+                responses.append(SimpleNamespace(status_code=202, reason="Accepted"))
+            else:
+                responses.append(SimpleNamespace(status_code=404, reason="Not Found"))
+
+        async def iterate() -> AsyncIterator[Any]:
+            for response in responses:
+                yield response
+
+        return iterate()
+
+
+async def _tiles(tilecoord: TileCoord, data: bytes | None = None) -> AsyncIterator[Tile]:
+    for sub_tilecoord in tilecoord:
+        yield Tile(sub_tilecoord, data=data, content_type="image/png", metadata={})
+
+
+@pytest.mark.asyncio
+async def test_get_one_request(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings.azure, "max_concurrency", 3)
+    container = _ContainerStandIn()
+    store = AzureStorageBlobTileStore(
+        TemplateTileLayout("%(z)d/%(x)d/%(y)d.png"),
+        container_client=container,
+    )
+
+    tiles = [tile async for tile in store.put(_tiles(TileCoord(2, 0, 0, 3), b"data"))]
+    assert len(tiles) == 9
+    assert container.max_running == 3
+
+    container.requests.clear()
+    tiles = [tile async for tile in store.get(_tiles(TileCoord(2, 2, 2, 2)))]
+    assert [tile.data if tile is not None else None for tile in tiles] == [b"data", None, None, None]
+    assert tiles[0].content_type == "image/png"
+    assert tiles[0].etag == container.blobs["2/2/2.png"]["etag"]
+    # One request by tile
+    assert [operation for operation, _ in container.requests] == ["download"] * 4
+
+
+@pytest.mark.asyncio
+async def test_delete_one() -> None:
+    container = _ContainerStandIn()
+    store = AzureStorageBlobTileStore(
+        TemplateTileLayout("%(z)d/%(x)d/%(y)d.png"),
+        container_client=container,
+    )
+    container.blobs["0/0/0.png"] = {"data": b"data", "content_settings": None}
+
+    tile = await store.delete_one(Tile(TileCoord(0, 0, 0), metadata={}))
+    assert tile.error is None
+    assert container.blobs == {}
+
+    # Already deleted
+    tile = await store.delete_one(Tile(TileCoord(0, 0, 0), metadata={}))
+    assert tile.error is None
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete() -> None:
+    container = _ContainerStandIn()
+    store = AzureStorageBlobTileStore(
+        TemplateTileLayout("%(z)d/%(x)d/%(y)d.png"),
+        container_client=container,
+    )
+    tiles = [Tile(tilecoord, metadata={}) for tilecoord in TileCoord(5, 0, 0, 18)]
+    assert len(tiles) == 324
+    for tile in tiles[:-1]:
+        container.blobs[f"5/{tile.tilecoord.x}/{tile.tilecoord.y}.png"] = {
+            "data": b"data",
+            "content_settings": None,
+        }
+    container.failing.add("5/17/16.png")
+
+    assert await store.delete(tiles) == tiles
+    # Batches of at most 256 blobs
+    assert [len(batch) for batch in container.delete_batches] == [256, 68]
+    # The failed sub-request is reported on its tile, the missing tile isn't an error
+    errors = {str(tile.tilecoord): tile.error for tile in tiles if tile.error is not None}
+    assert errors == {"5/17/16": "500: Internal Server Error"}
+    assert list(container.blobs) == ["5/17/16.png"]
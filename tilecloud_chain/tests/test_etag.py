@@ -0,0 +1,196 @@
+# Copyright (c) 2026 by Camptocamp
+"""Test the ETag, the conditional and the range requests."""
+
+import contextlib
+import datetime
+import gzip
+from collections.abc import AsyncIterator
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import botocore.exceptions
+import pytest
+from tilecloud import Tile, TileCoord
+from tilecloud.layout.template import TemplateTileLayout
+
+from tilecloud_chain import server
+from tilecloud_chain.server import (
+    Server,
+    _accepted_encodings,
+    _content_etag,
+    _etag_matches,
+    _not_modified,
+    _parse_range,
+    _render_capabilities,
+)
+from tilecloud_chain.settings import settings
+from tilecloud_chain.store.filesystem import FilesystemTileStore
+
+
+def test_etag_matches() -> None:
+    assert _etag_matches('"a"', '"a"')
+    assert _etag_matches('"b", W/"a"', '"a"')
+    assert _etag_matches("*", '"a"')
+    assert not _etag_matches('"b"', '"a"')
+    assert not _etag_matches(None, '"a"')
+    assert not _etag_matches('"a"', None)
+    assert _content_etag(b"data") == _content_etag(b"data") != _content_etag(b"other")
+
+
+def test_not_modified() -> None:
+    response = _not_modified({"Content-Type": "image/png", "ETag": '"a"', "Cache-Control": "max-age=60"})
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["ETag"] == '"a"'
+    assert response.headers["Cache-Control"] == "max-age=60"
+    assert "Content-Type" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_filesystem_etag(tmp_path: Path) -> None:
+    store = FilesystemTileStore(TemplateTileLayout(str(tmp_path) + "/%(z)d/%(x)d/%(y)d.png"))
+    await store.put_one(Tile(TileCoord(0, 0, 0), data=b"data", metadata={}))
+
+    tile = await store.get_one(Tile(TileCoord(0, 0, 0), metadata={}))
+    assert tile is not None
+    assert tile.data == b"data"
+    assert tile.etag.startswith('"')
+    assert tile.last_modified is not None
+
+    head_tile = await store.head_one(Tile(TileCoord(0, 0, 0), metadata={}))
+    assert head_tile is not None
+    assert head_tile.data is None
+    assert head_tile.etag == tile.etag
+    assert await store.head_one(Tile(TileCoord(1, 0, 0), metadata={})) is None
+
+
+
+def test_parse_range() -> None:
+    assert _parse_range(None, 100) is None
+    assert _parse_range("bytes=0-9", 100) == (0, 9)
+    assert _parse_range("bytes=90-", 100) == (90, 99)
+    assert _parse_range("bytes=90-200", 100) == (90, 99)
+    assert _parse_range("bytes=-10", 100) == (90, 99)
+    assert _parse_range("bytes=-200", 100) == (0, 99)
+    # Ignored
+    assert _parse_range("bytes=0-1,5-6", 100) is None
+    assert _parse_range("bytes=9-0", 100) is None
+    assert _parse_range("items=0-9", 100) is None
+    assert _parse_range("bytes=a-9", 100) is None
+    # Not satisfiable
+    with pytest.raises(ValueError, match="Range not satisfiable"):
+        _parse_range("bytes=100-", 100)
+    with pytest.raises(ValueError, match="Range not satisfiable"):
+        _parse_range("bytes=-0", 100)
+
+
+def test_accepted_encodings() -> None:
+    assert _accepted_encodings(None) == set()
+    assert _accepted_encodings("gzip, deflate, br;q=0.5") == {"gzip", "deflate", "br"}
+    assert _accepted_encodings("gzip;q=0, br") == {"br"}
+
+
+def test_capabilities_response(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings.server, "capabilities_compression", True)
+    rendered = _render_capabilities("<Capabilities/>")
+    headers = {"Content-Type": "application/xml"}
+
+    response = Server._capabilities_response(rendered, headers, None, None)  # noqa: SLF001
+    assert response.body == b"<Capabilities/>"
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    response = Server._capabilities_response(rendered, headers, "gzip", None)  # noqa: SLF001
+    assert gzip.decompress(response.body) == b"<Capabilities/>"
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] != rendered.etag
+
+    response = Server._capabilities_response(  # noqa: SLF001
+        rendered,
+        headers,
+        "gzip",
+        response.headers["ETag"],
+    )
+    assert response.status_code == 304
+
+    monkeypatch.setattr(settings.server, "capabilities_compression", False)
+    rendered = _render_capabilities("<Capabilities/>")
+    response = Server._capabilities_response(rendered, headers, "gzip", None)  # noqa: SLF001
+    assert response.body == b"<Capabilities/>"
+    assert "Vary" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_s3_range_not_satisfiable(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = MagicMock()
+    client.get_object = AsyncMock(
+        side_effect=botocore.exceptions.ClientError(
+            {"Error": {"Code": "InvalidRange"}, "ResponseMetadata": {"HTTPStatusCode": 416}},
+            "GetObject",
+        ),
+    )
+    client.head_object = AsyncMock(return_value={"ContentLength": 50})
+    wmts_server = Server()
+    monkeypatch.setattr(wmts_server, "get_cache", lambda config: {"type": "s3", "bucket": "tiles"})
+    monkeypatch.setattr(wmts_server, "get_s3_client", AsyncMock(return_value=client))
+
+    response = await wmts_server._s3_read(  # noqa: SLF001
+        "legend.png",
+        {},
+        None,  # type: ignore[arg-type]
+        range_header="bytes=100-",
+    )
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */50"
+
+
+@pytest.mark.asyncio
+async def test_azure_stream(monkeypatch: pytest.MonkeyPatch) -> None:
+    client_options: dict[str, Any] = {}
+    closed: list[bool] = []
+
+    async def chunks() -> AsyncIterator[bytes]:
+        yield b"legend"
+
+    blob_client = MagicMock()
+    blob_client.get_blob_properties = AsyncMock(
+        return_value=SimpleNamespace(
+            etag='"1"',
+            last_modified=datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC),
+            size=6,
+            content_settings=SimpleNamespace(content_type="image/png", content_encoding=None),
+        ),
+    )
+    blob_client.download_blob = AsyncMock(return_value=SimpleNamespace(chunks=chunks))
+
+    @contextlib.asynccontextmanager
+    async def get_azure_container_client(container: str, **options: Any) -> AsyncIterator[Any]:
+        del container
+        client_options.update(options)
+        try:
+            yield SimpleNamespace(get_blob_client=lambda blob: blob_client)
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(settings.server, "stream_chunk_size", 1024)
+    monkeypatch.setattr(server, "_TILEGENERATION", MagicMock())
+    monkeypatch.setattr(server, "get_azure_container_client", get_azure_container_client)
+    wmts_server = Server()
+    monkeypatch.setattr(
+        wmts_server,
+        "get_cache",
+        lambda config: {"type": "azure", "container": "tiles", "folder": ""},
+    )
+
+    response = await wmts_server.get("legend.png", {}, None)  # type: ignore[arg-type]
+    assert response.status_code == 200
+    assert response.headers["Content-Length"] == "6"
+    # The blob is downloaded by chunks of the stream chunk size
+    assert client_options == {"max_single_get_size": 1024, "max_chunk_get_size": 1024}
+    # The client is closed after the response, even if the body isn't sent
+    assert closed == []
+    assert response.background is not None
+    await response.background()
+    assert closed == [True]
@@ -1,4 +1,5 @@
 # Copyright (c) 2026 by Camptocamp
+import asyncio
 import json
 import os
 import shutil
@@ -36,7 +37,9 @@ from tilecloud_chain import (
     transform_bbox,
 )
 from tilecloud_chain import configuration as tcc_configuration
+from tilecloud_chain.filter.error import TooManyError
 from tilecloud_chain.settings import settings
+from tilecloud_chain.store import AsyncTileStore
 from tilecloud_chain.tests import CompareCase
 
 
@@ -2090,3 +2093,134 @@ def test_wms_tile_layout_keeps_srs_for_version_1_1_1() -> None:
 
     assert tile_layout.params["SRS"] == "EPSG:21781"
     assert "CRS" not in tile_layout.params
+
+
+@pytest.mark.asyncio
+async def test_consume_pipeline(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings.pipeline, "enabled", True)
+    monkeypatch.setattr(settings.pipeline, "render_tasks", 3)
+    monkeypatch.setattr(settings.pipeline, "process_tasks", 2)
+    gene = TileGeneration(configure_logging=False, maxconsecutive_errors=False)
+
+    async def tilestream() -> Any:
+        for x in range(10):
+            yield Tile(TileCoord(1, x, 0))
+
+    gene.tilestream = tilestream()
+    rendered: list[int] = []
+    processed: list[int] = []
+
+    async def render(tile: Tile) -> Tile | None:
+        rendered.append(tile.tilecoord.x)
+        if tile.tilecoord.x == 3:
+            return None
+        return tile
+
+    async def process(tile: Tile) -> Tile:
+        processed.append(tile.tilecoord.x)
+        return tile
+
+    gene.add_stage("render")
+    gene.imap(render)
+    gene.add_stage("process")
+    gene.imap(process)
+    assert [(name, nb_tasks) for name, _, nb_tasks in gene._get_stages()] == [("render", 3), ("process", 2)]
+
+    await gene.consume()
+
+    assert sorted(rendered) == list(range(10))
+    assert sorted(processed) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+
+
+class _SplitterStore(AsyncTileStore):
+    async def get(self, tiles: Any) -> Any:
+        async for metatile in tiles:
+            for tilecoord in metatile.tilecoord:
+                yield Tile(tilecoord, metadata=metatile.metadata, metatile=metatile)
+
+
+@pytest.mark.asyncio
+async def test_consume_pipeline_store_stage(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings.pipeline, "enabled", True)
+    monkeypatch.setattr(settings.pipeline, "store_tasks", 3)
+    gene = TileGeneration(configure_logging=False, maxconsecutive_errors=False)
+
+    async def tilestream() -> Any:
+        for x in range(0, 10, 2):
+            yield Tile(TileCoord(1, x, 0, 2))
+
+    gene.tilestream = tilestream()
+    processed: list[str] = []
+    stored: list[str] = []
+
+    async def process(tile: Tile) -> Tile | None:
+        processed.append(str(tile.tilecoord))
+        # Dropped
+        if tile.tilecoord.y == 1:
+            return None
+        return tile
+
+    async def render(tile: Tile) -> Tile:
+        return tile
+
+    async def store(tile: Tile) -> Tile:
+        assert processed
+        stored.append(str(tile.tilecoord))
+        return tile
+
+    gene.add_stage("render")
+    gene.imap(render)
+    await gene.add_metatile_splitter(_SplitterStore())
+    gene.imap(process)
+    gene.add_stage("store")
+    gene.imap(store)
+    assert [name for name, _, _ in gene._get_stages()] == ["render", "process", "store"]  # noqa: SLF001
+
+    await gene.consume()
+
+    assert len(processed) == 20
+    assert sorted(stored) == sorted(f"1/{x}/0" for x in range(10))
+
+
+@pytest.mark.asyncio
+async def test_consume_pipeline_release(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings.pipeline, "enabled", True)
+    monkeypatch.setattr(settings.pipeline, "queue_size", 20)
+    gene = TileGeneration(configure_logging=False, maxconsecutive_errors=False)
+    # Not safe, to get the error
+    gene.options = Namespace(debug=True, test=None)
+
+    class _QueueStore(AsyncTileStore):
+        def __init__(self) -> None:
+            self.released: list[Tile] = []
+
+        async def release(self, tiles: list[Tile]) -> None:
+            self.released.extend(tiles)
+
+    queue_store = _QueueStore()
+    gene.queue_store = queue_store
+
+    async def tilestream() -> Any:
+        for x in range(10):
+            yield Tile(TileCoord(1, x, 0))
+
+    gene.tilestream = tilestream()
+    rendered = asyncio.Event()
+
+    async def render(tile: Tile) -> Tile:
+        if tile.tilecoord.x == 0:
+            # Let the other meta tiles wait in the queue
+            await asyncio.sleep(0.01)
+            tile.error = "error"
+            raise TooManyError(tile)
+        rendered.set()
+        return tile
+
+    gene.add_stage("render")
+    gene.imap(render)
+    with patch.object(settings.pipeline, "render_tasks", 1):
+        await gene.consume()
+
+    # The meta tiles read but not processed are put back in the queue
+    assert sorted(tile.tilecoord.x for tile in queue_store.released) == list(range(1, 10))
+    assert not rendered.is_set()
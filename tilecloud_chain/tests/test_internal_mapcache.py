@@ -0,0 +1,214 @@
+# Copyright (c) 2026 by Camptocamp
+"""Test the internal mapcache."""
+
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from tilecloud import Tile, TileCoord
+
+from tilecloud_chain import internal_mapcache
+from tilecloud_chain.settings import settings
+from tilecloud_chain.store import AsyncTilesIterator
+
+
+class _Pipeline:
+    def __init__(self, redis: "_RedisStandIn") -> None:
+        self._redis = redis
+        self._commands: list[tuple[str, bytes, int]] = []
+
+    async def __aenter__(self) -> "_Pipeline":
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        pass
+
+    def set(self, key: str, value: bytes, ex: int) -> "_Pipeline":
+        self._commands.append((key, value, ex))
+        return self
+
+    async def execute(self) -> list[bool]:
+        self._redis.round_trips += 1
+        for key, value, ex in self._commands:
+            self._redis.data[key] = (value, ex)
+        return [True] * len(self._commands)
+
+
+class _RedisStandIn:
+    """The subset of the Redis client used by the store."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, tuple[bytes, int]] = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction: bool) -> _Pipeline:
+        assert not transaction
+        return _Pipeline(self)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        self.round_trips += 1
+        return [self.data[key][0] if key in self.data else None for key in keys]
+
+
+class _CacheStandIn:
+    """The subset of the Redis store used by the generator."""
+
+    def __init__(self) -> None:
+        self.nb_get = 0
+        self.nb_lock = 0
+
+    async def get_one(self, tile: Tile) -> Tile | None:
+        self.nb_get += 1
+        return None
+
+    async def __contains__(self, tile: Tile) -> bool:
+        return False
+
+    def _get_key(self, tile: Tile) -> str:
+        return f"{tile.metadata['layer']}_{tile.tilecoord}"
+
+    @contextlib.asynccontextmanager
+    async def lock(self, tile: Tile) -> AsyncIterator[None]:
+        self.nb_lock += 1
+        yield
+
+
+def _generator(monkeypatch: pytest.MonkeyPatch) -> tuple[internal_mapcache.Generator, list[TileCoord]]:
+    """Get a generator on the cache stand-in, and the list of the generated meta tiles."""
+    generator = internal_mapcache.Generator(None)  # type: ignore[arg-type]
+    generator._cache_store = _CacheStandIn()  # type: ignore[assignment] # noqa: SLF001
+    generated: list[TileCoord] = []
+
+    async def compute_tile(meta_tile: Tile, try_: int = 5) -> bool:
+        del try_
+        generated.append(meta_tile.tilecoord)
+        await asyncio.sleep(0.01)
+        meta_tile.metadata["tiles"] = {
+            tilecoord: Tile(tilecoord, data=str(tilecoord).encode(), content_type="image/png")
+            for tilecoord in meta_tile.tilecoord
+        }
+        return True
+
+    monkeypatch.setattr(generator, "compute_tile", compute_tile)
+    monkeypatch.setattr(internal_mapcache, "_GENERATOR", generator)
+    return generator, generated
+
+
+@pytest.mark.asyncio
+async def test_fetch_coalescing(monkeypatch: pytest.MonkeyPatch) -> None:
+    generator, generated = _generator(monkeypatch)
+    cache = generator._cache_store  # noqa: SLF001
+    assert isinstance(cache, _CacheStandIn)
+    server: Any = SimpleNamespace(get_expires_hours=lambda config: 1)
+    layer: Any = {"meta": True, "meta_size": 2}
+
+    responses = await asyncio.gather(
+        *(
+            internal_mapcache.fetch(
+                None,  # type: ignore[arg-type]
+                server,
+                None,  # type: ignore[arg-type]
+                layer,
+                Tile(tilecoord, metadata={"layer": "a"}),
+            )
+            for tilecoord in TileCoord(1, 0, 0, 2)
+        ),
+    )
+    # Only one generation and one Redis lock for the meta tile
+    assert generated == [TileCoord(1, 0, 0, 2)]
+    assert cache.nb_lock == 1
+    assert [response.body for response in responses] == [
+        str(tilecoord).encode() for tilecoord in TileCoord(1, 0, 0, 2)
+    ]
+    assert sorted(response.headers["Tile-Backend"] for response in responses) == [
+        "wms-generate",
+        "wms-wait",
+        "wms-wait",
+        "wms-wait",
+    ]
+    assert generator.in_flight == {}
+
+
+@pytest.mark.asyncio
+async def test_redis_store_batches() -> None:
+    store = internal_mapcache.RedisStore({"url": "redis://localhost:6379", "expiration": 60})
+    redis = _RedisStandIn()
+    store._master = redis  # type: ignore[assignment] # noqa: SLF001
+    store._slave = redis  # type: ignore[assignment] # noqa: SLF001
+    metadata = {"config_file": "config.yaml", "layer": "a", "grid": "g"}
+
+    tiles = [
+        Tile(tilecoord, data=b"data", content_type="image/png", metadata=metadata)
+        for tilecoord in TileCoord(2, 0, 0, 4)
+    ]
+    assert [tile async for tile in store.put(AsyncTilesIterator(tiles)())] == tiles
+    assert redis.round_trips == 1
+    assert {ex for _, ex in redis.data.values()} == {60}
+
+    redis.round_trips = 0
+    tiles = [Tile(tilecoord, metadata=metadata) for tilecoord in TileCoord(2, 3, 3, 2)]
+    results = [tile async for tile in store.get(AsyncTilesIterator(tiles)())]
+    assert redis.round_trips == 1
+    assert [tile.data if tile is not None else None for tile in results] == [b"data", None, None, None]
+    assert results[0].content_type == "image/png"
+
+    # The concurrent get_one are grouped in one MGET
+    redis.round_trips = 0
+    results = await asyncio.gather(*(store.get_one(tile) for tile in tiles), store.get_one(tiles[0]))
+    assert redis.round_trips == 1
+    assert [tile.data if tile is not None else None for tile in results] == [
+        b"data",
+        None,
+        None,
+        None,
+        b"data",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_prefetch(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings.server, "prefetch", True)
+    monkeypatch.setattr(settings.server, "prefetch_budget", 3)
+    generator, generated = _generator(monkeypatch)
+    server: Any = SimpleNamespace(get_expires_hours=lambda config: 1, get_max_zoom_seed=lambda *args: -1)
+    config: Any = SimpleNamespace(
+        config={"grids": {"g": {"bbox": [0, 0, 2048, 2048], "resolutions": [4, 2, 1], "tile_size": 256}}},
+    )
+    layer: Any = {"meta": True, "meta_size": 2}
+
+    await internal_mapcache.fetch(
+        config,
+        server,
+        None,  # type: ignore[arg-type]
+        layer,
+        Tile(TileCoord(1, 2, 0), metadata={"layer": "a", "grid": "g"}),
+    )
+    # The neighbors, the parent and the children in the grid
+    assert internal_mapcache.Prefetcher._meta_tilecoords(  # noqa: SLF001
+        config,
+        server,
+        TileCoord(1, 2, 0, 2),
+        2,
+        "a",
+        "g",
+    ) == [
+        TileCoord(1, 0, 0, 2),
+        TileCoord(1, 0, 2, 2),
+        TileCoord(1, 2, 2, 2),
+        TileCoord(0, 0, 0, 2),
+        TileCoord(2, 4, 0, 2),
+        TileCoord(2, 6, 0, 2),
+        TileCoord(2, 4, 2, 2),
+        TileCoord(2, 6, 2, 2),
+    ]
+    await asyncio.gather(*generator.prefetcher._tasks)  # noqa: SLF001
+    # Limited by the budget
+    assert generated == [
+        TileCoord(1, 2, 0, 2),
+        TileCoord(1, 0, 0, 2),
+        TileCoord(1, 0, 2, 2),
+        TileCoord(1, 2, 2, 2),
+    ]
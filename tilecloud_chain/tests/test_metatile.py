@@ -0,0 +1,171 @@
+# Copyright (c) 2026 by Camptocamp
+"""Tests for the meta tile splitters."""
+
+import hashlib
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from tilecloud import Tile, TileCoord
+from tilecloud.store.metatile import MetaTileSplitterTileStore
+
+from tilecloud_chain import HashDropper
+from tilecloud_chain.store import metatile
+from tilecloud_chain.store.metatile import (
+    AsyncMetaTileSplitterTileStore,
+    split_metatile,
+    split_metatile_numpy,
+)
+
+
+def _metatile_data(mode: str = "RGBA", nb_tiles: int = 2, border: int = 10) -> bytes:
+    size = nb_tiles * 256 + 2 * border
+    image = Image.new("RGBA", (size, size))
+    # Only the first tile is not uniform
+    for x in range(256 + border):
+        for y in range(0, 256 + border, 7):
+            image.putpixel((x, y), (x % 256, y % 256, 128, 255))
+    bytes_io = BytesIO()
+    image.convert(mode).save(bytes_io, "PNG")
+    return bytes_io.getvalue()
+
+
+async def _metatiles(*metatiles: Tile):
+    for metatile in metatiles:
+        yield metatile
+
+
+@pytest.mark.asyncio
+async def test_split_as_tilecloud() -> None:
+    data = _metatile_data()
+    expected = list(
+        MetaTileSplitterTileStore("image/png", 256, 10).get(
+            [Tile(TileCoord(3, 2, 4, 2), data=data, metadata={"layer": "test"})],
+        ),
+    )
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        store = AsyncMetaTileSplitterTileStore(executor, "image/png", 256, 10)
+        tiles = [
+            tile
+            async for tile in store.get(
+                _metatiles(Tile(TileCoord(3, 2, 4, 2), data=data, metadata={"layer": "test"})),
+            )
+        ]
+
+    assert [tile.tilecoord for tile in tiles] == [tile.tilecoord for tile in expected]
+    assert [tile.data for tile in tiles] == [tile.data for tile in expected]
+    assert all(tile.content_type == "image/png" for tile in tiles)
+    assert all(tile.metadata == {"layer": "test"} for tile in tiles)
+    assert all(tile.metatile.tilecoord == TileCoord(3, 2, 4, 2) for tile in tiles)
+
+
+@pytest.mark.asyncio
+async def test_split_error() -> None:
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        store = AsyncMetaTileSplitterTileStore(executor, "image/png")
+        tiles = [
+            tile
+            async for tile in store.get(
+                _metatiles(Tile(TileCoord(3, 2, 4, 2), data=b"", error="WMS error")),
+            )
+        ]
+
+    assert len(tiles) == 4
+    assert all(tile.error == "WMS error" and tile.data is None for tile in tiles)
+
+
+@pytest.mark.asyncio
+async def test_split_no_data() -> None:
+    store = AsyncMetaTileSplitterTileStore(None, "image/png")
+    meta_tile = Tile(TileCoord(3, 2, 4, 2))
+    tiles = [tile async for tile in store.get(_metatiles(meta_tile))]
+
+    # The error is reported on the tiles, with the meta tile to be able to acknowledge it
+    assert len(tiles) == 4
+    assert all(tile.error == "Metatile data is None" and tile.metatile is meta_tile for tile in tiles)
+
+
+@pytest.mark.parametrize("mode", ["RGBA", "RGB", "LA", "L", "P"])
+def test_split_numpy_as_pil(mode: str) -> None:
+    data = _metatile_data(mode)
+    offsets = [(0, 0), (1, 0), (0, 1), (1, 1)]
+
+    expected = split_metatile(data, "image/png", 256, 10, {}, offsets)
+    result = split_metatile_numpy(data, "image/png", 256, 10, {}, offsets)
+
+    assert [tile_data for tile_data, _ in result] == [tile_data for tile_data, _ in expected]
+    if mode != "P":
+        # The uniform tiles are encoded once
+        assert result[1] is result[2]
+
+
+def test_split_numpy_not_installed(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(metatile, "np", None)
+    data = _metatile_data()
+    offsets = [(0, 0), (1, 0), (0, 1), (1, 1)]
+
+    assert split_metatile_numpy(data, "image/png", 256, 10, {}, offsets) == split_metatile(
+        data,
+        "image/png",
+        256,
+        10,
+        {},
+        offsets,
+    )
+
+
+def test_split_numpy_empty_tiles() -> None:
+    data = _metatile_data()
+    offsets = [(0, 0), (1, 0), (0, 1), (1, 1)]
+    empty_data = split_metatile(data, "image/png", 256, 10, {}, [(1, 1)])[0][0]
+
+    result = split_metatile_numpy(
+        data,
+        "image/png",
+        256,
+        10,
+        {},
+        offsets,
+        (len(empty_data), hashlib.sha1(empty_data).digest()),  # noqa: S324
+    )
+    assert [empty for _, empty in result] == [None, True, True, True]
+
+    result = split_metatile_numpy(data, "image/png", 256, 10, {}, offsets, (len(empty_data), bytes(20)))
+    assert [empty for _, empty in result] == [None, False, False, False]
+
+
+@pytest.mark.asyncio
+async def test_hash_dropper_empty_tile() -> None:
+    hash_dropper = HashDropper(4, "0" * 40)
+
+    tile = Tile(TileCoord(0, 0, 0), data=b"data", metadata={})
+    tile.empty = True
+    assert await hash_dropper(tile) is None
+
+    tile = Tile(TileCoord(0, 0, 0), data=b"data", metadata={})
+    tile.empty = False
+    assert await hash_dropper(tile) is tile
+
+    # Unknown, the hash is used
+    tile = Tile(TileCoord(0, 0, 0), data=b"data", metadata={})
+    assert await hash_dropper(tile) is tile
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("split", [split_metatile, split_metatile_numpy], ids=["pil", "numpy"])
+def test_split_benchmark(split, record_property: Callable[[str, object], None]) -> None:
+    """Compare the number of tiles per second of the meta tile splitters."""
+    nb_tiles = 8
+    data = _metatile_data(nb_tiles=nb_tiles, border=128)
+    offsets = [(x, y) for y in range(nb_tiles) for x in range(nb_tiles)]
+    nb_metatiles = 5
+
+    start = time.perf_counter()
+    for _ in range(nb_metatiles):
+        assert len(split(data, "image/png", 256, 128, {}, offsets)) == nb_tiles * nb_tiles
+    duration = time.perf_counter() - start
+    record_property("tiles_per_second", round(nb_metatiles * nb_tiles * nb_tiles / duration))
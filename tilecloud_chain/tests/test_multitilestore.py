@@ -0,0 +1,226 @@
+# Copyright (c) 2026 by Camptocamp
+"""Test the multi tile store."""
+
+import asyncio
+import os
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import anyio
+import pytest
+from tilecloud import Tile, TileCoord
+
+from tilecloud_chain import _BulkStoreCall
+from tilecloud_chain.multitilestore import MultiTileStore
+from tilecloud_chain.settings import settings
+from tilecloud_chain.store import AsyncTileStore
+from tilecloud_chain.timedtilestore import TimedTileStoreWrapper
+
+
+class _LayerStore(AsyncTileStore):
+    def __init__(self, layer: str) -> None:
+        self.layer = layer
+        self.nb_get = 0
+        self.nb_put = 0
+        self.nb_head = 0
+        self.nb_tiles = 0
+
+    async def get(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile | None]:
+        self.nb_get += 1
+        async for tile in tiles:
+            assert tile.metadata["layer"] == self.layer
+            self.nb_tiles += 1
+            await asyncio.sleep(0)
+            tile.data = self.layer.encode()
+            yield tile
+
+    async def put(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile]:
+        self.nb_put += 1
+        async for tile in tiles:
+            assert tile.metadata["layer"] == self.layer
+            self.nb_tiles += 1
+            await asyncio.sleep(0)
+            yield tile
+
+    async def head_one(self, tile: Tile) -> Tile | None:
+        self.nb_head += 1
+        tile.etag = self.layer
+        return tile
+
+
+async def _tiles(config_file: Path) -> AsyncIterator[Tile]:
+    for tilecoord in TileCoord(2, 0, 0, 3):
+        for layer in ("a", "b"):
+            yield Tile(tilecoord, metadata={"config_file": str(config_file), "layer": layer, "grid": "g"})
+
+
+@pytest.mark.asyncio
+async def test_get_grouped(tmp_path: Path) -> None:
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("")
+    stores: dict[str, _LayerStore] = {}
+
+    async def get_store(config_file: anyio.Path, layer: str, grid: str | None) -> AsyncTileStore:
+        del config_file, grid
+        stores[layer] = _LayerStore(layer)
+        return stores[layer]
+
+    multi_store = MultiTileStore(get_store, concurrency=2)
+    tiles = [tile async for tile in multi_store.get(_tiles(config_file))]
+    assert len(tiles) == 18
+    assert all(tile is not None and tile.data == tile.metadata["layer"].encode() for tile in tiles)
+    # One stream by store
+    assert [(store.nb_get, store.nb_tiles) for store in stores.values()] == [(1, 9), (1, 9)]
+
+
+@pytest.mark.asyncio
+async def test_get_error(tmp_path: Path) -> None:
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("")
+
+    class _ErrorStore(AsyncTileStore):
+        async def get(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile | None]:
+            async for _ in tiles:
+                raise ValueError("error")
+            yield None  # pylint: disable=unreachable
+
+    async def get_store(config_file: anyio.Path, layer: str, grid: str | None) -> AsyncTileStore:
+        del config_file, layer, grid
+        return _ErrorStore()
+
+    with pytest.raises(ValueError, match="error"):
+        async for _ in MultiTileStore(get_store).get(_tiles(config_file)):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_config_check_interval(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("")
+    nb_stores = 0
+
+    async def get_store(config_file: anyio.Path, layer: str, grid: str | None) -> AsyncTileStore:
+        nonlocal nb_stores
+        del config_file, grid
+        nb_stores += 1
+        return _LayerStore(layer)
+
+    multi_store = MultiTileStore(get_store)
+    store = await multi_store._get_store(anyio.Path(config_file), "a", "g")  # noqa: SLF001
+
+    # Not checked before the interval
+    monkeypatch.setattr(settings, "config_check_interval", 3600)
+    config_file.write_text("changed")
+    stat = config_file.stat()
+    os.utime(config_file, (stat.st_atime, stat.st_mtime + 10))
+    assert await multi_store._get_store(anyio.Path(config_file), "a", "g") is store  # noqa: SLF001
+
+    # Checked after the interval
+    monkeypatch.setattr(settings, "config_check_interval", 0)
+    assert await multi_store._get_store(anyio.Path(config_file), "a", "g") is not store  # noqa: SLF001
+    assert nb_stores == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_config(tmp_path: Path) -> None:
+    async def get_store(config_file: anyio.Path, layer: str, grid: str | None) -> AsyncTileStore:
+        del config_file, grid
+        return _LayerStore(layer)
+
+    multi_store = MultiTileStore(get_store)
+    with pytest.raises(FileNotFoundError, match="Missing config file"):
+        await multi_store._get_store(anyio.Path(tmp_path / "missing.yaml"), "a", "g")  # noqa: SLF001
+
+
+@pytest.mark.asyncio
+async def test_put_grouped(tmp_path: Path) -> None:
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("")
+    stores: dict[str, _LayerStore] = {}
+
+    async def get_store(config_file: anyio.Path, layer: str, grid: str | None) -> AsyncTileStore:
+        del config_file, grid
+        stores[layer] = _LayerStore(layer)
+        return stores[layer]
+
+    store = TimedTileStoreWrapper(MultiTileStore(get_store, concurrency=2), store_name="store")
+    tiles = [tile async for tile in store.put(_tiles(config_file))]
+    assert len(tiles) == 18
+    # One stream by store
+    assert [(store.nb_put, store.nb_tiles) for store in stores.values()] == [(1, 9), (1, 9)]
+
+    tile = Tile(TileCoord(0, 0, 0), metadata={"config_file": str(config_file), "layer": "a", "grid": "g"})
+    assert await store.head_one(tile) is tile
+    assert tile.etag == "a"
+    assert stores["a"].nb_head == 1
+    assert stores["a"].nb_get == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_store_call(tmp_path: Path) -> None:
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("")
+    store = _LayerStore("a")
+    bulk_put = _BulkStoreCall(store.put)
+    tiles = [
+        Tile(tilecoord, metadata={"config_file": str(config_file), "layer": "a", "grid": "g"})
+        for tilecoord in TileCoord(2, 0, 0, 3)
+    ]
+
+    # The concurrent calls are grouped in one bulk put
+    results = await asyncio.gather(*[bulk_put(tile) for tile in tiles])
+    assert all(result is tile for result, tile in zip(results, tiles, strict=True))
+    assert (store.nb_put, store.nb_tiles) == (1, 9)
+
+    # The tiles that aren't returned by the bulk get are missing
+    class _MissingStore(AsyncTileStore):
+        async def get(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile | None]:
+            async for tile in tiles:
+                yield tile if tile.tilecoord.x == 0 else None
+
+    bulk_get = _BulkStoreCall(_MissingStore().get)
+    results = await asyncio.gather(*[bulk_get(tile) for tile in tiles])
+    assert [result is not None for result in results] == [tile.tilecoord.x == 0 for tile in tiles]
+
+    # The error is raised on all the grouped calls
+    class _ErrorStore(AsyncTileStore):
+        async def put(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile]:
+            async for _ in tiles:
+                raise ValueError("error")
+            yield None  # pylint: disable=unreachable
+
+    bulk_put = _BulkStoreCall(_ErrorStore().put)
+    results = await asyncio.gather(*[bulk_put(tile) for tile in tiles], return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_default_bulk_get_put() -> None:
+    class _OneStore(AsyncTileStore):
+        def __init__(self) -> None:
+            self.running = 0
+            self.max_running = 0
+
+        async def _one(self, tile: Tile) -> Tile:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            await asyncio.sleep(0.01)
+            self.running -= 1
+            return tile
+
+        async def get_one(self, tile: Tile) -> Tile | None:
+            return await self._one(tile)
+
+        async def put_one(self, tile: Tile) -> Tile:
+            return await self._one(tile)
+
+    async def tiles() -> AsyncIterator[Tile]:
+        for tilecoord in TileCoord(3, 0, 0, 8):
+            yield Tile(tilecoord)
+
+    store = _OneStore()
+    assert len([tile async for tile in store.get(tiles())]) == 64
+    assert store.max_running == settings.multi_store_concurrency
+    store = _OneStore()
+    assert len([tile async for tile in store.put(tiles())]) == 64
+    assert store.max_running == settings.multi_store_concurrency
@@ -1,18 +1,22 @@
 # Copyright (c) 2026 by Camptocamp
+import asyncio
 import os
+import time
+from collections.abc import Callable
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
 
 import pytest
 import pytest_asyncio
 from anyio import Path as AnyioPath
-from sqlalchemy import and_
-from sqlalchemy.engine import create_engine
+from sqlalchemy import and_, text
+from sqlalchemy.engine import create_engine, make_url
 from sqlalchemy.orm import sessionmaker
 from tilecloud import Tile, TileCoord
 
 from tilecloud_chain import DatedConfig, TileGeneration, controller
 from tilecloud_chain.settings import settings
+from tilecloud_chain.store import postgresql
 from tilecloud_chain.store.postgresql import (
     _STATUS_CANCELLED,
     _STATUS_CREATED,
@@ -21,6 +25,7 @@ from tilecloud_chain.store.postgresql import (
     _STATUS_PENDING,
     _STATUS_STARTED,
     Job,
+    JobProgress,
     PostgresqlTileStore,
     Queue,
     _format_duration,
@@ -117,6 +122,31 @@ async def test_retry(queue: tuple[int, int, int], SessionMaker: sessionmaker, ti
         assert metatiles[0].status == _STATUS_CREATED
 
 
+@pytest.mark.asyncio
+async def test_release(
+    queue: tuple[int, int, int],
+    SessionMaker: sessionmaker,
+    tilestore: PostgresqlTileStore,
+) -> None:
+    job_id, metatile_0_id, metatile_1_id = queue
+
+    tile = await anext(tilestore.list())
+    assert tile.postgresql_id == metatile_0_id
+    with SessionMaker() as session:
+        assert session.query(Queue).filter(Queue.id == metatile_0_id).one().status == _STATUS_PENDING
+
+    # Not processed, put back in the queue
+    await tilestore.release([tile])
+
+    with SessionMaker() as session:
+        metatiles = {
+            metatile.id: metatile for metatile in session.query(Queue).filter(Queue.job_id == job_id).all()
+        }
+        assert metatiles[metatile_0_id].status == _STATUS_CREATED
+        assert metatiles[metatile_0_id].started_at is None
+        assert metatiles[metatile_1_id].status == _STATUS_CREATED
+
+
 @pytest.mark.asyncio
 async def test_tiles_started_at_set_on_first_tile(
     queue: tuple[int, int, int],
@@ -192,6 +222,43 @@ async def test_get_status_with_eta_when_remaining_exceeds_total(
     assert status[3] is None
 
 
+@pytest.mark.asyncio
+async def test_get_status_from_progress_snapshot(
+    queue: tuple[int, int, int],
+    SessionMaker: sessionmaker,
+    tilestore: PostgresqlTileStore,
+):
+    job_id, metatile_0_id, _metatile_1_id = queue
+    with SessionMaker() as session:
+        job = session.query(Job).filter(Job.id == job_id).one()
+        job.meta_tiles_total = 10
+        job.tiles_started_at = datetime.now(tz=UTC) - timedelta(seconds=100)
+        session.commit()
+
+    await tilestore._maintenance()
+    with SessionMaker() as session:
+        progress = session.query(JobProgress).filter(JobProgress.job_id == job_id).one()
+        assert progress.status == [{"zoom": 0, "generate": 1}, {"zoom": 1, "generate": 1}]
+        assert progress.eta_seconds is not None
+        session.query(Queue).filter(Queue.id == metatile_0_id).delete()
+        session.commit()
+
+    # The fresh snapshot is used
+    statuses = await tilestore.get_status(Path("config.yaml"))
+    status = next(status for status in statuses if status[0].id == job_id)
+    assert status[1] == [{"zoom": 0, "generate": 1}, {"zoom": 1, "generate": 1}]
+    assert status[3] is not None
+
+    # The outdated snapshot is ignored
+    with SessionMaker() as session:
+        progress = session.query(JobProgress).filter(JobProgress.job_id == job_id).one()
+        progress.updated_at = datetime.now(tz=UTC) - timedelta(hours=1)
+        session.commit()
+    statuses = await tilestore.get_status(Path("config.yaml"))
+    status = next(status for status in statuses if status[0].id == job_id)
+    assert status[1] == [{"zoom": 1, "generate": 1}]
+
+
 def test_format_duration_days_hours_text() -> None:
     assert _format_duration(2 * 86400 + 2 * 3600) == "2 days 2 hours"
 
@@ -412,3 +479,444 @@ async def test_list_picks_next_job_when_first_job_has_only_pending_metatiles(
         session.query(Queue).filter(Queue.job_id.in_([job1_id, job2_id])).delete()
         session.query(Job).filter(Job.id.in_([job1_id, job2_id])).delete()
         session.commit()
+
+
+@pytest.mark.asyncio
+async def test_list_claim_batch(
+    queue: tuple[int, int, int],
+    SessionMaker: sessionmaker,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    job_id, metatile_0_id, metatile_1_id = queue
+    monkeypatch.setattr(settings.postgresql, "queue_claim_batch_size", 2)
+    tilestore = await get_postgresql_queue_store(DatedConfig({}, 0, "config.yaml"))
+
+    tile = await anext(tilestore.list())
+    assert tile.postgresql_id == metatile_0_id
+
+    with SessionMaker() as session:
+        metatiles = session.query(Queue).filter(Queue.job_id == job_id).all()
+        assert {metatile.status for metatile in metatiles} == {_STATUS_PENDING}
+
+    await tilestore.delete_one(tile)
+    await tilestore.close()
+
+    with SessionMaker() as session:
+        metatile_1 = session.query(Queue).filter(Queue.id == metatile_1_id).one()
+        assert metatile_1.status == _STATUS_CREATED
+        assert metatile_1.started_at is None
+
+
+@pytest.mark.asyncio
+async def test_list_wakeup_on_notify(SessionMaker: sessionmaker, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings.postgresql, "queue_poll_interval", 600)
+    with SessionMaker() as session:
+        for job in session.query(Job).filter(Job.name == "test-notify").all():
+            session.delete(job)
+        session.commit()
+    tilestore = await get_postgresql_queue_store(DatedConfig({}, 0, "config.yaml"))
+    producer = await get_postgresql_queue_store(DatedConfig({}, 0, "config.yaml"))
+    job_id = None
+    try:
+        next_tile = asyncio.create_task(anext(tilestore.list()))
+        await asyncio.sleep(1)
+        assert not next_tile.done()
+
+        job_id = await producer.create_job(
+            "test-notify",
+            "generate-tiles",
+            Path("config.yaml"),
+            initial_status=_STATUS_PENDING,
+        )
+        await producer.put_one(Tile(TileCoord(0, 0, 0), metadata={"job_id": job_id}))
+        await producer.close()
+        await producer.start_job(job_id)
+
+        tile = await asyncio.wait_for(next_tile, timeout=30)
+        assert tile.metadata["job_id"] == job_id
+    finally:
+        await tilestore.close()
+        if job_id is not None:
+            with SessionMaker() as session:
+                session.query(Queue).filter(Queue.job_id == job_id).delete()
+                session.query(Job).filter(Job.id == job_id).delete()
+                session.commit()
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+@pytest.mark.parametrize("copy_threshold", [1, 1000000], ids=["copy", "insert"])
+async def test_put_benchmark(
+    copy_threshold: int,
+    SessionMaker: sessionmaker,
+    monkeypatch: pytest.MonkeyPatch,
+    record_property: Callable[[str, object], None],
+) -> None:
+    """Compare the number of rows per second inserted with COPY and with INSERT."""
+    nb_rows = 20000
+    monkeypatch.setattr(settings.postgresql, "queue_insert_batch_size", nb_rows)
+    monkeypatch.setattr(settings.postgresql, "queue_copy_threshold", copy_threshold)
+    tilestore = await get_postgresql_queue_store(DatedConfig({}, 0, "config.yaml"))
+    job_id = await tilestore.create_job("test-benchmark", "generate-tiles", Path("config.yaml"))
+    try:
+        start = time.perf_counter()
+        for index in range(nb_rows):
+            await tilestore.put_one(
+                Tile(TileCoord(18, index, 0, 8), metadata={"job_id": job_id, "layer": "point"}),
+            )
+        duration = time.perf_counter() - start
+        record_property("rows_per_second", round(nb_rows / duration))
+
+        with SessionMaker() as session:
+            assert session.query(Queue).filter(Queue.job_id == job_id).count() == nb_rows
+            metatile = session.query(Queue).filter(Queue.job_id == job_id).order_by(Queue.id).first()
+            assert metatile.status == _STATUS_CREATED
+            assert (metatile.zoom, metatile.y, metatile.n) == (18, 0, 8)
+            assert metatile.meta_tile == {"metadata": {"job_id": job_id, "layer": "point"}}
+    finally:
+        await tilestore.close()
+        with SessionMaker() as session:
+            session.query(Queue).filter(Queue.job_id == job_id).delete()
+            session.query(Job).filter(Job.id == job_id).delete()
+            session.commit()
+
+
+async def _copy_tilestore(driver: str, monkeypatch: pytest.MonkeyPatch) -> PostgresqlTileStore:
+    """Get a queue store that inserts the batches of 3 meta tiles with a COPY, with the driver."""
+    url = make_url(os.environ["TILECLOUD_CHAIN__POSTGRESQL__SQLALCHEMY_URL"]).set(
+        drivername=f"postgresql+{driver}",
+    )
+    monkeypatch.setattr(settings.postgresql, "sqlalchemy_url", url.render_as_string(hide_password=False))
+    monkeypatch.setattr(settings.postgresql, "queue_insert_batch_size", 3)
+    monkeypatch.setattr(settings.postgresql, "queue_copy_threshold", 3)
+    return await get_postgresql_queue_store(DatedConfig({}, 0, "config.yaml"))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("driver", ["asyncpg", "psycopg"])
+async def test_put_copy(driver: str, SessionMaker: sessionmaker, monkeypatch: pytest.MonkeyPatch) -> None:
+    tilestore = await _copy_tilestore(driver, monkeypatch)
+    job_id = await tilestore.create_job("test-copy", "generate-tiles", Path("config.yaml"))
+    try:
+        for x in range(3):
+            await tilestore.put_one(
+                Tile(TileCoord(5, x * 2, 4, 2), metadata={"job_id": job_id, "layer": "point"}),
+            )
+
+        with SessionMaker() as session:
+            metatiles = session.query(Queue).filter(Queue.job_id == job_id).order_by(Queue.x).all()
+            assert [
+                (metatile.zoom, metatile.x, metatile.y, metatile.n, metatile.status) for metatile in metatiles
+            ] == [
+                (5, 0, 4, 2, _STATUS_CREATED),
+                (5, 2, 4, 2, _STATUS_CREATED),
+                (5, 4, 4, 2, _STATUS_CREATED),
+            ]
+            assert all(
+                metatile.meta_tile == {"metadata": {"job_id": job_id, "layer": "point"}}
+                for metatile in metatiles
+            )
+    finally:
+        await tilestore.close()
+        with SessionMaker() as session:
+            session.query(Queue).filter(Queue.job_id == job_id).delete()
+            session.query(Job).filter(Job.id == job_id).delete()
+            session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("driver", ["asyncpg", "psycopg"])
+async def test_put_copy_rollback(
+    driver: str,
+    SessionMaker: sessionmaker,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    tilestore = await _copy_tilestore(driver, monkeypatch)
+    job_id = await tilestore.create_job("test-copy-rollback", "generate-tiles", Path("config.yaml"))
+
+    async def notify(session: object) -> None:
+        del session
+        raise RuntimeError("notify error")
+
+    try:
+        with monkeypatch.context() as notify_monkeypatch:
+            notify_monkeypatch.setattr(postgresql, "_notify", notify)
+            await tilestore.put_one(Tile(TileCoord(5, 0, 0, 2), metadata={"job_id": job_id}))
+            await tilestore.put_one(Tile(TileCoord(5, 2, 0, 2), metadata={"job_id": job_id}))
+            with pytest.raises(RuntimeError, match="notify error"):
+                await tilestore.put_one(Tile(TileCoord(5, 4, 0, 2), metadata={"job_id": job_id}))
+
+        # The copied rows are rolled back with the failed flush
+        with SessionMaker() as session:
+            assert session.query(Queue).filter(Queue.job_id == job_id).count() == 0
+
+        # The rows are kept in the buffer, and inserted only once by the next flush
+        await tilestore.close()
+        with SessionMaker() as session:
+            assert session.query(Queue).filter(Queue.job_id == job_id).count() == 3
+    finally:
+        await tilestore.close()
+        with SessionMaker() as session:
+            session.query(Queue).filter(Queue.job_id == job_id).delete()
+            session.query(Job).filter(Job.id == job_id).delete()
+            session.commit()
+
+
+@pytest.mark.asyncio
+async def test_delete_one_batch(
+    queue: tuple[int, int, int],
+    SessionMaker: sessionmaker,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    job_id, metatile_0_id, metatile_1_id = queue
+    monkeypatch.setattr(settings.postgresql, "queue_ack_batch_size", 2)
+    monkeypatch.setattr(settings.postgresql, "queue_ack_interval", 600)
+    tilestore = await get_postgresql_queue_store(DatedConfig({}, 0, "config.yaml"))
+
+    tile_1 = await anext(tilestore.list())
+    tile_2 = await anext(tilestore.list())
+    tile_2.error = "test error"
+
+    await tilestore.delete_one(tile_1)
+    with SessionMaker() as session:
+        assert session.query(Queue).filter(Queue.job_id == job_id).count() == 2
+
+    await tilestore.delete_one(tile_2)
+    with SessionMaker() as session:
+        metatiles = session.query(Queue).filter(Queue.job_id == job_id).all()
+        assert len(metatiles) == 1
+        assert metatiles[0].id == metatile_1_id
+        assert metatiles[0].status == _STATUS_ERROR
+        assert metatiles[0].error == "test error"
+    await tilestore.close()
+
+
+@pytest.mark.asyncio
+async def test_list_legacy_json_meta_tile(
+    queue: tuple[int, int, int],
+    SessionMaker: sessionmaker,
+    tilestore: PostgresqlTileStore,
+) -> None:
+    job_id, metatile_0_id, metatile_1_id = queue
+    with SessionMaker() as session:
+        session.query(Queue).filter(Queue.id.in_([metatile_0_id, metatile_1_id])).delete()
+        session.add(
+            Queue(
+                job_id=job_id,
+                zoom=3,
+                meta_tile={"z": 3, "x": 2, "y": 1, "n": 8, "metadata": {"job_id": job_id}},
+            ),
+        )
+        session.commit()
+
+    tile = await anext(tilestore.list())
+    assert tile.tilecoord == TileCoord(3, 2, 1, 8)
+    assert tile.metadata == {"job_id": job_id}
+    await tilestore.close()
+
+
+@pytest.mark.asyncio
+async def test_init_create_missing_index(SessionMaker: sessionmaker) -> None:
+    with SessionMaker() as session:
+        session.execute(
+            text(f'DROP INDEX IF EXISTS "{settings.postgresql.schema_name}".ix_queue_job_id_status'),
+        )
+        session.commit()
+
+    tilestore = await get_postgresql_queue_store(DatedConfig({}, 0, "config.yaml"))
+    await tilestore.close()
+
+    with SessionMaker() as session:
+        index_valid = session.execute(
+            text(
+                "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname = :schema AND c.relname = 'ix_queue_job_id_status'",
+            ).bindparams(schema=settings.postgresql.schema_name),
+        ).scalar()
+    assert index_valid is True
+
+
+def _relkind(session, name: str) -> str | None:
+    return session.execute(
+        text(
+            "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = :schema AND c.relname = :name",
+        ).bindparams(schema=settings.postgresql.schema_name, name=name),
+    ).scalar()
+
+
+@pytest_asyncio.fixture
+async def partitioned_tilestore(
+    SessionMaker: sessionmaker,
+    monkeypatch: pytest.MonkeyPatch,
+) -> PostgresqlTileStore:
+    monkeypatch.setattr(settings.postgresql, "queue_partitioned", True)
+    with SessionMaker() as session:
+        session.query(Queue).delete()
+        session.query(Job).filter(Job.name == "test-partition").delete()
+        session.commit()
+    tilestore = await get_postgresql_queue_store(DatedConfig({}, 0, "config.yaml"))
+    yield tilestore
+    await tilestore.close()
+    # Back to the not partitioned queue table
+    with SessionMaker() as session:
+        session.query(Job).filter(Job.name == "test-partition").delete()
+        session.commit()
+        Queue.__table__.drop(session.connection())
+        Queue.__table__.create(session.connection())
+        session.commit()
+
+
+@pytest.mark.asyncio
+async def test_partitioned_init(
+    partitioned_tilestore: PostgresqlTileStore,
+    SessionMaker: sessionmaker,
+) -> None:
+    assert partitioned_tilestore._partitioned
+    with SessionMaker() as session:
+        assert _relkind(session, "queue") == "p"
+        # Not compatible with the concurrent detach
+        assert _relkind(session, "queue_default") is None
+
+
+@pytest.mark.asyncio
+async def test_partitioned_put_and_done(
+    partitioned_tilestore: PostgresqlTileStore,
+    SessionMaker: sessionmaker,
+) -> None:
+    job_id = await partitioned_tilestore.create_job("test-partition", "generate-tiles", Path("config.yaml"))
+    with SessionMaker() as session:
+        assert _relkind(session, f"queue_{job_id}") == "r"
+        session.query(Job).filter(Job.id == job_id).update({"status": _STATUS_STARTED})
+        session.commit()
+
+    await partitioned_tilestore.put_one(Tile(TileCoord(0, 0, 0), metadata={"job_id": job_id}))
+    await partitioned_tilestore._flush_put_buffer()
+    with SessionMaker() as session:
+        partition = f'"{settings.postgresql.schema_name}".queue_{job_id}'
+        assert session.execute(text(f"SELECT count(*) FROM {partition}")).scalar() == 1
+
+    tile = await anext(partitioned_tilestore.list())
+    await partitioned_tilestore.delete_one(tile)
+    await partitioned_tilestore._maintenance()
+
+    with SessionMaker() as session:
+        assert session.query(Job).filter(Job.id == job_id).one().status == _STATUS_DONE
+        assert _relkind(session, f"queue_{job_id}") is None
+
+
+@pytest.mark.asyncio
+async def test_partitioned_concurrent_create(
+    partitioned_tilestore: PostgresqlTileStore,
+    SessionMaker: sessionmaker,
+) -> None:
+    job_id = await partitioned_tilestore.create_job("test-partition", "generate-tiles", Path("config.yaml"))
+    schema = settings.postgresql.schema_name
+    with SessionMaker() as session:
+        session.query(Job).filter(Job.id == job_id).update({"status": _STATUS_STARTED})
+        session.execute(text(f'DROP TABLE "{schema}".queue_{job_id}'))
+        session.commit()
+    partitioned_tilestore._partitions.discard(job_id)
+    await partitioned_tilestore.put_one(Tile(TileCoord(0, 0, 0), metadata={"job_id": job_id}))
+
+    # The partition is created by another worker, committed during the flush
+    with SessionMaker() as session:
+        session.execute(
+            text(
+                f'CREATE TABLE "{schema}".queue_{job_id} PARTITION OF "{schema}".queue '
+                f"FOR VALUES IN ({job_id})",
+            ),
+        )
+        flush = asyncio.create_task(partitioned_tilestore._flush_put_buffer())
+        await asyncio.sleep(0.5)
+        assert not flush.done()
+        # Not in the cache before the commit
+        assert job_id not in partitioned_tilestore._partitions
+        session.commit()
+    await flush
+
+    assert job_id in partitioned_tilestore._partitions
+    with SessionMaker() as session:
+        assert session.execute(text(f'SELECT count(*) FROM "{schema}".queue_{job_id}')).scalar() == 1
+
+
+@pytest.mark.asyncio
+async def test_partitioned_cancel(
+    partitioned_tilestore: PostgresqlTileStore,
+    SessionMaker: sessionmaker,
+) -> None:
+    job_id = await partitioned_tilestore.create_job("test-partition", "generate-tiles", Path("config.yaml"))
+    with SessionMaker() as session:
+        session.query(Job).filter(Job.id == job_id).update({"status": _STATUS_STARTED})
+        session.commit()
+    for x in range(2):
+        await partitioned_tilestore.put_one(Tile(TileCoord(0, x, 0), metadata={"job_id": job_id}))
+    await partitioned_tilestore._flush_put_buffer()
+
+    # One pending meta tile, dropped with the other ones
+    await anext(partitioned_tilestore.list())
+    await partitioned_tilestore.cancel(job_id, Path("config.yaml"))
+
+    with SessionMaker() as session:
+        assert session.query(Job).filter(Job.id == job_id).one().status == _STATUS_CANCELLED
+        assert _relkind(session, f"queue_{job_id}") is None
+        assert session.query(Queue).filter(Queue.job_id == job_id).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_list_claim_batch_check(
+    queue: tuple[int, int, int],
+    SessionMaker: sessionmaker,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    _job_id, metatile_0_id, metatile_1_id = queue
+    monkeypatch.setattr(settings.postgresql, "queue_claim_batch_size", 2)
+    monkeypatch.setattr(settings.postgresql, "queue_claim_check_interval", 0)
+    tilestore = await get_postgresql_queue_store(DatedConfig({}, 0, "config.yaml"))
+
+    tile = await anext(tilestore.list())
+    assert tile.postgresql_id == metatile_0_id
+
+    # Still claimed, the claim is renewed
+    with SessionMaker() as session:
+        claimed_at = session.query(Queue).filter(Queue.id == metatile_1_id).one().started_at
+    await tilestore._check_claimed("config.yaml")
+    assert [tile.postgresql_id for tile in tilestore._claimed["config.yaml"]] == [metatile_1_id]
+    with SessionMaker() as session:
+        assert session.query(Queue).filter(Queue.id == metatile_1_id).one().started_at > claimed_at
+
+    # Put back in the queue by the pending timeout and claimed by another worker
+    with SessionMaker() as session:
+        metatile_1 = session.query(Queue).filter(Queue.id == metatile_1_id).one()
+        metatile_1.started_at = datetime.now(tz=UTC) + timedelta(minutes=1)
+        session.commit()
+    await tilestore._check_claimed("config.yaml")
+    assert not tilestore._claimed["config.yaml"]
+
+    # Not released on close, claimed by the other worker
+    await tilestore.close()
+    with SessionMaker() as session:
+        assert session.query(Queue).filter(Queue.id == metatile_1_id).one().status == _STATUS_PENDING
+
+
+@pytest.mark.asyncio
+async def test_list_claim_batch_cancelled(
+    queue: tuple[int, int, int],
+    SessionMaker: sessionmaker,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    job_id, metatile_0_id, _ = queue
+    monkeypatch.setattr(settings.postgresql, "queue_claim_batch_size", 2)
+    monkeypatch.setattr(settings.postgresql, "queue_claim_check_interval", 0)
+    tilestore = await get_postgresql_queue_store(DatedConfig({}, 0, "config.yaml"))
+
+    tile = await anext(tilestore.list())
+    assert tile.postgresql_id == metatile_0_id
+
+    with SessionMaker() as session:
+        session.query(Job).filter(Job.id == job_id).update({"status": _STATUS_CANCELLED})
+        session.commit()
+    await tilestore._check_claimed("config.yaml")
+    assert not tilestore._claimed["config.yaml"]
+    await tilestore.close()
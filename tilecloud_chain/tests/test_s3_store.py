@@ -0,0 +1,211 @@
+# Copyright (c) 2026 by Camptocamp
+"""Test the async S3 tile store against an in memory S3 stand-in."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import botocore.exceptions
+import pytest
+from tilecloud import Tile, TileCoord
+from tilecloud.layout.template import TemplateTileLayout
+
+from tilecloud_chain.settings import settings
+from tilecloud_chain.store import s3
+from tilecloud_chain.store.s3 import S3TileStore
+
+
+class _Body:
+    def __init__(self, data: bytes) -> None:
+        self._data = data
+
+    async def __aenter__(self) -> "_Body":
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        pass
+
+    async def read(self) -> bytes:
+        return self._data
+
+
+class _Paginator:
+    def __init__(self, objects: dict[str, dict[str, Any]]) -> None:
+        self._objects = objects
+
+    async def paginate(self, Bucket: str, Prefix: str) -> AsyncIterator[dict[str, Any]]:  # noqa: N803
+        yield {"Contents": [{"Key": key} for key in sorted(self._objects) if key.startswith(Prefix)]}
+
+
+class _S3StandIn:
+    """The subset of the aiobotocore S3 client used by the store."""
+
+    def __init__(self) -> None:
+        self.objects: dict[str, dict[str, Any]] = {}
+        self.requests: list[tuple[str, dict[str, Any]]] = []
+        self.running = 0
+        self.max_running = 0
+
+    async def _request(self, operation: str, **kwargs: Any) -> None:
+        self.requests.append((operation, kwargs))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+
+    def _not_found(self, operation: str) -> botocore.exceptions.ClientError:
+        return botocore.exceptions.ClientError(
+            {"Error": {"Code": "NoSuchKey"}, "ResponseMetadata": {"HTTPStatusCode": 404}},
+            operation,
+        )
+
+    async def put_object(self, Body: bytes, Key: str, **kwargs: Any) -> None:  # noqa: N803
+        await self._request("PutObject", Key=Key)
+        self.objects[Key] = {"Body": Body, "ETag": f'"{len(self.requests):x}"', **kwargs}
+
+    async def get_object(self, Bucket: str, Key: str) -> dict[str, Any]:  # noqa: N803
+        await self._request("GetObject", Key=Key)
+        if Key not in self.objects:
+            raise self._not_found("GetObject")
+        s3_object = self.objects[Key]
+        return {
+            "Body": _Body(s3_object["Body"]),
+            "ContentType": s3_object.get("ContentType"),
+            "ETag": s3_object["ETag"],
+        }
+
+    async def head_object(self, Bucket: str, Key: str) -> dict[str, Any]:  # noqa: N803
+        await self._request("HeadObject", Key=Key)
+        if Key not in self.objects:
+            raise self._not_found("HeadObject")
+        s3_object = self.objects[Key]
+        return {"ContentType": s3_object.get("ContentType"), "ETag": s3_object["ETag"]}
+
+    async def delete_object(self, Bucket: str, Key: str) -> None:  # noqa: N803
+        await self._request("DeleteObject", Key=Key)
+        self.objects.pop(Key, None)
+
+    async def delete_objects(self, Bucket: str, Delete: dict[str, Any]) -> dict[str, Any]:  # noqa: N803
+        await self._request("DeleteObjects", Delete=Delete)
+        errors = []
+        for s3_object in Delete["Objects"]:
+            if s3_object["Key"].startswith("locked/"):
+                errors.append({"Key": s3_object["Key"], "Code": "AccessDenied", "Message": "Access Denied"})
+            else:
+                self.objects.pop(s3_object["Key"], None)
+        return {"Errors": errors}
+
+    def get_paginator(self, operation: str) -> _Paginator:
+        assert operation == "list_objects_v2"
+        return _Paginator(self.objects)
+
+
+async def _tiles(tilecoord: TileCoord, data: bytes | None = None) -> AsyncIterator[Tile]:
+    for sub_tilecoord in tilecoord:
+        yield Tile(sub_tilecoord, data=data, content_type="image/png", metadata={})
+
+
+@pytest.mark.asyncio
+async def test_put_get_delete() -> None:
+    client = _S3StandIn()
+    store = S3TileStore(
+        "bucket",
+        TemplateTileLayout("%(z)d/%(x)d/%(y)d.png"),
+        cache_control="max-age=60",
+        client=client,
+    )
+
+    tiles = [tile async for tile in store.put(_tiles(TileCoord(1, 0, 0, 2), b"data"))]
+    assert [str(tile.tilecoord) for tile in tiles] == ["1/0/0", "1/0/1", "1/1/0", "1/1/1"]
+    assert client.objects["1/0/1.png"]["CacheControl"] == "max-age=60"
+    assert client.objects["1/0/1.png"]["ContentType"] == "image/png"
+    assert await store.__contains__(Tile(TileCoord(1, 1, 1)))
+    assert not await store.__contains__(Tile(TileCoord(1, 2, 2)))
+    assert sorted(str(tile.tilecoord) for tile in [tile async for tile in store.list()]) == [
+        "1/0/0",
+        "1/0/1",
+        "1/1/0",
+        "1/1/1",
+    ]
+
+    tiles = [tile async for tile in store.get(_tiles(TileCoord(1, 1, 1, 2)))]
+    assert [tile.data if tile is not None else None for tile in tiles] == [b"data", None, None, None]
+    assert tiles[0].etag == client.objects["1/1/1.png"]["ETag"]
+
+    # Metadata only
+    tile = await store.head_one(Tile(TileCoord(1, 1, 1), metadata={}))
+    assert tile is not None
+    assert tile.data is None
+    assert tile.etag == client.objects["1/1/1.png"]["ETag"]
+    assert await store.head_one(Tile(TileCoord(1, 2, 2), metadata={})) is None
+
+    tiles = [Tile(tilecoord, metadata={}) for tilecoord in TileCoord(1, 0, 0, 2)]
+    assert await store.delete(tiles) == tiles
+    assert all(tile.error is None for tile in tiles)
+    assert client.objects == {}
+    assert [operation for operation, _ in client.requests].count("DeleteObjects") == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_errors() -> None:
+    client = _S3StandIn()
+    store = S3TileStore("bucket", TemplateTileLayout("locked/%(z)d/%(x)d/%(y)d.png"), client=client)
+
+    tiles = [Tile(tilecoord, metadata={}) for tilecoord in TileCoord(0, 0, 0, 2)]
+    await store.delete(tiles)
+    assert client.requests == [
+        (
+            "DeleteObjects",
+            {
+                "Delete": {
+                    "Objects": [
+                        {"Key": "locked/0/0/0.png"},
+                        {"Key": "locked/0/0/1.png"},
+                        {"Key": "locked/0/1/0.png"},
+                        {"Key": "locked/0/1/1.png"},
+                    ],
+                    "Quiet": True,
+                },
+            },
+        ),
+    ]
+    assert {tile.error for tile in tiles} == {"AccessDenied: Access Denied"}
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings.s3, "max_connections", 3)
+    client = _S3StandIn()
+    store = S3TileStore("bucket", TemplateTileLayout("%(z)d/%(x)d/%(y)d.png"), client=client)
+
+    tiles = [tile async for tile in store.put(_tiles(TileCoord(3, 0, 0, 4), b"data"))]
+    assert len(tiles) == 16
+    assert client.max_running == 3
+
+    # Dry run
+    store.dry_run = True
+    await store.delete([Tile(TileCoord(3, 0, 0), metadata={})])
+    assert len(client.objects) == 16
+
+
+@pytest.mark.asyncio
+async def test_shared_clients_released(monkeypatch: pytest.MonkeyPatch) -> None:
+    closed: list[str] = []
+
+    class _ExitStack:
+        async def aclose(self) -> None:
+            closed.append("host")
+
+    monkeypatch.setattr(s3, "_CLIENTS", {"host": (_ExitStack(), _S3StandIn())})
+    monkeypatch.setattr(s3, "_CLIENTS_USERS", 0)
+
+    s3.acquire_clients()
+    s3.acquire_clients()
+    await s3.release_clients()
+    # Still used by the other user
+    assert closed == []
+    assert "host" in s3._CLIENTS  # noqa: SLF001
+
+    await s3.release_clients()
+    assert closed == ["host"]
+    assert s3._CLIENTS == {}  # noqa: SLF001
@@ -1,4 +1,5 @@
 # Copyright (c) 2026 by Camptocamp
+import asyncio
 import os
 import shutil
 from pathlib import Path
@@ -8,12 +9,15 @@ import pytest
 import yaml
 from anyio import Path as AnyioPath
 from fastapi import HTTPException
+from fastapi.responses import FileResponse
 from testfixtures import LogCapture
 from tilecloud import Tile, TileCoord
 
 from tilecloud_chain import DatedConfig, TileGeneration, generate, server
 from tilecloud_chain.internal_mapcache import RedisStore
+from tilecloud_chain.settings import settings
 from tilecloud_chain.tests import CompareCase
+from tilecloud_chain.tile_cache import TileCache
 
 _CAPABILITIES = (
     r"""<\?xml version="1.0" encoding="UTF-8"\?>
@@ -792,6 +796,51 @@ class TestServe(CompareCase):
 
             log_capture.check()
 
+    @pytest.mark.asyncio
+    async def test_serve_tile_cache_missing(self) -> None:
+        server._PYRAMID_SERVER = None
+        server._TILEGENERATION = TileGeneration(
+            config_file=AnyioPath("tilegeneration/test-nosns.yaml"),
+            configure_logging=False,
+        )
+        with Path("tilegeneration/test-nosns.yaml").open() as f:
+            config = DatedConfig(
+                config=yaml.safe_load(f),
+                mtime=Path("tilegeneration/test-nosns.yaml").stat().st_mtime,
+                file=AnyioPath("tilegeneration/test-nosns.yaml"),
+            )
+        params = {
+            "SERVICE": "WMTS",
+            "VERSION": "1.0.0",
+            "REQUEST": "GetTile",
+            "FORMAT": "image/png",
+            "LAYER": "point_hash",
+            "STYLE": "default",
+            "TILEMATRIXSET": "swissgrid_5",
+            "TILEMATRIX": "1",
+            "TILEROW": "12",
+            "TILECOL": "14",
+        }
+        with (
+            patch.object(server.server, "tile_cache", TileCache(max_size=100000, max_item_size=10000)),
+            patch.object(settings.tile_cache, "negative_ttl", 0.1),
+        ):
+            with pytest.raises(HTTPException) as response:
+                await server.server.serve(params, config, "localhost", None)
+            assert response.value.status_code == 204
+
+            # The tile is generated after the first request
+            tile_path = Path("/tmp/tiles/1.0.0/point_hash/default/2012/swissgrid_5/1/12/14.png")
+            tile_path.parent.mkdir(parents=True, exist_ok=True)
+            tile_path.write_bytes(b"data")
+            try:
+                await asyncio.sleep(0.2)
+                response = await server.server.serve(params, config, "localhost", None)
+                assert response.status_code == 200
+                assert response.body == b"data"
+            finally:
+                tile_path.unlink()
+
     @pytest.mark.asyncio
     async def test_mbtiles_rest(self) -> None:
         with LogCapture("tilecloud_chain", level=30) as log_capture:
@@ -1016,8 +1065,10 @@ class TestServe(CompareCase):
             }
             response = await server.server.serve(params, config, "localhost", None)
             assert response.headers["Content-Type"] == "application/xml"
+            # Sent from the file
+            assert isinstance(response, FileResponse)
             self.assert_result_equals(
-                response.body.decode("utf-8"),
+                Path(response.path).read_text(encoding="utf-8"),
                 _CAPABILITIES,
                 regex=True,
             )
@@ -1029,8 +1080,10 @@ class TestServe(CompareCase):
             }
             response = await server.server.serve(params, config, "localhost", None)
             assert response.headers["Content-Type"] == "application/xml"
+            # Sent from the file
+            assert isinstance(response, FileResponse)
             self.assert_result_equals(
-                response.body.decode("utf-8"),
+                Path(response.path).read_text(encoding="utf-8"),
                 _CAPABILITIES,
                 regex=True,
             )
@@ -1404,6 +1457,11 @@ class TestServe(CompareCase):
         assert "connection" not in response.headers
         assert "keep-alive" not in response.headers
         assert "x-drop-me" not in response.headers
+        # The session is kept for the next requests
+        session = server.server.forward_sessions["example.test"]
+        assert not session.closed
+        await server.server.close()
+        assert session.closed
 
     @pytest.mark.asyncio
     async def test_forward_drops_connection_listed_headers_with_lowercase_connection_key(self) -> None:
@@ -1575,6 +1633,15 @@ class TestServe(CompareCase):
         response = client.get("/tiles/static/test-legend.png")
         assert response.status_code == 200
         assert response.content == png_content
+        etag = response.headers["ETag"]
+
+        response = client.get("/tiles/static/test-legend.png", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+        response = client.get("/tiles/static/test-legend.png", headers={"Range": "bytes=0-7"})
+        assert response.status_code == 206
+        assert response.content == png_content[:8]
 
         response = client.get("/tiles/static/test-legend.txt")
         assert response.status_code == 403
@@ -1584,3 +1651,89 @@ class TestServe(CompareCase):
 
         response = client.get("/tiles/static/nonexistent.png")
         assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_forward_semaphore_hosts_limit(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    hosts_limit = tmp_path / "hosts_limit.yaml"
+    hosts_limit.write_text("hosts:\n  wms:\n    concurrent: 2\n", encoding="utf-8")
+    monkeypatch.setattr(settings, "hosts_limit", AnyioPath(hosts_limit))
+    wmts_server = server.Server()
+
+    semaphore = await wmts_server._get_forward_semaphore("wms")  # noqa: SLF001
+    assert semaphore._value == 2  # noqa: SLF001
+    assert await wmts_server._get_forward_semaphore("wms") is semaphore  # noqa: SLF001
+
+    # The semaphore is recreated when the hosts limit file changes
+    hosts_limit.write_text("hosts:\n  wms:\n    concurrent: 4\n", encoding="utf-8")
+    os.utime(hosts_limit, (0, 1000))
+    # Not checked before the interval
+    monkeypatch.setattr(settings, "config_check_interval", 3600)
+    assert await wmts_server._get_forward_semaphore("wms") is semaphore  # noqa: SLF001
+    monkeypatch.setattr(settings, "config_check_interval", 0)
+    semaphore = await wmts_server._get_forward_semaphore("wms")  # noqa: SLF001
+    assert semaphore._value == 4  # noqa: SLF001
+
+
+@pytest.mark.asyncio
+async def test_fill_legend_failed(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def get_layer_legend(layer_name: str, *args: object) -> list[dict[str, str]]:
+        if layer_name == "error":
+            raise RuntimeError("legend error")
+        return [{"mime_type": "image/png", "href": f"http://legend/{layer_name}.png"}]
+
+    tile_generation = MagicMock(layer_legends={})
+    monkeypatch.setattr(server, "_TILEGENERATION", tile_generation)
+    monkeypatch.setattr(server, "_get_layer_legend", get_layer_legend)
+    layers = {"point": {"legend": {"enabled": True}}, "error": {"legend": {"enabled": True}}}
+    config = MagicMock(config={"layers": layers})
+
+    # The capabilities aren't cached when a legend failed
+    assert not await server._fill_legend({}, "http://wmts/static/", config=config)  # noqa: SLF001
+    assert list(tile_generation.layer_legends) == ["point"]
+
+    del layers["error"]
+    assert await server._fill_legend({}, "http://wmts/static/", config=config)  # noqa: SLF001
+
+
+@pytest.mark.asyncio
+async def test_capabilities_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    config_file = tmp_path / "config.yaml"
+    shutil.copy(Path(__file__).parent / "tilegeneration/test-serve-wmtscapabilities.yaml", config_file)
+    monkeypatch.setattr(settings, "config_check_interval", 0)
+    monkeypatch.setattr(settings.server, "capabilities_cache", True)
+    monkeypatch.setattr(
+        server,
+        "_TILEGENERATION",
+        TileGeneration(config_file=AnyioPath(config_file), configure_logging=False),
+    )
+    nb_renders = 0
+    render_capabilities = server._render_capabilities  # noqa: SLF001
+
+    def count_render_capabilities(content: str) -> server.RenderedCapabilities:
+        nonlocal nb_renders
+        nb_renders += 1
+        return render_capabilities(content)
+
+    monkeypatch.setattr(server, "_render_capabilities", count_render_capabilities)
+    wmts_server = server.Server()
+    params = {"SERVICE": "WMTS", "VERSION": "1.0.0", "REQUEST": "GetCapabilities"}
+
+    async def get_capabilities() -> bytes:
+        config = await server._TILEGENERATION.get_config(AnyioPath(config_file))  # noqa: SLF001
+        response = await wmts_server.serve(params, config, "localhost", None)
+        assert response.status_code == 200
+        return response.body
+
+    body = await get_capabilities()
+    assert nb_renders == 1
+
+    # Served from the cache
+    assert await get_capabilities() == body
+    assert nb_renders == 1
+
+    # Invalidated when the configuration file changes
+    stat = config_file.stat()
+    os.utime(config_file, (stat.st_atime, stat.st_mtime + 10))
+    assert await get_capabilities() == body
+    assert nb_renders == 2
@@ -0,0 +1,35 @@
+# Copyright (c) 2026 by Camptocamp
+"""Test the throttled cache of the configuration files status."""
+
+from pathlib import Path
+
+import anyio
+import pytest
+
+from tilecloud_chain.stat_cache import StatCache
+
+
+@pytest.mark.asyncio
+async def test_stat_cache(tmp_path: Path) -> None:
+    path = anyio.Path(tmp_path / "config.yaml")
+    cache = StatCache(interval=3600)
+
+    assert await cache.stat(path) is None
+    await path.write_text("")
+    # Not revalidated before the interval
+    assert await cache.stat(path) is None
+
+    cache.invalidate(path)
+    config_stat = await cache.stat(path)
+    assert config_stat is not None
+    await path.unlink()
+    assert await cache.stat(path) is config_stat
+
+    cache.invalidate()
+    assert await cache.stat(path) is None
+
+    # Always revalidated
+    cache = StatCache(interval=0)
+    assert await cache.stat(path) is None
+    await path.write_text("")
+    assert await cache.stat(path) is not None
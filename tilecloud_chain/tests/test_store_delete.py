@@ -0,0 +1,65 @@
+# Copyright (c) 2026 by Camptocamp
+"""Test the bulk delete of the tile stores."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+from tilecloud import Tile, TileCoord
+from tilecloud.layout.template import TemplateTileLayout
+
+from tilecloud_chain import HashDropper
+from tilecloud_chain.store import AsyncTileStore
+from tilecloud_chain.store.filesystem import FilesystemTileStore
+
+
+class _RecordStore(AsyncTileStore):
+    def __init__(self) -> None:
+        self.deleted: list[list[Tile]] = []
+
+    async def delete(self, tiles: list[Tile]) -> list[Tile]:
+        self.deleted.append(tiles)
+        return tiles
+
+
+@pytest.mark.asyncio
+async def test_hash_dropper_bulk_delete() -> None:
+    store = _RecordStore()
+    hash_dropper = HashDropper(4, "0" * 40, store=store)
+
+    tile = Tile(TileCoord(0, 0, 0, 2), data=b"data", metadata={})
+    tile.empty = True
+    assert await hash_dropper(tile) is None
+    assert len(store.deleted) == 1
+    assert [str(tile.tilecoord) for tile in store.deleted[0]] == ["0/0/0", "0/0/1", "0/1/0", "0/1/1"]
+
+
+@pytest.mark.asyncio
+async def test_hash_dropper_grouped_delete() -> None:
+    store = _RecordStore()
+    hash_dropper = HashDropper(4, "0" * 40, store=store)
+    metatile = Tile(TileCoord(1, 0, 0, 2), metadata={})
+    metatile.elapsed_togenerate = 4
+    tiles = []
+    for tilecoord in metatile.tilecoord:
+        tile = Tile(tilecoord, data=b"data", metadata={}, metatile=metatile)
+        tile.empty = True
+        tiles.append(tile)
+
+    # The tiles of a meta tile are dropped concurrently
+    assert await asyncio.gather(*[hash_dropper(tile) for tile in tiles]) == [None] * 4
+    assert store.deleted == [tiles]
+    assert metatile.elapsed_togenerate == 0
+
+
+@pytest.mark.asyncio
+async def test_filesystem_bulk_delete(tmp_path: Path) -> None:
+    store = FilesystemTileStore(TemplateTileLayout(str(tmp_path / "%(z)d/%(x)d/%(y)d.png")))
+    tiles = [Tile(tilecoord, metadata={}) for tilecoord in TileCoord(0, 0, 0, 2)]
+    for tile in tiles[:3]:
+        tile.data = b"data"
+        await store.put_one(tile)
+
+    assert await store.delete(tiles) == tiles
+    assert all(tile.error is None for tile in tiles)
+    assert list(tmp_path.glob("**/*.png")) == []
@@ -0,0 +1,65 @@
+# Copyright (c) 2026 by Camptocamp
+"""Test the in memory tile cache of the server."""
+
+import time
+
+from anyio import Path
+from tilecloud import Tile, TileCoord
+
+from tilecloud_chain.tile_cache import TileCache
+
+
+def _key(x: int, dimension: str = "a") -> tuple:
+    return TileCache.key(
+        Path("config.yaml"),
+        Tile(TileCoord(0, x, 0), metadata={"layer": "l", "grid": "g", "dimension_DATE": dimension}),
+    )
+
+
+def test_lru() -> None:
+    cache = TileCache(max_size=3 * (200 + 100), max_item_size=1000)
+    for x in range(3):
+        cache.put(_key(x), 1, b"0" * 100, "image/png", 3600)
+    assert len(cache) == 3
+    assert cache.size == 3 * 300
+
+    # Use the first tile, the second become the least recently used one
+    assert cache.get(_key(0), 1) is not None
+    cache.put(_key(3), 1, b"0" * 100, "image/png", 3600)
+    assert cache.size <= cache.max_size
+    assert cache.get(_key(1), 1) is None
+    assert cache.get(_key(0), 1) is not None
+    assert cache.get(_key(3), 1) is not None
+
+    # Too big
+    cache.put(_key(4), 1, b"0" * 1000, "image/png", 3600)
+    assert cache.get(_key(4), 1) is None
+
+    # The dimensions are in the key
+    assert cache.get(_key(0, "b"), 1) is None
+
+
+def test_invalidation() -> None:
+    cache = TileCache(max_size=10000, max_item_size=1000)
+    cache.put(_key(0), 1, b"data", "image/png", 3600)
+    cache.put(_key(1), 1, None, None, 3600)
+    cache.put(_key(2), 1, b"data", "image/png", 0.01)
+
+    cached_tile = cache.get(_key(1), 1)
+    assert cached_tile is not None
+    assert cached_tile.data is None
+
+    # Configuration file changed
+    assert cache.get(_key(0), 2) is None
+    assert cache.get(_key(0), 1) is None
+
+    time.sleep(0.02)
+    assert cache.get(_key(2), 1) is None
+    assert len(cache) == 1
+
+
+def test_disabled() -> None:
+    cache = TileCache(max_size=0, max_item_size=1000)
+    assert not cache.enabled
+    cache.put(_key(0), 1, b"data", "image/png", 3600)
+    assert len(cache) == 0
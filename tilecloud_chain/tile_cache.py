@@ -0,0 +1,144 @@
+# Copyright (c) 2026 by Camptocamp
+"""In memory LRU cache of the tiles served by the WMTS server."""
+
+import datetime
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from anyio import Path
+from prometheus_client import Counter, Gauge
+from tilecloud import Tile
+
+_TILE_CACHE_COUNTER = Counter(
+    "tilecloud_chain_server_tile_cache",
+    "Number of tiles got from the server tile cache",
+    ["result"],
+)
+_TILE_CACHE_EVICTION_COUNTER = Counter(
+    "tilecloud_chain_server_tile_cache_eviction",
+    "Number of tiles removed from the server tile cache",
+    ["reason"],
+)
+_TILE_CACHE_SIZE = Gauge("tilecloud_chain_server_tile_cache_size", "Size of the server tile cache in bytes")
+
+# Estimated memory used by an entry without the data
+_ENTRY_OVERHEAD = 200
+
+TileCacheKey = tuple[Path, str, str, tuple[tuple[str, str], ...], int, int, int]
+
+
+@dataclass
+class CachedTile:
+    """A cached tile, the data is None for a tile that isn't in the store."""
+
+    data: bytes | None
+    content_type: str | None
+    mtime: float
+    expires_at: float
+    etag: str | None = None
+    last_modified: datetime.datetime | None = None
+
+    @property
+    def size(self) -> int:
+        """Get the estimated memory used by the entry."""
+        return _ENTRY_OVERHEAD + (len(self.data) if self.data is not None else 0)
+
+
+class TileCache:
+    """
+    In memory LRU cache of tiles, limited by the size of the data.
+
+    The entries expire after the configured time and are invalidated when the configuration file
+    modification time changes.
+    """
+
+    def __init__(self, max_size: int, max_item_size: int) -> None:
+        """Initialize, the cache is disabled when ``max_size`` is 0."""
+        self.max_size = max_size
+        self.max_item_size = max_item_size
+        self.size = 0
+        self._entries: OrderedDict[TileCacheKey, CachedTile] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        """Return true if the cache is enabled."""
+        return self.max_size > 0
+
+    @staticmethod
+    def key(config_file: Path, tile: Tile) -> TileCacheKey:
+        """Get the cache key of the tile, from the layer, the grid and the dimensions metadata."""
+        metadata = tile.metadata
+        return (
+            config_file,
+            metadata["layer"],
+            metadata["grid"],
+            tuple(sorted((key, value) for key, value in metadata.items() if key.startswith("dimension_"))),
+            tile.tilecoord.z,
+            tile.tilecoord.x,
+            tile.tilecoord.y,
+        )
+
+    def _remove(self, key: TileCacheKey, reason: str) -> None:
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+        _TILE_CACHE_EVICTION_COUNTER.labels(reason).inc()
+        _TILE_CACHE_SIZE.set(self.size)
+
+    def get(self, key: TileCacheKey, mtime: float) -> CachedTile | None:
+        """Get the cached tile, if it's still valid for the configuration modification time."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.mtime != mtime:
+                self._remove(key, "config")
+                entry = None
+            elif entry.expires_at <= time.monotonic():
+                self._remove(key, "expired")
+                entry = None
+        if entry is None:
+            _TILE_CACHE_COUNTER.labels("miss").inc()
+            return None
+        self._entries.move_to_end(key)
+        _TILE_CACHE_COUNTER.labels("hit").inc()
+        return entry
+
+    def put(
+        self,
+        key: TileCacheKey,
+        mtime: float,
+        data: bytes | None,
+        content_type: str | None,
+        expires_seconds: float,
+        etag: str | None = None,
+        last_modified: datetime.datetime | None = None,
+    ) -> None:
+        """Put a tile in the cache, and remove the least recently used ones to respect the maximum size."""
+        if not self.enabled or expires_seconds <= 0:
+            return
+        entry = CachedTile(
+            data,
+            content_type,
+            mtime,
+            time.monotonic() + expires_seconds,
+            etag,
+            last_modified,
+        )
+        if entry.size > self.max_item_size:
+            return
+        if key in self._entries:
+            self._remove(key, "replaced")
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_size:
+            self._remove(next(iter(self._entries)), "size")
+        _TILE_CACHE_SIZE.set(self.size)
+
+    def clear(self) -> None:
+        """Remove all the entries."""
+        self._entries.clear()
+        self.size = 0
+        _TILE_CACHE_SIZE.set(self.size)
+
+    def __len__(self) -> int:
+        """Get the number of entries."""
+        return len(self._entries)
@@ -68,6 +68,17 @@ class TimedTileStoreWrapper(AsyncTileStore):
         ).time():
             return await self._tile_store.delete_one(tile)
 
+    async def delete(self, tiles: list[Tile]) -> list[Tile]:
+        """See in superclass."""
+        metadata = tiles[0].metadata if tiles else {}
+        with _TILESTORE_OPERATION_SUMMARY.labels(
+            metadata.get("layer", "none"),
+            metadata.get("host", "none"),
+            self._store_name,
+            "delete",
+        ).time():
+            return await self._tile_store.delete(tiles)
+
     async def list(self) -> AsyncIterator[Tile]:
         """See in superclass."""
         async for tile in self._time_iteration():
@@ -83,6 +94,16 @@ class TimedTileStoreWrapper(AsyncTileStore):
         ).time():
             return await self._tile_store.get_one(tile)
 
+    async def head_one(self, tile: Tile) -> Tile | None:
+        """See in superclass."""
+        with _TILESTORE_OPERATION_SUMMARY.labels(
+            tile.metadata.get("layer", "none"),
+            tile.metadata.get("host", "none"),
+            self._store_name,
+            "head_one",
+        ).time():
+            return await self._tile_store.head_one(tile)
+
     async def put_one(self, tile: Tile) -> Tile:
         """See in superclass."""
         with _TILESTORE_OPERATION_SUMMARY.labels(
@@ -99,6 +120,12 @@ class TimedTileStoreWrapper(AsyncTileStore):
             async for tile in self._tile_store.get(tiles):
                 yield tile
 
+    async def put(self, tiles: AsyncIterator[Tile]) -> AsyncIterator[Tile]:
+        """See in superclass."""
+        with _TILESTORE_OPERATION_SUMMARY.labels("none", "none", self._store_name, "put").time():
+            async for tile in self._tile_store.put(tiles):
+                yield tile
+
     async def close(self) -> None:
         """See in superclass."""
         await self._tile_store.close()